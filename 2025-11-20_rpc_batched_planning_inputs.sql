@@ -0,0 +1,121 @@
+-- RPC: Batched planning inputs for load_planning_context
+-- get_required_minutes_batch: get_required_minutes for several children in one call
+-- get_standards_gaps_batch: get_standards_gaps for every active preference of several children
+-- Both return one row per (child, ...) so the backend regroups them by child_id
+
+CREATE OR REPLACE FUNCTION public.get_required_minutes_batch(
+  p_family_id uuid,
+  p_child_ids uuid[],
+  p_week_start date,
+  p_weeks_ahead int DEFAULT 2
+)
+RETURNS TABLE(
+  child_id uuid,
+  subject_id uuid,
+  week date,
+  required_minutes int
+)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH base AS (
+    SELECT s.child_id,
+           s.subject_id,
+           generate_series(
+             p_week_start,
+             p_week_start + ((p_weeks_ahead-1)*7),
+             interval '7 day'
+           )::date AS week,
+           s.expected_weekly_minutes
+    FROM syllabi s
+    WHERE s.family_id = p_family_id
+      AND s.child_id = ANY(p_child_ids)
+      AND (p_week_start BETWEEN s.start_date AND COALESCE(s.end_date, p_week_start))
+  ),
+  vel AS (
+    SELECT lv.child_id, lv.subject_id, lv.velocity
+    FROM learning_velocity lv
+    WHERE lv.family_id = p_family_id
+      AND lv.child_id = ANY(p_child_ids)
+  )
+  SELECT b.child_id,
+         b.subject_id,
+         b.week,
+         CEIL(b.expected_weekly_minutes * COALESCE(v.velocity, 1.0))::int AS required_minutes
+  FROM base b
+  LEFT JOIN vel v ON v.child_id = b.child_id AND v.subject_id = b.subject_id
+  ORDER BY b.child_id, b.week, b.subject_id;
+$$;
+
+-- Top p_limit uncovered standards per (child, state, grade) preference
+CREATE OR REPLACE FUNCTION public.get_standards_gaps_batch(
+  p_child_ids uuid[],
+  p_subject text DEFAULT NULL,
+  p_limit integer DEFAULT 10
+)
+RETURNS TABLE(
+  child_id uuid,
+  state_code text,
+  grade_level text,
+  standard_id uuid,
+  standard_code text,
+  standard_text text,
+  subject text,
+  estimated_hours numeric,
+  prerequisites text[]
+)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH prefs AS (
+    SELECT DISTINCT usp.child_id, usp.state_code, usp.grade_level
+    FROM user_standards_preferences usp
+    WHERE usp.child_id = ANY(p_child_ids)
+      AND usp.is_active = true
+  ),
+  gaps AS (
+    SELECT p.child_id,
+           p.state_code,
+           p.grade_level,
+           s.id AS standard_id,
+           s.standard_code,
+           s.standard_text,
+           s.subject,
+           s.estimated_hours,
+           s.prerequisites,
+           ROW_NUMBER() OVER (
+             PARTITION BY p.child_id, p.state_code, p.grade_level
+             ORDER BY s.standard_code
+           ) AS rn
+    FROM prefs p
+    INNER JOIN standards s ON (
+      s.state_code = p.state_code
+      AND s.grade_level = p.grade_level
+      AND (p_subject IS NULL OR s.subject = p_subject)
+    )
+    LEFT JOIN standards_coverage sc ON (
+      sc.child_id = p.child_id
+      AND sc.standard_id = s.id
+    )
+    WHERE sc.id IS NULL -- Not covered yet
+  )
+  SELECT g.child_id,
+         g.state_code,
+         g.grade_level,
+         g.standard_id,
+         g.standard_code,
+         g.standard_text,
+         g.subject,
+         g.estimated_hours,
+         g.prerequisites
+  FROM gaps g
+  WHERE g.rn <= p_limit
+  ORDER BY g.child_id, g.state_code, g.grade_level, g.standard_code;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_required_minutes_batch(uuid, uuid[], date, int) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.get_required_minutes_batch(uuid, uuid[], date, int) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_standards_gaps_batch(uuid[], text, integer) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.get_standards_gaps_batch(uuid[], text, integer) TO service_role;
@@ -1,66 +1,249 @@
+import math
 import os
 import time
 import threading
-from typing import Optional
+from typing import Any, Dict, Optional
+
+import httpx
+import jwt
 from fastapi import Depends, HTTPException, status, Request
 
+from state_backend import get_state_backend, run_state_io
 from supabase_client import get_admin_client
 
-_rate_lock = threading.Lock()
-_rate_hits = {}
-_RATE_LIMIT_WINDOW = 60  # seconds
-_RATE_LIMIT_MAX = 60  # requests per window
+# Access tokens are verified locally (signature, expiry, audience).
+# HS256 tokens use SUPABASE_JWT_SECRET; asymmetric tokens use the project's JWKS.
+_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+_JWT_ISSUER = os.getenv("SUPABASE_JWT_ISSUER")  # optional, e.g. https://<ref>.supabase.co/auth/v1
+_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL",
+    f"{(os.getenv('SUPABASE_URL') or '').rstrip('/')}/auth/v1/.well-known/jwks.json",
+)
+_JWKS_TTL_SECONDS = float(os.getenv("AUTH_JWKS_TTL_SECONDS", "600"))
+_JWKS_MIN_REFRESH_SECONDS = float(os.getenv("AUTH_JWKS_MIN_REFRESH_SECONDS", "30"))
+_JWT_LEEWAY_SECONDS = float(os.getenv("AUTH_JWT_LEEWAY_SECONDS", "10"))
+# off: local only; always: local + auth server (catches revoked sessions)
+_REMOTE_CHECK = os.getenv("AUTH_REMOTE_CHECK", "off").lower()
+
+_ASYMMETRIC_ALGS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512", "EdDSA"}
+
+_jwks_lock = threading.Lock()
+_jwks_keys: Dict[str, Any] = {}
+_jwks_fetched_at = 0.0
+
+# Token bucket per client (user id when authenticated, else IP), shared by all
+# routes. Buckets live in the state backend so every worker enforces the same limit.
+_RATE_NAMESPACE = "rate_limit"
+RATE_LIMIT_CAPACITY = float(os.getenv("RATE_LIMIT_CAPACITY", "120"))  # burst, in cost units
+RATE_LIMIT_REFILL_PER_SECOND = float(os.getenv("RATE_LIMIT_REFILL_PER_SECOND", "2"))
+# A bucket left alone this long is full again, so dropping it loses nothing
+_RATE_IDLE_SECONDS = RATE_LIMIT_CAPACITY / RATE_LIMIT_REFILL_PER_SECOND
+
+# Cost per request by route template; unlisted routes cost 1.
+# LLM calls are the expensive ones (model time and API spend).
+ROUTE_COSTS: Dict[str, float] = {
+    "/llm/parse-syllabus": 20,
+    "/llm/suggest-plan": 20,
+    "/api/ai/pack_week": 20,
+    "/api/ai/catch_up": 20,
+    "/api/ai/generate_syllabus": 20,
+    "/api/standards/ai/plan": 20,
+    "/api/ai/summarize_progress": 10,
+    "/api/ai/inspire_learning": 10,
+    "/api/ai/event_tags": 5,
+    "/api/records/generate_transcript": 5,
+    "/api/year/rebalance": 5,
+    "/api/google/calendar/sync": 5,
+}
 
 
 def _rate_limit_key(request: Request) -> str:
+    # get_current_user runs first on authenticated routes and leaves the user here
+    user = getattr(request.state, "user", None)
+    if user and user.get("id"):
+        return f"user:{user['id']}"
     client_ip = request.client.host if request.client else "unknown"
-    route = request.url.path
-    return f"{client_ip}:{route}"
+    return f"ip:{client_ip}"
+
+
+def _route_cost(request: Request) -> float:
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or request.url.path
+    return min(float(ROUTE_COSTS.get(path, 1)), RATE_LIMIT_CAPACITY)
 
 
-def rate_limiter(request: Request):
+async def rate_limiter(request: Request):
     key = _rate_limit_key(request)
+    cost = _route_cost(request)
     now = time.time()
-    with _rate_lock:
-        hits, window_start = _rate_hits.get(key, (0, now))
-        if now - window_start > _RATE_LIMIT_WINDOW:
-            hits = 0
-            window_start = now
-        hits += 1
-        _rate_hits[key] = (hits, window_start)
-        if hits > _RATE_LIMIT_MAX:
-            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many requests")
 
+    def _take(current):
+        tokens, updated_at = current or (RATE_LIMIT_CAPACITY, now)
+        tokens = min(RATE_LIMIT_CAPACITY, tokens + (now - updated_at) * RATE_LIMIT_REFILL_PER_SECOND)
+        if tokens >= cost:
+            return (tokens - cost, now), 0.0
+        # Seconds until enough tokens have refilled
+        return (tokens, now), (cost - tokens) / RATE_LIMIT_REFILL_PER_SECOND
 
-def get_current_user(request: Request) -> dict:
-    auth_header = request.headers.get("Authorization")
-    token: Optional[str] = None
+    backend = get_state_backend()
+    retry_after = await run_state_io(
+        backend, backend.update, _RATE_NAMESPACE, key, _take, ttl_seconds=_RATE_IDLE_SECONDS
+    )
+    if retry_after > 0:
+        _record("rate_limit_rejected")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
 
-    if auth_header and auth_header.lower().startswith("bearer "):
-        token = auth_header.split(" ", 1)[1].strip()
-        print(f"[AUTH] Found Bearer token: {token[:20]}...")
-    elif "sb-access-token" in request.cookies:
-        token = request.cookies.get("sb-access-token")
-        print(f"[AUTH] Found cookie token")
+
+def rate_limiter_stats() -> Dict[str, Any]:
+    """Bucket count and approximate memory used by the limiter (blocking; see run_state_io)."""
+    usage = get_state_backend().usage(_RATE_NAMESPACE)
+    return {
+        "buckets": usage["keys"],
+        "bytes": usage["bytes"],
+        "capacity": RATE_LIMIT_CAPACITY,
+        "refill_per_second": RATE_LIMIT_REFILL_PER_SECOND,
+        "idle_eviction_seconds": _RATE_IDLE_SECONDS,
+    }
+
+
+def _record(name: str):
+    try:
+        from metrics import increment_counter
+        increment_counter(name)
+    except Exception:
+        pass
+
+
+def _fetch_jwks() -> Dict[str, Any]:
+    resp = httpx.get(_JWKS_URL, timeout=5.0)
+    resp.raise_for_status()
+    keys: Dict[str, Any] = {}
+    for jwk in resp.json().get("keys", []):
+        try:
+            keys[jwk.get("kid") or ""] = jwt.PyJWK(jwk)
+        except jwt.PyJWTError as exc:
+            print(f"[AUTH] Skipping unusable JWK kid={jwk.get('kid')!r}: {exc}")
+    return keys
+
+
+def _get_signing_key(kid: Optional[str]) -> Optional[Any]:
+    """Return the cached JWK for kid, refetching the JWKS when stale or on an unknown kid (key rotation).
+
+    The fetch runs outside _jwks_lock: the thread that claims the refresh
+    fetches while every other thread keeps answering from the cached keys.
+    """
+    global _jwks_keys, _jwks_fetched_at
+    kid = kid or ""
+    with _jwks_lock:
+        now = time.time()
+        fresh = now - _jwks_fetched_at < _JWKS_TTL_SECONDS
+        if fresh and kid in _jwks_keys:
+            return _jwks_keys[kid]
+        # Unknown kid: refetch, but not more often than the min interval
+        if now - _jwks_fetched_at < _JWKS_MIN_REFRESH_SECONDS:
+            return _jwks_keys.get(kid)
+        # Claim the refresh so concurrent callers don't fetch too
+        _jwks_fetched_at = now
+        stale_key = _jwks_keys.get(kid)
+    try:
+        keys = _fetch_jwks()
+    except Exception as exc:
+        print(f"[AUTH] JWKS fetch failed: {type(exc).__name__}: {exc}")
+        return stale_key
+    _record("auth_jwks_refresh")
+    with _jwks_lock:
+        _jwks_keys = keys
+        return keys.get(kid)
+
+
+def _verify_locally(token: str) -> Optional[dict]:
+    """Verify the token without a network hop. Returns claims, or None when no key material is available."""
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token") from exc
+
+    alg = header.get("alg")
+    if alg == "HS256":
+        if not _JWT_SECRET:
+            return None
+        key: Any = _JWT_SECRET
+    elif alg in _ASYMMETRIC_ALGS:
+        jwk = _get_signing_key(header.get("kid"))
+        if jwk is None:
+            return None
+        key = jwk.key
     else:
-        print(f"[AUTH] No Authorization header found. Headers: {list(request.headers.keys())}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[alg],
+            audience=_JWT_AUDIENCE,
+            issuer=_JWT_ISSUER,
+            leeway=_JWT_LEEWAY_SECONDS,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.ExpiredSignatureError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Access token expired") from exc
+    except jwt.PyJWTError as exc:
+        print(f"[AUTH] Token validation error: {type(exc).__name__}: {str(exc)}")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token") from exc
+    return claims
 
-    if not token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
 
+def _verify_remotely(token: str) -> dict:
     supabase = get_admin_client()
     try:
         resp = supabase.auth.get_user(token)
         if not resp or not resp.user:
             print(f"[AUTH] Invalid token response")
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
+    except HTTPException:
+        raise
     except Exception as exc:
         print(f"[AUTH] Token validation error: {type(exc).__name__}: {str(exc)}")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token") from exc
+    return {"id": resp.user.id, "email": resp.user.email}
+
+
+def get_current_user(request: Request) -> dict:
+    auth_header = request.headers.get("Authorization")
+    token: Optional[str] = None
 
-    user = resp.user
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+    if auth_header and auth_header.lower().startswith("bearer "):
+        token = auth_header.split(" ", 1)[1].strip()
+    elif "sb-access-token" in request.cookies:
+        token = request.cookies.get("sb-access-token")
 
-    print(f"[AUTH] Authenticated user: {user.email}")
-    return {"id": user.id, "email": user.email}
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
+
+    try:
+        claims = _verify_locally(token)
+    except HTTPException:
+        _record("auth_failures")
+        raise
+
+    if claims is None:
+        # No secret or JWKS key for this token: ask the auth server
+        _record("auth_remote_verify")
+        request.state.user = _verify_remotely(token)
+        return request.state.user
+
+    _record("auth_local_verify")
+    user = {"id": claims["sub"], "email": claims.get("email")}
+    if _REMOTE_CHECK == "always":
+        _record("auth_remote_verify")
+        remote = _verify_remotely(token)
+        if remote["id"] != user["id"]:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid access token")
+    request.state.user = user
+    return user
@@ -0,0 +1,226 @@
+"""
+Per-child availability for a planning window.
+
+Blackout ranges are turned into one day mask per child (a bytearray with a
+byte per day of the window, family-wide blackouts applied to every child),
+and calendar_days_cache rows are indexed by day offset. Checking a
+(child, day) pair is then two list lookups instead of a scan over every
+blackout.
+
+Availability keeps only those masks and rows. Entries (the dicts the week
+view has always returned) are built while iterating, so filtering out
+frozen days or counting entries never creates them. The planning context
+carries the Availability itself: the prompt encoder writes rows() straight
+into a table and the token budget filters it with masks, so entry dicts
+are only built for callers that iterate it.
+
+    avail = build_availability(children, cache_rows, blackouts, start, end)
+    avail = avail.without_days(frozen_days, frozen_by_child)
+    context["availability"] = avail
+"""
+import datetime as dt
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+
+def _parse_date(value: Any) -> Optional[dt.date]:
+    try:
+        return dt.date.fromisoformat(value)
+    except Exception:
+        return None
+
+
+def blackout_masks(
+    blackouts: Iterable[Mapping[str, Any]],
+    start_date: dt.date,
+    days: int,
+) -> Tuple[bytearray, Dict[str, bytearray]]:
+    """(family mask, {child_id: mask}) with 1 for each blacked-out day of the window."""
+    family_mask = bytearray(days)
+    child_masks: Dict[str, bytearray] = {}
+    for bo in blackouts:
+        starts = _parse_date(bo.get("starts_on"))
+        ends = _parse_date(bo.get("ends_on"))
+        if starts is None or ends is None:
+            continue
+        first = max((starts - start_date).days, 0)
+        last = min((ends - start_date).days, days - 1)
+        if first > last:
+            continue
+        child_id = bo.get("child_id")
+        if child_id is None:
+            mask = family_mask
+        else:
+            mask = child_masks.get(child_id)
+            if mask is None:
+                mask = child_masks[child_id] = bytearray(days)
+        mask[first:last + 1] = b"\x01" * (last - first + 1)
+    return family_mask, child_masks
+
+
+# Entry fields in order; rows() yields values in this order
+COLUMNS = ("child_id", "child_name", "date", "day_status", "windows")
+
+
+class Availability:
+    """Lazily built availability entries, one per child per day of the window.
+
+    Read-only: the filtering methods return new instances sharing the masks.
+    """
+
+    __slots__ = ("start_date", "dates", "children", "named", "_off", "_cache", "_dropped")
+
+    def __init__(
+        self,
+        start_date: dt.date,
+        dates: List[str],
+        children: List[Tuple[str, str]],
+        off: Dict[str, bytearray],
+        cache: Dict[str, List[Optional[Mapping[str, Any]]]],
+        dropped: Optional[Dict[str, bytearray]] = None,
+        named: bool = True,
+    ):
+        self.start_date = start_date
+        self.dates = dates
+        self.children = children
+        self.named = named
+        self._off = off
+        self._cache = cache
+        self._dropped = dropped or {}
+
+    def _replace(self, **changes: Any) -> "Availability":
+        fields = {"dropped": self._dropped, "named": self.named, **changes}
+        return Availability(self.start_date, self.dates, self.children, self._off, self._cache, **fields)
+
+    def __len__(self) -> int:
+        total = len(self.children) * len(self.dates)
+        return total - sum(mask.count(1) for mask in self._dropped.values())
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return COLUMNS if self.named else tuple(c for c in COLUMNS if c != "child_name")
+
+    def _entries(self) -> Iterator[Tuple[str, str, str, Optional[str], List[Dict[str, Any]]]]:
+        dates = self.dates
+        for child_id, child_name in self.children:
+            off = self._off[child_id]
+            cache = self._cache[child_id]
+            dropped = self._dropped.get(child_id)
+            for offset, date_str in enumerate(dates):
+                if dropped is not None and dropped[offset]:
+                    continue
+                row = cache[offset]
+                day_status = row.get("day_status") if row else None
+                if off[offset]:
+                    day_status = "off"
+                windows = []
+                if day_status != "off" and row:
+                    first_block = row.get("first_block_start")
+                    last_block = row.get("last_block_end")
+                    if first_block and last_block:
+                        windows = [{
+                            "start": first_block,
+                            "end": last_block,
+                            "status": day_status or "teach",
+                        }]
+                yield child_id, child_name, date_str, day_status or ("teach" if windows else None), windows
+
+    def rows(self) -> Iterator[List[Any]]:
+        """Entry values as lists in columns order (no per-entry dicts)."""
+        for entry in self._entries():
+            yield list(entry) if self.named else [entry[0], *entry[2:]]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        columns = self.columns
+        for row in self.rows():
+            yield dict(zip(columns, row))
+
+    def is_off(self, child_id: str, date_obj: dt.date) -> bool:
+        """True when a blackout covers this child on this day."""
+        offset = (date_obj - self.start_date).days
+        off = self._off.get(child_id)
+        return off is not None and 0 <= offset < len(self.dates) and bool(off[offset])
+
+    def without_days(
+        self,
+        dates: Set[str],
+        dates_by_child: Optional[Mapping[str, Set[str]]] = None,
+    ) -> "Availability":
+        """A copy without the entries on dates (all children) or dates_by_child."""
+        dates_by_child = dates_by_child or {}
+        offsets = {date_str: i for i, date_str in enumerate(self.dates)}
+        family_mask = bytearray(len(self.dates))
+        for date_str in dates:
+            if date_str in offsets:
+                family_mask[offsets[date_str]] = 1
+        dropped = {}
+        for child_id, _ in self.children:
+            mask = bytearray(family_mask)
+            previous = self._dropped.get(child_id)
+            if previous is not None:
+                mask = bytearray(a | b for a, b in zip(mask, previous))
+            for date_str in dates_by_child.get(child_id, ()):
+                if date_str in offsets:
+                    mask[offsets[date_str]] = 1
+            if any(mask):
+                dropped[child_id] = mask
+        return self._replace(dropped=dropped)
+
+    def off_days(self) -> Dict[str, List[str]]:
+        """{child_id: dates} of the entries without teaching windows."""
+        off_days: Dict[str, List[str]] = {}
+        for child_id, _, date_str, _, windows in self._entries():
+            if not windows:
+                off_days.setdefault(child_id, []).append(date_str)
+        return off_days
+
+    def with_windows_only(self) -> "Availability":
+        """A copy without the entries that have no teaching windows."""
+        offsets = {date_str: i for i, date_str in enumerate(self.dates)}
+        dropped = {child_id: bytearray(mask) for child_id, mask in self._dropped.items()}
+        for child_id, dates in self.off_days().items():
+            mask = dropped.setdefault(child_id, bytearray(len(self.dates)))
+            for date_str in dates:
+                mask[offsets[date_str]] = 1
+        return self._replace(dropped=dropped)
+
+    def without_names(self) -> "Availability":
+        """A copy whose entries leave out child_name."""
+        return self._replace(named=False)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+
+def build_availability(
+    children: Mapping[str, Mapping[str, Any]],
+    cache_rows: Iterable[Mapping[str, Any]],
+    blackouts: Iterable[Mapping[str, Any]],
+    start_date: dt.date,
+    end_date: dt.date,
+) -> Availability:
+    """Availability for children ({id: row}) from calendar_days_cache rows and blackout_periods."""
+    days = max((end_date - start_date).days + 1, 0)
+    dates = [str(start_date + dt.timedelta(days=i)) for i in range(days)]
+    offsets = {date_str: i for i, date_str in enumerate(dates)}
+
+    cache: Dict[str, List[Optional[Mapping[str, Any]]]] = {child_id: [None] * days for child_id in children}
+    for row in cache_rows:
+        by_day = cache.get(row["child_id"])
+        offset = offsets.get(row["date"])
+        if by_day is not None and offset is not None:
+            by_day[offset] = row
+
+    family_mask, child_masks = blackout_masks(blackouts, start_date, days)
+    off = {}
+    for child_id in children:
+        mask = child_masks.get(child_id)
+        if mask is None:
+            off[child_id] = family_mask
+        else:
+            off[child_id] = bytes(a | b for a, b in zip(family_mask, mask))
+
+    named = [(child_id, child.get("first_name") or "Child") for child_id, child in children.items()]
+    return Availability(start_date, dates, named, off, cache)
@@ -0,0 +1,296 @@
+"""
+In-process benchmark of the heavy endpoints against the fake_supabase stand-in.
+
+For every dataset (children x weeks of events) the app is driven through
+httpx's ASGI transport, without a server or network:
+
+    /api/ai/pack_week                 (OpenAI client stubbed, prompt still built)
+    /api/analytics/overview           (cache invalidated before each request)
+    /api/records/generate_transcript
+    /api/integrations/ics/family/{id}.ics
+    /api/year/heatmap
+
+Each endpoint reports latency percentiles, Supabase calls and response
+bytes. A separate tracemalloc pass measures peak and retained allocations
+and gen-0 GC collections per request. Results go to a JSON baseline
+(benchmarks/baseline.json by default), so a regression shows up as a diff.
+--compare prints the endpoints whose p50 moved by more than --tolerance.
+
+    python benchmarks/bench_endpoints.py --children 1,4,10 --weeks 1,12,52
+    python benchmarks/bench_endpoints.py --compare benchmarks/baseline.json --out /tmp/bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime as dt
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+# The app reads these at import time; the stand-in never uses the URL or keys
+BENCH_JWT_SECRET = "benchmark-secret-benchmark-secret-0001"
+os.environ.setdefault("SUPABASE_URL", "http://fake-supabase.local")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJbenchmark")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["SUPABASE_JWT_SECRET"] = BENCH_JWT_SECRET
+os.environ.setdefault("RATE_LIMIT_CAPACITY", "1000000000")
+os.environ.setdefault("SLOW_REQUEST_MS", "1000000")
+
+import httpx
+from openai.types.chat import ChatCompletion
+
+from cache import invalidate
+from fake_supabase import FakeSupabase, SeededFamily, install, make_access_token, seed_families
+from identity import invalidate_identity
+
+DEFAULT_OUT = BACKEND_DIR / "benchmarks" / "baseline.json"
+ENDPOINTS = ("pack_week", "analytics_overview", "generate_transcript", "ics_family", "year_heatmap")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class StubCompletions:
+    """Stands in for AsyncOpenAI().chat.completions; returns a fixed week plan."""
+
+    def __init__(self, family: SeededFamily, week_start: dt.date, delay_ms: float):
+        self.family = family
+        self.week_start = week_start
+        self.delay_ms = delay_ms
+
+    async def create(self, **kwargs) -> Any:
+        if self.delay_ms:
+            await asyncio.sleep(self.delay_ms / 1000.0)
+        events = []
+        for c, child_id in enumerate(self.family.child_ids):
+            for day in range(5):
+                begins = dt.datetime.combine(self.week_start + dt.timedelta(days=day), dt.time(13, 0))
+                subject_id = self.family.subject_ids[(c + day) % len(self.family.subject_ids)]
+                events.append({
+                    "child_id": child_id,
+                    "subject_id": subject_id,
+                    "title": "Packed session",
+                    "start": begins.isoformat() + "Z",
+                    "end": (begins + dt.timedelta(minutes=45)).isoformat() + "Z",
+                    "minutes": 45,
+                })
+        content = json.dumps({"events": events, "rationale": ["Benchmark plan"]})
+        return ChatCompletion.model_validate({
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": kwargs.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+
+def stub_openai(family: SeededFamily, week_start: dt.date, delay_ms: float):
+    import llm
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions(family, week_start, delay_ms)))
+
+
+def _requests(family: SeededFamily, today: dt.date, week_start: dt.date) -> Dict[str, Tuple[str, str, Optional[dict]]]:
+    return {
+        "pack_week": ("POST", "/api/ai/pack_week", {"weekStart": str(week_start)}),
+        "analytics_overview": ("GET", "/api/analytics/overview", None),
+        "generate_transcript": (
+            "GET",
+            f"/api/records/generate_transcript?child_id={family.child_ids[0]}"
+            f"&range_start={today - dt.timedelta(days=365)}&range_end={today}",
+            None,
+        ),
+        "ics_family": ("GET", f"/api/integrations/ics/family/{family.family_id}.ics", None),
+        "year_heatmap": (
+            "GET",
+            f"/api/year/heatmap?familyId={family.family_id}"
+            f"&start={today - dt.timedelta(days=182)}&end={today + dt.timedelta(days=182)}",
+            None,
+        ),
+    }
+
+
+async def _bench_endpoint(
+    app: Any,
+    name: str,
+    request: Tuple[str, str, Optional[dict]],
+    family: SeededFamily,
+    iterations: int,
+    warmup: int,
+    alloc_iterations: int,
+) -> Dict[str, Any]:
+    method, url, body = request
+    headers = {"Authorization": f"Bearer {make_access_token(family.user_id, BENCH_JWT_SECRET, family.email)}"}
+    transport = httpx.ASGITransport(app=app)
+    timings: List[float] = []
+    statuses: Dict[int, int] = {}
+    db_calls = response_bytes = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def _one() -> httpx.Response:
+            # Cold request: nothing served from the response caches
+            invalidate(family_id=family.family_id, child_ids=family.child_ids)
+            return await client.request(method, url, json=body, headers=headers)
+
+        for _ in range(warmup):
+            await _one()
+        for _ in range(iterations):
+            started = time.perf_counter()
+            resp = await _one()
+            timings.append((time.perf_counter() - started) * 1000.0)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+            db_calls = int(resp.headers.get("x-db-calls", 0))
+            response_bytes = len(resp.content)
+
+        peaks, retained, gen0 = [], [], []
+        tracemalloc.start()
+        try:
+            for _ in range(alloc_iterations):
+                gc.collect()
+                collections = gc.get_stats()[0]["collections"]
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                await _one()
+                current, peak = tracemalloc.get_traced_memory()
+                peaks.append((peak - before) / 1024.0)
+                retained.append((current - before) / 1024.0)
+                gen0.append(gc.get_stats()[0]["collections"] - collections)
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p90_ms": round(percentile(timings, 90), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "mean_ms": round(sum(timings) / len(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "db_calls": db_calls,
+        "response_bytes": response_bytes,
+        "alloc_peak_kib": round(percentile(peaks, 50), 1) if peaks else None,
+        "alloc_retained_kib": round(percentile(retained, 50), 1) if retained else None,
+        "gc_gen0_collections": round(percentile(gen0, 50), 1) if gen0 else None,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    import main
+
+    today = dt.date.today()
+    week_start = today - dt.timedelta(days=today.weekday())
+    endpoints = [e for e in args.endpoints.split(",") if e]
+    results: Dict[str, Any] = {}
+    for children in args.children:
+        for weeks in args.weeks:
+            scenario = f"children={children},weeks={weeks}"
+            results[scenario] = {}
+            for name in endpoints:
+                # Fresh data per endpoint so writes (pack_week) never leak between runs
+                fake = FakeSupabase(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+                family = seed_families(fake, families=1, children=children, weeks=weeks, seed=args.seed)[0]
+                install(fake)
+                invalidate_identity(user_id=family.user_id)
+                stub_openai(family, week_start, args.llm_ms)
+                request = _requests(family, today, week_start)[name]
+                results[scenario][name] = await _bench_endpoint(
+                    main.app, name, request, family, args.iterations, args.warmup, args.alloc_iterations
+                )
+                results[scenario][name]["events"] = fake.row_counts().get("events", 0)
+                print(f"{scenario:<22} {name:<20} p50={results[scenario][name]['p50_ms']:>8.2f}ms "
+                      f"p99={results[scenario][name]['p99_ms']:>8.2f}ms db={results[scenario][name]['db_calls']:>3} "
+                      f"peak={results[scenario][name]['alloc_peak_kib']}KiB", file=sys.__stdout__)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "alloc_iterations": args.alloc_iterations,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "llm_ms": args.llm_ms,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """Endpoints whose p50 moved by more than `tolerance` (a fraction) against the baseline."""
+    changes = []
+    for scenario, endpoints in current["results"].items():
+        for name, result in endpoints.items():
+            before = baseline.get("results", {}).get(scenario, {}).get(name)
+            if not before or not before.get("p50_ms"):
+                continue
+            delta = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"]
+            if abs(delta) > tolerance:
+                label = "slower" if delta > 0 else "faster"
+                changes.append(f"{scenario} {name}: p50 {before['p50_ms']} -> {result['p50_ms']} ms ({delta:+.0%}, {label})")
+    return changes
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark heavy endpoints against the in-memory Supabase stand-in")
+    parser.add_argument("--children", type=_int_list, default=[1, 4, 10], help="Comma-separated child counts")
+    parser.add_argument("--weeks", type=_int_list, default=[1, 12, 52], help="Comma-separated weeks of events")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Subset of {','.join(ENDPOINTS)}")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--alloc-iterations", type=int, default=3, help="Requests measured under tracemalloc")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected latency per Supabase call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="Simulated OpenAI response time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=str(DEFAULT_OUT), help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative p50 change to report with --compare")
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's own logging on stdout")
+    args = parser.parse_args()
+
+    # Read before running: --out defaults to the same file and would overwrite it
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        report = asyncio.run(run(args))
+
+    out = Path(args.out)
+    out.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"Wrote {out}")
+
+    if baseline is not None:
+        changes = compare(baseline, report, args.tolerance)
+        print("\n".join(changes) if changes else f"No p50 change beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Response serialization cost on a large event payload.
+
+Seeds fake_supabase, takes --events event rows and serves the same list
+through a throwaway FastAPI app in each of the ways a route can send it:
+
+  stdlib          no response_model, Starlette JSONResponse (jsonable_encoder + json.dumps)
+  stdlib+model    response_model validation, then json.dumps (FastAPI before the dump_json fast path)
+  model           response_model with the default response class (pydantic dump_json, FastAPI 0.12x+)
+  orjson          no response_model, FastJSONResponse (jsonable_encoder + orjson)
+  trusted         trusted_json(): orjson only, no validation or jsonable_encoder
+
+Requests go through httpx's ASGI transport, so the numbers are the in-process
+cost of a request without any network or database time.
+
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --events 5000 --iterations 50
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from fake_supabase import FakeSupabase, seed_families
+from fast_json import FastJSONResponse, orjson, trusted_json
+
+
+class EventOut(BaseModel):
+    id: str
+    family_id: str
+    child_id: str
+    subject_id: Optional[str]
+    title: str
+    description: Optional[str]
+    status: str
+    start_ts: str
+    end_ts: str
+    source: Optional[str]
+    year_plan_id: Optional[str]
+    created_at: str
+
+
+class EventsOut(BaseModel):
+    events: List[EventOut]
+    total: int
+
+
+def load_events(count: int, seed: int) -> List[dict]:
+    """The first count seeded event rows (3 events a school day, 15 per child-week)."""
+    children = max(1, -(-count // (52 * 15)))
+    client = FakeSupabase(latency_ms=0, seed=seed)
+    seed_families(client, families=1, children=children, weeks=52, seed=seed)
+    events = client.rows("events")
+    if len(events) < count:
+        raise SystemExit(f"only seeded {len(events)} events")
+    return events[:count]
+
+
+def build_app(payload: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/stdlib", response_class=JSONResponse)
+    async def stdlib():
+        return payload
+
+    @app.get("/stdlib+model", response_model=EventsOut, response_class=JSONResponse)
+    async def stdlib_model():
+        return payload
+
+    @app.get("/model", response_model=EventsOut)
+    async def model():
+        return payload
+
+    @app.get("/orjson", response_class=FastJSONResponse)
+    async def orjson_route():
+        return payload
+
+    @app.get("/trusted", response_model=EventsOut)
+    async def trusted():
+        return trusted_json(payload)
+
+    return app
+
+
+async def run(args: argparse.Namespace):
+    events = load_events(args.events, args.seed)
+    payload = {"events": events, "total": len(events)}
+    app = build_app(payload)
+    print(f"{len(events)} events, orjson {'installed' if orjson else 'missing (stdlib fallback)'}")
+
+    baseline = None
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/stdlib", "/stdlib+model", "/model", "/orjson", "/trusted"):
+            for _ in range(args.warmup):
+                await client.get(path)
+            timings = []
+            size = 0
+            for _ in range(args.iterations):
+                started = time.perf_counter()
+                resp = await client.get(path)
+                timings.append((time.perf_counter() - started) * 1000.0)
+                resp.raise_for_status()
+                size = len(resp.content)
+            p50 = statistics.median(timings)
+            baseline = baseline or p50
+            p95 = sorted(timings)[int(round((len(timings) - 1) * 0.95))]
+            print(
+                f"{path.lstrip('/'):<14} p50={p50:>8.2f}ms p95={p95:>8.2f}ms "
+                f"bytes={size:>9} vs stdlib={baseline / p50:>5.1f}x"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON response serialization")
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
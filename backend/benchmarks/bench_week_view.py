@@ -0,0 +1,145 @@
+"""
+Availability building over long planning horizons.
+
+Seeds fake_supabase with one family (--children children, --weeks weeks of
+calendar cache, --blackouts blackout ranges) and builds the week view
+availability for the whole window two ways:
+
+  linear   the previous builder: every (child, day) pair scanned every blackout
+  masks    availability.build_availability(): per-child blackout day masks
+
+Each is timed building the structure ("build") and building plus encoding
+every entry to JSON ("encode"). The entries are compared first, so a
+mismatch fails the run.
+
+    python benchmarks/bench_week_view.py
+    python benchmarks/bench_week_view.py --weeks 52 --children 6 --blackouts 100
+"""
+import argparse
+import datetime as dt
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from availability import build_availability
+from fake_supabase import FakeSupabase, seed_families
+from fast_json import dumps
+
+
+def linear_availability(children, cache_rows, blackouts, start_date, end_date) -> List[Dict[str, Any]]:
+    """The availability loop _build_week_view_fallback used before day masks."""
+    cache_map = {(row["child_id"], row["date"]): row for row in cache_rows}
+    blackout_ranges = []
+    for bo in blackouts:
+        try:
+            starts = dt.date.fromisoformat(bo["starts_on"])
+            ends = dt.date.fromisoformat(bo["ends_on"])
+        except Exception:
+            continue
+        blackout_ranges.append({"child_id": bo.get("child_id"), "starts_on": starts, "ends_on": ends})
+
+    def is_day_blacked(child_id, date_obj):
+        for bo in blackout_ranges:
+            if bo["starts_on"] <= date_obj <= bo["ends_on"]:
+                if bo["child_id"] is None or bo["child_id"] == child_id:
+                    return True
+        return False
+
+    entries = []
+    for child_id, child in children.items():
+        day = start_date
+        while day <= end_date:
+            date_str = str(day)
+            cache_row = cache_map.get((child_id, date_str), {})
+            day_status = cache_row.get("day_status")
+            if is_day_blacked(child_id, day):
+                day_status = "off"
+            first_block = cache_row.get("first_block_start")
+            last_block = cache_row.get("last_block_end")
+            if day_status == "off":
+                windows = []
+            elif first_block and last_block:
+                windows = [{"start": first_block, "end": last_block, "status": day_status or "teach"}]
+            else:
+                windows = []
+            entries.append({
+                "child_id": child_id,
+                "child_name": child.get("first_name") or "Child",
+                "date": date_str,
+                "day_status": day_status or ("teach" if windows else None),
+                "windows": windows,
+            })
+            day += dt.timedelta(days=1)
+    return entries
+
+
+def timed(fn: Callable[[], Any], iterations: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark week view availability building")
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--children", type=int, default=6)
+    parser.add_argument("--blackouts", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    client = FakeSupabase(latency_ms=0, seed=args.seed)
+    family = seed_families(
+        client, children=args.children, weeks=args.weeks, events_per_day=0,
+        blackouts=args.blackouts, seed=args.seed,
+    )[0]
+    children = {c["id"]: c for c in client.rows("children", family_id=family.family_id)}
+    cache_rows = client.rows("calendar_days_cache", family_id=family.family_id)
+    blackouts = client.rows("blackout_periods", family_id=family.family_id)
+    dates = sorted(row["date"] for row in cache_rows)
+    start_date, end_date = dt.date.fromisoformat(dates[0]), dt.date.fromisoformat(dates[-1])
+
+    def linear():
+        return linear_availability(children, cache_rows, blackouts, start_date, end_date)
+
+    def masks():
+        return build_availability(children, cache_rows, blackouts, start_date, end_date)
+
+    expected = linear()
+    if masks().to_list() != expected:
+        raise SystemExit("availability entries differ from the linear builder")
+    print(
+        f"{len(children)} children x {(end_date - start_date).days + 1} days, "
+        f"{len(blackouts)} blackouts, {len(expected)} entries, {len(dumps(expected))} bytes"
+    )
+
+    cases = [
+        ("linear build", linear),
+        ("linear encode", lambda: dumps(linear())),
+        ("masks build", masks),
+        ("masks encode", lambda: dumps(masks().to_list())),
+    ]
+    baselines = {}
+    for name, fn in cases:
+        timings = timed(fn, args.iterations, args.warmup)
+        p50 = statistics.median(timings)
+        kind = name.split()[1]
+        baselines.setdefault(kind, p50)
+        p95 = sorted(timings)[int(round((len(timings) - 1) * 0.95))]
+        print(f"{name:<14} p50={p50:>8.2f}ms p95={p95:>8.2f}ms vs linear={baselines[kind] / p50:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
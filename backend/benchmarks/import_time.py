@@ -0,0 +1,112 @@
+"""
+Cold-start import budget for the API.
+
+Imports main in fresh interpreters under `python -X importtime` and sums the
+self time per package (third-party packages by top-level name, app modules
+by module name). Prints the median over --runs and exits non-zero when the
+total goes over --budget-ms, so CI can catch a heavy import creeping back
+into startup.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 5 --budget-ms 1500 --top 15
+    python benchmarks/import_time.py --preload   # also time PRELOAD_DEPENDENCIES work
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_PRELOAD_SNIPPET = "import json, main, startup; print(json.dumps(startup.preload()))"
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Only imports run; nothing talks to Supabase or OpenAI
+    env.setdefault("SUPABASE_URL", "http://import-time.local")
+    env.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJimporttime")
+    env.setdefault("OPENAI_API_KEY", "sk-import-time")
+    return env
+
+
+def _group(module: str) -> str:
+    top = module.split(".")[0]
+    if (BACKEND_DIR / f"{top}.py").exists():
+        return module
+    if top == "routers" or (BACKEND_DIR / top).is_dir():
+        return module
+    return top
+
+
+def measure_once(preload: bool = False) -> Dict[str, float]:
+    """Self time in ms per package for one fresh `import main`."""
+    code = _PRELOAD_SNIPPET if preload else "import main"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR,
+        env=_env(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import failed:\n{proc.stderr[-2000:]}")
+
+    totals: Dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if not parts[0].strip().isdigit():
+            continue  # header row
+        totals[_group(parts[2].strip())] += int(parts[0]) / 1000.0
+    if preload:
+        for name, ms in json.loads(proc.stdout.strip().splitlines()[-1]).items():
+            totals[f"preload:{name}"] = ms
+    return dict(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold-start import time")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when the median total exceeds this")
+    parser.add_argument("--preload", action="store_true", help="Also run startup.preload() and time it")
+    args = parser.parse_args()
+
+    runs: List[Dict[str, float]] = [measure_once(args.preload) for _ in range(args.runs)]
+    names = {name for run in runs for name in run}
+    median = {name: statistics.median(run.get(name, 0.0) for run in runs) for name in names}
+    imports_total = statistics.median(
+        sum(ms for name, ms in run.items() if not name.startswith("preload:")) for run in runs
+    )
+
+    print(f"import main: {imports_total:.1f}ms (median of {args.runs})")
+    ranked = sorted(
+        ((name, ms) for name, ms in median.items() if not name.startswith("preload:")),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    for name, ms in ranked[:args.top]:
+        print(f"  {name:<36} {ms:>8.1f}ms")
+    lazy = [name for name in ("openai", "supabase", "pypdf", "requests", "psycopg") if name in median]
+    if lazy and not args.preload:
+        print(f"  loaded at startup but meant to be lazy: {', '.join(lazy)}")
+    if args.preload:
+        print("preload:")
+        for name, ms in sorted(median.items()):
+            if name.startswith("preload:"):
+                print(f"  {name[len('preload:'):]:<36} {ms:>8.1f}ms")
+
+    if args.budget_ms is not None and imports_total > args.budget_ms:
+        print(f"over budget: {imports_total:.1f}ms > {args.budget_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
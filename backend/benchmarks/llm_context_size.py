@@ -0,0 +1,133 @@
+"""
+Prompt context size: indented JSON vs llm_context.ContextEncoder.
+
+Seeds fake_supabase with one family, loads the planning context the way
+suggest-plan, pack_week and catch_up do, and prints the characters and
+tokens of each call's context in the old json.dumps(indent=2) form and in
+the compact aliased form, and the compact size after
+context_budget.encode_within_budget() with --budget (suggest-plan and
+pack_week only, as in llm.py). Aliases in a response built from the context are decoded
+back and checked against the original ids.
+
+Token counts are exact with tiktoken installed (and its encoding files
+available), otherwise estimated at about 4 characters a token.
+
+    python benchmarks/llm_context_size.py
+    python benchmarks/llm_context_size.py --children 6 --weeks 4 --budget 8000
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime as dt
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("SUPABASE_URL", "http://fake-supabase.local")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJbenchmark")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import llm_context
+from availability import Availability
+from context_budget import PLANNING_CONTEXT_TOKEN_BUDGET, encode_within_budget
+from fake_supabase import FakeSupabase, install, seed_families
+from llm_context import ContextEncoder, count_tokens
+
+
+async def load_contexts(args: argparse.Namespace) -> dict:
+    client = FakeSupabase(latency_ms=0, seed=args.seed)
+    family = seed_families(client, children=args.children, weeks=max(args.weeks * 2, 4), seed=args.seed)[0]
+    install(client)
+    from routers.util import load_planning_context
+
+    today = dt.date.today()
+    week_start = str(today - dt.timedelta(days=today.weekday()))
+    with contextlib.redirect_stdout(io.StringIO()):
+        suggest = await load_planning_context(family.family_id, week_start, family.child_ids, args.weeks)
+        week = await load_planning_context(family.family_id, week_start, family.child_ids, 1)
+
+    pack_week = {
+        "week_start": week_start,
+        "children": family.child_ids,
+        "availability": week["availability"],
+        "existing_events": week["events"],
+        "blackouts": week["blackouts"],
+        "required_minutes": week["required_minutes"],
+        "recent_struggles": week["recent_struggles"],
+        "max_minutes_per_day": week["max_minutes_per_day"],
+        "current_minutes_by_day": week["current_minutes_by_day"],
+    }
+    past = [e for e in client.rows("events", family_id=family.family_id) if e["start_ts"][:10] < week_start]
+    catch_up = {
+        "missed_events": [
+            {"event_id": e["id"], "child_id": e["child_id"], "subject_id": e["subject_id"], "title": e["title"],
+             "original_start": e["start_ts"], "original_end": e["end_ts"], "duration_minutes": 45}
+            for e in past[-args.missed:]
+        ],
+        "future_windows": suggest["availability"],
+        "existing_events": suggest["events"],
+        "blackouts": suggest["blackouts"],
+        "recent_struggles": suggest["recent_struggles"],
+        "max_minutes_per_day": suggest["max_minutes_per_day"],
+        "current_minutes_by_day": suggest["current_minutes_by_day"],
+    }
+    return {"suggest_plan": suggest, "pack_week": pack_week, "catch_up": catch_up}
+
+
+def check_round_trip(encoder: ContextEncoder, context: dict):
+    """A response naming every aliased id decodes its id fields and leaves free text alone."""
+    response = {"events": [{"child_id": alias, "note": f"moved {alias}"} for alias in encoder.uuids]}
+    decoded = encoder.decode(json.loads(json.dumps(response)))
+    for alias, row in zip(encoder.uuids, decoded["events"]):
+        if row["child_id"] != encoder.uuids[alias] or row["note"] != f"moved {alias}":
+            raise SystemExit(f"alias {alias} did not decode")
+    children = {str(c) for c in context.get("children", []) if isinstance(c, str)}
+    for child_id in children:
+        if not encoder.aliases[child_id.lower()].startswith("C"):
+            raise SystemExit(f"child {child_id} aliased as {encoder.aliases[child_id.lower()]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare planning prompt context sizes")
+    parser.add_argument("--children", type=int, default=4)
+    parser.add_argument("--weeks", type=int, default=2)
+    parser.add_argument("--missed", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=PLANNING_CONTEXT_TOKEN_BUDGET)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    contexts = asyncio.run(load_contexts(args))
+    exact = bool(llm_context._get_encoding())
+    print(f"token counts {'exact (tiktoken)' if exact else 'estimated (~4 chars/token)'}")
+    for call, context in contexts.items():
+        indented = json.dumps(context, indent=2, default=lambda v: list(v) if isinstance(v, Availability) else str(v))
+        encoder = ContextEncoder()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            compact = encoder.encode(context, call=call)
+        encode_ms = (time.perf_counter() - started) * 1000.0
+        check_round_trip(encoder, context)
+        before, after = count_tokens(indented), count_tokens(compact)
+        budgeted = "-"
+        if call != "catch_up":
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                budgeted = count_tokens(encode_within_budget(context, ContextEncoder(), args.budget, call=call))
+            encode_ms += (time.perf_counter() - started) * 1000.0
+        print(
+            f"{call:<13} chars {len(indented):>8} -> {len(compact):>7}  "
+            f"tokens {before:>7} -> {after:>6} ({100.0 * after / before:5.1f}%)  "
+            f"budget {args.budget} -> {budgeted:>6}  "
+            f"aliases={len(encoder.uuids):<4} encode={encode_ms:6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
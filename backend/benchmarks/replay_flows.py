@@ -0,0 +1,269 @@
+"""
+Record real request flows once, then replay them offline (see record_replay.py).
+
+record:  runs each flow in a flows file (name, method, path, body) in process
+         against the configured Supabase project and OpenAI key, with both
+         clients wrapped by recorders. Needs a real user access token. With
+         --fake, it runs against the seeded fake_supabase stand-in and a
+         stubbed OpenAI instead, which is handy for trying the harness.
+replay:  serves the cassette in place of both clients and runs every flow
+         --iterations times at each --concurrency, with latencies times
+         --scale. Reports end-to-end latency and throughput.
+loading: replays each flow's recorded Supabase calls through the I/O pool,
+         first one after another, then all at once. This gives the gap
+         between sequential loading and the fully parallel bound.
+
+    python benchmarks/replay_flows.py record --flows benchmarks/flows.example.json --token "$TOKEN" --out /tmp/flows.json
+    python benchmarks/replay_flows.py replay --cassette /tmp/flows.json --scale 1 --concurrency 1,8
+    python benchmarks/replay_flows.py loading --cassette /tmp/flows.json
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime as dt
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+FAKE_JWT_SECRET = "replay-secret-replay-secret-replay-01"
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100.0)))]
+
+
+def _quiet(enabled: bool):
+    if not enabled:
+        return contextlib.nullcontext()
+    stack = contextlib.ExitStack()
+    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+    return stack
+
+
+def _load_flows(path: str, values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flows file with "{week_start}", "{family_id}", "{child_id}" and "{child_ids}" placeholders."""
+    text = Path(path).read_text(encoding="utf-8")
+    for name, value in values.items():
+        text = text.replace(f'"{{{name}}}"', json.dumps(value))
+    return json.loads(text)
+
+
+async def _send(client: Any, flow: Dict[str, Any], headers: Dict[str, str]) -> Any:
+    return await client.request(flow.get("method", "GET"), flow["path"], json=flow.get("body"), headers=headers)
+
+
+async def record(args: argparse.Namespace):
+    today = dt.date.today()
+    week_start = str(today - dt.timedelta(days=today.weekday()))
+    if args.fake:
+        os.environ["SUPABASE_FAKE"] = "1"
+        os.environ["SUPABASE_JWT_SECRET"] = FAKE_JWT_SECRET
+        os.environ.setdefault("OPENAI_API_KEY", "sk-replay")
+        os.environ.setdefault("FAKE_SUPABASE_LATENCY_MS", str(args.fake_latency_ms))
+
+    import httpx
+    import jwt
+
+    import llm
+    import main
+    from identity import invalidate_identity, resolve_identity
+    from record_replay import Cassette, RecordingOpenAI, RecordingSupabase
+    from supabase_client import get_admin_client, set_admin_client
+
+    real = get_admin_client()
+    token = args.token
+    if args.fake:
+        from bench_endpoints import stub_openai
+        from fake_supabase import SeededFamily, make_access_token
+
+        profile = real.rows("profiles")[0]
+        family = SeededFamily(
+            family_id=profile["family_id"],
+            user_id=profile["id"],
+            email=profile["email"],
+            child_ids=[c["id"] for c in real.rows("children", family_id=profile["family_id"])],
+            subject_ids=[s["id"] for s in real.rows("subject", family_id=profile["family_id"])],
+        )
+        token = make_access_token(family.user_id, FAKE_JWT_SECRET, family.email)
+        stub_openai(family, dt.date.fromisoformat(week_start), args.fake_llm_ms)
+    if not token:
+        raise SystemExit("record needs --token (a user access token) or --fake")
+
+    claims = jwt.decode(token, options={"verify_signature": False})
+    identity = await resolve_identity(claims["sub"], claims.get("email"))
+    cassette = Cassette(meta={
+        "recorded_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "user": {"id": claims.get("sub"), "email": claims.get("email")},
+        "flows": _load_flows(args.flows, {
+            "week_start": week_start,
+            "family_id": identity.family_id,
+            "child_id": (identity.accessible_child_ids or [None])[0],
+            "child_ids": identity.accessible_child_ids,
+        }),
+        "fake": bool(args.fake),
+    })
+    # Identity is resolved again inside the flows, so replay sees those calls too
+    invalidate_identity(user_id=claims["sub"])
+    set_admin_client(RecordingSupabase(real, cassette))
+    llm.client = RecordingOpenAI(llm.get_client(), cassette)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://record", timeout=300) as client:
+        for flow in cassette.meta["flows"]:
+            with cassette.flow(flow["name"]):
+                started = time.perf_counter()
+                resp = await _send(client, flow, headers)
+            flow["status"] = resp.status_code
+            flow["recorded_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+            calls = [e for e in cassette.entries if e["flow"] == flow["name"]]
+            print(f"{flow['name']:<24} {resp.status_code} {flow['recorded_ms']:>9.1f}ms calls={len(calls)}",
+                  file=sys.__stdout__)
+    cassette.save(args.out)
+    print(f"Wrote {args.out} ({len(cassette.entries)} calls)", file=sys.__stdout__)
+
+
+def _replay_env():
+    # Nothing below talks to the network; the clients only need to import
+    os.environ.setdefault("SUPABASE_URL", "http://replay.local")
+    os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJreplay")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-replay")
+    os.environ.setdefault("RATE_LIMIT_CAPACITY", "1000000000")
+    os.environ.setdefault("SLOW_REQUEST_MS", "1000000")
+
+
+async def replay(args: argparse.Namespace):
+    _replay_env()
+    import httpx
+    from fastapi import Request
+
+    import llm
+    import main
+    from auth import get_current_user
+    from cache import invalidate
+    from identity import resolve_identity
+    from record_replay import Cassette, ReplayOpenAI, ReplaySupabase
+    from supabase_client import set_admin_client
+
+    cassette = Cassette.load(args.cassette)
+    set_admin_client(ReplaySupabase(cassette, scale=args.scale))
+    llm.client = ReplayOpenAI(cassette, scale=args.scale)
+    user = cassette.meta["user"]
+
+    def _recorded_user(request: Request) -> dict:
+        # Recorded tokens expire; the flows run as the recorded user instead
+        request.state.user = dict(user)
+        return request.state.user
+
+    main.app.dependency_overrides[get_current_user] = _recorded_user
+    flows = [f for f in cassette.meta.get("flows", []) if not args.flow or f["name"] in args.flow]
+    with cassette.session():
+        family_id = (await resolve_identity(user["id"], user.get("email"))).family_id
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=300) as client:
+        async def _run_once(flow: Dict[str, Any]) -> float:
+            with cassette.session():
+                if family_id:
+                    invalidate(family_id=family_id)
+                started = time.perf_counter()
+                resp = await _send(client, flow, {})
+                elapsed = (time.perf_counter() - started) * 1000.0
+            if resp.status_code != flow.get("status", resp.status_code):
+                print(f"  {flow['name']}: status {resp.status_code}, recorded {flow.get('status')}: {resp.text[:200]}",
+                      file=sys.__stdout__)
+            return elapsed
+
+        for flow in flows:
+            for concurrency in args.concurrency:
+                timings: List[float] = []
+                wall_started = time.perf_counter()
+                for _ in range(args.iterations):
+                    timings.extend(await asyncio.gather(*(_run_once(flow) for _ in range(concurrency))))
+                wall = time.perf_counter() - wall_started
+                print(
+                    f"{flow['name']:<24} x{concurrency:<3} p50={_percentile(timings, 50):>9.1f}ms "
+                    f"p95={_percentile(timings, 95):>9.1f}ms recorded={flow.get('recorded_ms', 0):>9.1f}ms "
+                    f"rps={len(timings) / wall:>7.1f}",
+                    file=sys.__stdout__,
+                )
+
+
+async def loading(args: argparse.Namespace):
+    _replay_env()
+    from record_replay import Cassette
+    from supabase_async import run_blocking
+
+    cassette = Cassette.load(args.cassette)
+
+    async def _call(entry: Dict[str, Any]):
+        await run_blocking(time.sleep, entry["ms"] * args.scale / 1000.0)
+
+    for name, entries in cassette.flows().items():
+        if args.flow and name not in args.flow:
+            continue
+        calls = [e for e in entries if e["kind"] in ("table", "rpc", "storage")]
+        if not calls:
+            continue
+        started = time.perf_counter()
+        for entry in calls:
+            await _call(entry)
+        sequential = (time.perf_counter() - started) * 1000.0
+        started = time.perf_counter()
+        await asyncio.gather(*(_call(entry) for entry in calls))
+        parallel = (time.perf_counter() - started) * 1000.0
+        recorded_span = max(e["offset_ms"] + e["ms"] for e in calls) - min(e["offset_ms"] for e in calls)
+        print(
+            f"{name:<24} calls={len(calls):<4} recorded={recorded_span:>9.1f}ms "
+            f"sequential={sequential:>9.1f}ms parallel={parallel:>9.1f}ms "
+            f"speedup={sequential / parallel if parallel else 0:>5.1f}x"
+        )
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay Supabase/OpenAI request flows")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Record flows against live services (or --fake)")
+    rec.add_argument("--flows", default=str(BACKEND_DIR / "benchmarks" / "flows.example.json"))
+    rec.add_argument("--token", default=os.getenv("RECORD_ACCESS_TOKEN"), help="User access token")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--fake", action="store_true", help="Record against fake_supabase and a stubbed OpenAI")
+    rec.add_argument("--fake-latency-ms", type=float, default=20.0)
+    rec.add_argument("--fake-llm-ms", type=float, default=800.0)
+
+    rep = sub.add_parser("replay", help="Replay flows end to end")
+    rep.add_argument("--cassette", required=True)
+    rep.add_argument("--scale", type=float, default=1.0, help="Latency multiplier (0 = no waiting)")
+    rep.add_argument("--iterations", type=int, default=5)
+    rep.add_argument("--concurrency", type=_int_list, default=[1])
+    rep.add_argument("--flow", action="append", help="Only these flows (repeatable)")
+
+    load = sub.add_parser("loading", help="Sequential vs parallel replay of each flow's Supabase calls")
+    load.add_argument("--cassette", required=True)
+    load.add_argument("--scale", type=float, default=1.0)
+    load.add_argument("--flow", action="append")
+
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's own logging on stdout")
+    args = parser.parse_args()
+
+    with _quiet(not args.verbose and args.command != "loading"):
+        asyncio.run({"record": record, "replay": replay, "loading": loading}[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
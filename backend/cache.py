@@ -1,23 +1,385 @@
+import asyncio
+import inspect
+import os
+import sys
 import time
 import threading
-from typing import Any, Dict, Tuple
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 
-_cache_lock = threading.Lock()
-_cache: Dict[str, Tuple[float, Any]] = {}
+from state_backend import StateBackend, get_state_backend, run_state_io
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_MISSING = object()
+
+# Every TTLCache by name, so invalidate() reaches caches other than the default one
+_caches: Dict[str, "TTLCache"] = {}
+
+
+def family_tag(family_id: str) -> str:
+    return f"family:{family_id}"
+
+
+def child_tag(child_id: str) -> str:
+    return f"child:{child_id}"
+
+
+def course_tag(course_id: str) -> str:
+    return f"course:{course_id}"
+
+
+class _Load:
+    """An in-flight get_or_load; marked stale if one of its tags is invalidated mid-load."""
+
+    __slots__ = ("key", "future", "tags", "stale", "started")
+
+    def __init__(self, key: str, future: "asyncio.Future", tags: Tuple[str, ...]):
+        self.key = key
+        self.future = future
+        self.tags = tags
+        self.stale = False
+        # Lets a shared backend skip the write if another worker invalidated meanwhile
+        self.started = time.time()
+
+
+def _approx_size(value: Any, depth: int = 0) -> int:
+    """Rough in-memory size of a cached value (containers and models are walked)."""
+    size = sys.getsizeof(value)
+    if depth > 8:
+        return size
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(_approx_size(k, depth + 1) + _approx_size(v, depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(_approx_size(v, depth + 1) for v in value)
+    attrs = getattr(value, "__dict__", None)
+    if attrs:
+        return size + _approx_size(attrs, depth + 1)
+    return size
+
+
+class TTLCache:
+    """LRU cache with per-entry TTL, bounded by entry count and approximate bytes.
+
+    Entries may carry tags (family_tag / child_tag / course_tag) so write paths
+    can drop everything derived from the data they changed.
+
+    get_or_load() also supports stale-while-revalidate: past ttl_seconds (soft)
+    but before hard_ttl_seconds an entry is still returned immediately while one
+    background task reloads it.
+
+    Entries live in the state backend (state_backend.py): in this process by
+    default, or in a store shared by all workers with STATE_BACKEND=sqlite.
+    Single-flight loading and the stats below are per process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        backend: Optional[StateBackend] = None,
+        sizer: Callable[[Any], int] = _approx_size,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._backend = backend
+        # Bytes counted against max_bytes for a value (in-process backend)
+        self._sizer = sizer
+        self._lock = threading.Lock()
+        self._loads_by_tag: Dict[str, Set[_Load]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "coalesced": 0,
+            "invalidations": 0,
+            "stale_hits": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+        _caches[name] = self
+
+    @property
+    def backend(self) -> StateBackend:
+        return self._backend or get_state_backend()
+
+    def _lookup(self, key: str) -> Tuple[Any, bool]:
+        """(value or _MISSING, is_stale); entries past their hard expiry are dropped."""
+        hit, expired = self.backend.cache_get(self.name, key)
+        if hit is None:
+            if expired:
+                with self._lock:
+                    self._stats["expirations"] += 1
+            return _MISSING, False
+        fresh_until, _, value = hit
+        return value, fresh_until < time.time()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Fresh value or default (entries inside their stale window count as misses)."""
+        value, stale = self._lookup(key)
+        with self._lock:
+            if value is _MISSING or stale:
+                self._stats["misses"] += 1
+                return default
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float, tags: Iterable[str] = ()):
+        self._set(key, value, ttl_seconds, ttl_seconds, tuple(tags), None)
+
+    def _set(
+        self,
+        key: str,
+        value: Any,
+        ttl_seconds: float,
+        hard_ttl_seconds: float,
+        tags: Tuple[str, ...],
+        load: Optional[_Load],
+    ):
+        if load is not None and load.stale:
+            # Invalidated while loading: the value may predate the write
+            return
+        backend = self.backend
+        # The shared backend measures the serialized value itself
+        size = 0 if backend.shared else self._sizer(value)
+        now = time.time()
+        _, evictions, expirations = backend.cache_set(
+            self.name,
+            key,
+            value,
+            size,
+            now + ttl_seconds,
+            now + max(ttl_seconds, hard_ttl_seconds),
+            tags,
+            self.max_entries,
+            self.max_bytes,
+            since=load.started if load is not None else None,
+        )
+        if evictions or expirations:
+            with self._lock:
+                self._stats["evictions"] += evictions
+                self._stats["expirations"] += expirations
+
+    def delete(self, key: str) -> bool:
+        return self.backend.cache_delete(self.name, key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of the tags; returns how many were removed."""
+        tags = tuple(tags)
+        with self._lock:
+            for tag in tags:
+                for load in self._loads_by_tag.get(tag, ()):
+                    load.stale = True
+                    # New callers must not join a load that predates the write
+                    if self._inflight.get(load.key) is load.future:
+                        del self._inflight[load.key]
+        removed = self.backend.cache_invalidate(self.name, tags)
+        with self._lock:
+            self._stats["invalidations"] += removed
+        return removed
+
+    def clear(self):
+        self.backend.cache_clear(self.name)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Union[Any, Awaitable[Any]]],
+        ttl_seconds: float,
+        tags: Iterable[str] = (),
+        hard_ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        """Return the cached value or load it once; concurrent misses on the same key share one load.
+
+        With hard_ttl_seconds > ttl_seconds, an entry older than ttl_seconds is
+        served as-is and refreshed in the background until hard_ttl_seconds.
+        """
+        tags = tuple(tags)
+        hard_ttl = ttl_seconds if hard_ttl_seconds is None else hard_ttl_seconds
+        loop = asyncio.get_running_loop()
+        value, stale = await run_state_io(self.backend, self._lookup, key)
+        with self._lock:
+            if value is not _MISSING:
+                if not stale:
+                    self._stats["hits"] += 1
+                    return value
+                self._stats["stale_hits"] += 1
+                if key in self._inflight:
+                    # A refresh (or load) is already running
+                    return value
+                future = loop.create_future()
+                self._inflight[key] = future
+                self._stats["refreshes"] += 1
+            else:
+                self._stats["misses"] += 1
+                pending = self._inflight.get(key)
+                if pending is not None and pending.get_loop() is loop:
+                    self._stats["coalesced"] += 1
+                else:
+                    pending = None
+                    future = loop.create_future()
+                    self._inflight[key] = future
+
+        if value is not _MISSING:
+            task = loop.create_task(self._refresh(key, future, loader, ttl_seconds, hard_ttl, tags))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            return value
+
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if pending.cancelled():
+                    # The loading request was cancelled; load again ourselves
+                    return await self.get_or_load(key, loader, ttl_seconds, tags, hard_ttl_seconds)
+                raise
+
+        return await self._load(key, future, loader, ttl_seconds, hard_ttl, tags)
+
+    async def _load(
+        self,
+        key: str,
+        future: "asyncio.Future",
+        loader: Callable[[], Union[Any, Awaitable[Any]]],
+        ttl_seconds: float,
+        hard_ttl_seconds: float,
+        tags: Tuple[str, ...],
+    ) -> Any:
+        load = _Load(key, future, tags)
+        with self._lock:
+            for tag in load.tags:
+                self._loads_by_tag.setdefault(tag, set()).add(load)
+        try:
+            result = loader()
+            if inspect.isawaitable(result):
+                result = await result
+        except BaseException as exc:
+            with self._lock:
+                self._stats["load_errors"] += 1
+                self._finish_load_locked(load)
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            if not future.done():
+                if isinstance(exc, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(exc)
+                    # Waiters (if any) re-raise it; don't warn about an unretrieved exception
+                    future.exception()
+            raise
+        await run_state_io(self.backend, self._set, key, result, ttl_seconds, hard_ttl_seconds, load.tags, load)
+        with self._lock:
+            self._stats["loads"] += 1
+            self._finish_load_locked(load)
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if not future.done():
+            future.set_result(result)
+        return result
+
+    async def _refresh(self, key: str, future: "asyncio.Future", loader, ttl_seconds: float, hard_ttl_seconds: float, tags):
+        """Background reload of a stale entry; on failure the stale value stays until its hard expiry."""
+        try:
+            await self._load(key, future, loader, ttl_seconds, hard_ttl_seconds, tags)
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+            print(f"[CACHE] {self.name}: background refresh failed key={key!r} error={exc!r}")
+
+    def _finish_load_locked(self, load: _Load):
+        for tag in load.tags:
+            loads = self._loads_by_tag.get(tag)
+            if loads is not None:
+                loads.discard(load)
+                if not loads:
+                    del self._loads_by_tag[tag]
+
+    def stats(self) -> Dict[str, Any]:
+        info = self.backend.cache_info(self.name)
+        with self._lock:
+            served = self._stats["hits"] + self._stats["stale_hits"]
+            lookups = served + self._stats["misses"]
+            return {
+                **self._stats,
+                **info,
+                "backend": self.backend.name,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_ratio": round(served / lookups, 4) if lookups else None,
+                "inflight": len(self._inflight),
+            }
+
+
+_default_cache = TTLCache("default")
 
 
 def get_cached(key: str):
-    with _cache_lock:
-        entry = _cache.get(key)
-        if not entry:
-            return None
-        expires_at, value = entry
-        if expires_at < time.time():
-            _cache.pop(key, None)
-            return None
-        return value
-
-
-def set_cached(key: str, value: Any, ttl_seconds: float):
-    with _cache_lock:
-        _cache[key] = (time.time() + ttl_seconds, value)
+    return _default_cache.get(key)
+
+
+def set_cached(key: str, value: Any, ttl_seconds: float, tags: Iterable[str] = ()):
+    _default_cache.set(key, value, ttl_seconds, tags)
+
+
+def delete_cached(key: str) -> bool:
+    return _default_cache.delete(key)
+
+
+async def get_or_load(
+    key: str,
+    loader: Callable[[], Union[Any, Awaitable[Any]]],
+    ttl_seconds: float,
+    tags: Iterable[str] = (),
+    hard_ttl_seconds: Optional[float] = None,
+) -> Any:
+    return await _default_cache.get_or_load(key, loader, ttl_seconds, tags, hard_ttl_seconds)
+
+
+def invalidate(
+    family_id: Optional[str] = None,
+    child_ids: Iterable[Optional[str]] = (),
+    course_id: Optional[str] = None,
+) -> int:
+    """Drop cached entries derived from a family, its children or a course (call after writes)."""
+    tags = []
+    if family_id:
+        tags.append(family_tag(family_id))
+    tags.extend(child_tag(cid) for cid in child_ids if cid)
+    if course_id:
+        tags.append(course_tag(course_id))
+    if not tags:
+        return 0
+    return sum(cache.invalidate_tags(tags) for cache in list(_caches.values()))
+
+
+async def invalidate_async(
+    family_id: Optional[str] = None,
+    child_ids: Iterable[Optional[str]] = (),
+    course_id: Optional[str] = None,
+) -> int:
+    """invalidate() for async handlers; runs on the I/O pool when a cache's backend blocks."""
+    child_ids = list(child_ids)
+    blocking = next((c.backend for c in list(_caches.values()) if c.backend.blocking_io), None)
+    if blocking is None:
+        return invalidate(family_id, child_ids, course_id)
+    return await run_state_io(blocking, invalidate, family_id, child_ids, course_id)
+
+
+def cache_names() -> List[str]:
+    return list(_caches)
+
+
+def cache_stats(name: str = "default") -> Dict[str, Any]:
+    return _caches[name].stats()
@@ -0,0 +1,329 @@
+"""
+Token budgets for LLM prompt contexts.
+
+fit_context() estimates the tokens of each section of a planning context
+(in the compact llm_context encoding the prompt will use) and, while the
+total is over budget, applies reductions in priority order:
+
+  event_details      drop event fields that repeat others (start_local,
+                     end_local, date_local, end_ts next to duration_minutes)
+                     and descriptions
+  past_events        collapse events before today into per-day minutes per
+                     child (past_minutes_by_day)
+  standards_gaps     keep the top STANDARDS_GAPS_KEEP gaps per child
+  struggles          summarize each child/subject's struggles to the
+                     STRUGGLES_KEEP most frequent, with a count of the rest
+  availability       list days without teaching windows per child
+                     (availability_off_days) instead of as rows
+  child_names        drop child_name from availability rows
+  later_events       collapse events more than NEAR_DAYS days after the start
+                     of the planning window (week_start, or window.start)
+                     into per-day minutes per child (later_minutes_by_day)
+
+Sections that matter most for a valid plan (children, the window, blackouts,
+required minutes, year plans, the daily cap) are never touched. A context
+still over budget after every step is sent as is and logged with
+over_budget=True.
+
+encode_within_budget() is what llm.py calls: it encodes the whole context
+once and only runs fit_context() when that count is over budget, reusing the
+encoder (so aliases match decode()) and its count.
+
+fit_text() is the equivalent for free text (syllabi): whitespace is
+collapsed, then the text is cut at a line boundary.
+
+    encoder = ContextEncoder()
+    context_json = encode_within_budget(context, encoder, call="pack_week")
+"""
+import datetime as dt
+import json
+import os
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from availability import Availability
+from llm_context import ContextEncoder, count_tokens
+from logger import log_event
+from metrics import increment_counter, observe
+
+PLANNING_CONTEXT_TOKEN_BUDGET = int(os.getenv("PLANNING_CONTEXT_TOKEN_BUDGET", "16000"))
+OUTLINE_TOKEN_BUDGET = int(os.getenv("OUTLINE_TOKEN_BUDGET", "30000"))
+STANDARDS_GAPS_KEEP = 3
+STRUGGLES_KEEP = 3
+# Events this many days from the window start keep their details when later ones are collapsed
+NEAR_DAYS = 7
+
+_EVENT_KEYS = ("events", "existing_events")
+_AVAILABILITY_KEYS = ("availability", "future_windows")
+_REDUNDANT_EVENT_FIELDS = ("start_local", "end_local", "date_local", "description")
+
+def _event_date(event: Dict[str, Any]) -> Optional[str]:
+    value = event.get("date_local") or event.get("start_ts") or event.get("start")
+    return value[:10] if isinstance(value, str) else None
+
+
+def _event_minutes(event: Dict[str, Any]) -> int:
+    minutes = event.get("duration_minutes") or event.get("minutes")
+    if minutes:
+        return int(minutes)
+    try:
+        start = dt.datetime.fromisoformat(event["start_ts"].replace("Z", "+00:00"))
+        end = dt.datetime.fromisoformat(event["end_ts"].replace("Z", "+00:00"))
+        return int((end - start).total_seconds() // 60)
+    except Exception:
+        return 0
+
+
+def _drop_event_details(context: Dict[str, Any]) -> List[str]:
+    changed = []
+    for key in _EVENT_KEYS:
+        events = context.get(key)
+        if events:
+            context[key] = [
+                {
+                    k: v for k, v in e.items()
+                    if k not in _REDUNDANT_EVENT_FIELDS and not (k == "end_ts" and e.get("duration_minutes"))
+                }
+                for e in events
+            ]
+            changed.append(key)
+    return changed
+
+
+def _collapse_events(context: Dict[str, Any], keep: Callable[[str], bool], target: str) -> List[str]:
+    """Replace events whose date fails keep() with per-day minutes per child under target."""
+    changed = []
+    minutes_by_day: Dict[str, Dict[str, int]] = {
+        date_str: dict(by_child) for date_str, by_child in (context.get(target) or {}).items()
+    }
+    for key in _EVENT_KEYS:
+        events = context.get(key)
+        if not events:
+            continue
+        kept = []
+        for event in events:
+            date_str = _event_date(event)
+            if date_str is None or keep(date_str):
+                kept.append(event)
+                continue
+            by_child = minutes_by_day.setdefault(date_str, {})
+            child_id = event.get("child_id") or "family"
+            by_child[child_id] = by_child.get(child_id, 0) + _event_minutes(event)
+        if len(kept) < len(events):
+            context[key] = kept
+            changed.append(key)
+    if changed:
+        context[target] = minutes_by_day
+        changed.append(target)
+    return changed
+
+
+def _collapse_past_events(context: Dict[str, Any], today: dt.date) -> List[str]:
+    today_str = str(today)
+    return _collapse_events(context, lambda date_str: date_str >= today_str, "past_minutes_by_day")
+
+
+def _collapse_later_events(context: Dict[str, Any], window_start: dt.date) -> List[str]:
+    last_str = str(window_start + dt.timedelta(days=NEAR_DAYS - 1))
+    return _collapse_events(context, lambda date_str: date_str <= last_str, "later_minutes_by_day")
+
+
+def _top_standards_gaps(context: Dict[str, Any]) -> List[str]:
+    gaps = context.get("standards_gaps")
+    if not gaps or all(len(g) <= STANDARDS_GAPS_KEEP for g in gaps.values()):
+        return []
+    context["standards_gaps"] = {child_id: g[:STANDARDS_GAPS_KEEP] for child_id, g in gaps.items()}
+    return ["standards_gaps"]
+
+
+def _summarize_struggles(context: Dict[str, Any]) -> List[str]:
+    struggles = context.get("recent_struggles")
+    if not struggles or all(isinstance(s, str) for s in struggles.values()):
+        return []
+    summary = {}
+    for key, items in struggles.items():
+        if isinstance(items, str):
+            summary[key] = items
+            continue
+        top = [item for item, _ in Counter(items).most_common(STRUGGLES_KEEP)]
+        rest = len(set(items)) - len(top)
+        summary[key] = ", ".join(top) + (f" (+{rest} more)" if rest > 0 else "")
+    context["recent_struggles"] = summary
+    return ["recent_struggles"]
+
+
+def _collapse_off_days(context: Dict[str, Any]) -> List[str]:
+    changed = []
+    for key in _AVAILABILITY_KEYS:
+        rows = context.get(key)
+        if not rows:
+            continue
+        if isinstance(rows, Availability):
+            off_days = rows.off_days()
+            if off_days:
+                context[key] = rows.with_windows_only()
+                context[f"{key}_off_days"] = off_days
+                changed.extend([key, f"{key}_off_days"])
+            continue
+        kept = [row for row in rows if row.get("windows")]
+        if len(kept) == len(rows):
+            continue
+        off_days: Dict[str, List[str]] = {}
+        for row in rows:
+            if not row.get("windows"):
+                off_days.setdefault(row.get("child_id") or "family", []).append(row.get("date"))
+        context[key] = kept
+        context[f"{key}_off_days"] = off_days
+        changed.extend([key, f"{key}_off_days"])
+    return changed
+
+
+def _drop_child_names(context: Dict[str, Any]) -> List[str]:
+    changed = []
+    for key in _AVAILABILITY_KEYS:
+        rows = context.get(key)
+        if isinstance(rows, Availability):
+            if rows.named:
+                context[key] = rows.without_names()
+                changed.append(key)
+        elif rows and any("child_name" in row for row in rows):
+            context[key] = [{k: v for k, v in row.items() if k != "child_name"} for row in rows]
+            changed.append(key)
+    return changed
+
+
+def _window_start(context: Dict[str, Any], today: dt.date) -> dt.date:
+    """First day being planned: week_start (pack_week) or window.start (suggest-plan), else today."""
+    value = context.get("week_start") or (context.get("window") or {}).get("start")
+    try:
+        return dt.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return today
+
+
+def _steps(today: dt.date, window_start: dt.date) -> List[Tuple[str, Callable[[Dict[str, Any]], List[str]]]]:
+    """(name, reduction) in the order they are tried; each returns the keys it changed."""
+    return [
+        ("event_details", _drop_event_details),
+        ("past_events", lambda context: _collapse_past_events(context, today)),
+        ("standards_gaps", _top_standards_gaps),
+        ("struggles", _summarize_struggles),
+        ("availability", _collapse_off_days),
+        ("child_names", _drop_child_names),
+        ("later_events", lambda context: _collapse_later_events(context, window_start)),
+    ]
+
+
+def section_tokens(context: Dict[str, Any], encoder: Optional[ContextEncoder] = None) -> Dict[str, int]:
+    """Estimated prompt tokens of each top-level section in the compact encoding."""
+    encoder = encoder or ContextEncoder()
+    return {key: _tokens(encoder, key, value) for key, value in context.items()}
+
+
+def _tokens(encoder: ContextEncoder, key: str, value: Any) -> int:
+    return count_tokens(json.dumps(
+        {key: encoder.compact(value, key)}, ensure_ascii=False, separators=(",", ":"), default=str
+    ))
+
+
+def fit_context(
+    context: Dict[str, Any],
+    budget: int = PLANNING_CONTEXT_TOKEN_BUDGET,
+    call: str = "llm",
+    today: Optional[dt.date] = None,
+    encoder: Optional[ContextEncoder] = None,
+    tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    A copy of context reduced step by step until its estimated tokens fit the budget.
+
+    tokens is the caller's full count of context with encoder, if it has one;
+    otherwise it is counted here. Either way a context that fits is returned
+    as is without counting its sections.
+    """
+    today = today or dt.date.today()
+    encoder = encoder or ContextEncoder()
+    if tokens is None:
+        _, tokens = encoder.measure(context)
+    if tokens <= budget:
+        return context
+
+    # Per-section counts are only needed to track what each step saves;
+    # only the sections a step changed are recounted.
+    sizes = section_tokens(context, encoder)
+    before = after = tokens
+    context = dict(context)
+    applied = []
+    for name, step in _steps(today, _window_start(context, today)):
+        changed = step(context)
+        if not changed:
+            continue
+        applied.append(name)
+        increment_counter("llm_context_pruned", labels={"call": call, "step": name})
+        for key in changed:
+            size = _tokens(encoder, key, context[key])
+            after += size - sizes.get(key, 0)
+            sizes[key] = size
+        if after <= budget:
+            break
+
+    observe("llm_context_budget_ratio_pct", 100.0 * after / budget, buckets=(25, 50, 75, 90, 100, 125, 150, 200))
+    log_event(
+        "llm.context_pruned",
+        call=call,
+        budget=budget,
+        tokens_before=before,
+        tokens_after=after,
+        steps=applied,
+        over_budget=after > budget,
+        largest=max(sizes, key=sizes.get),
+    )
+    return context
+
+
+def encode_within_budget(
+    context: Dict[str, Any],
+    encoder: ContextEncoder,
+    budget: int = PLANNING_CONTEXT_TOKEN_BUDGET,
+    call: str = "llm",
+    today: Optional[dt.date] = None,
+) -> str:
+    """encoder.encode() of context, pruned by fit_context() first only if the full count is over budget."""
+    measured = encoder.measure(context)
+    if measured[1] > budget:
+        context = fit_context(context, budget, call, today, encoder=encoder, tokens=measured[1])
+        measured = encoder.measure(context)
+    return encoder.encode(context, call=call, measured=measured)
+
+
+def fit_text(text: str, budget: int = OUTLINE_TOKEN_BUDGET, call: str = "llm") -> str:
+    """text with runs of whitespace collapsed, cut at a line boundary to fit the budget."""
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+    before = count_tokens(text)
+    if before <= budget:
+        return text
+
+    # Binary search on length; count_tokens is monotonic enough for a cut point
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text.rfind("\n", 0, low)
+    truncated = text[: cut if cut > low // 2 else low]
+    increment_counter("llm_context_pruned", labels={"call": call, "step": "truncate"})
+    log_event(
+        "llm.context_pruned",
+        call=call,
+        budget=budget,
+        tokens_before=before,
+        tokens_after=count_tokens(truncated),
+        steps=["truncate"],
+        chars_dropped=len(text) - len(truncated),
+    )
+    return truncated
@@ -1,6 +1,5 @@
 import os
 from contextlib import contextmanager
-import psycopg
 
 DATABASE_URL = os.environ.get("SUPABASE_DB_URL")
 
@@ -10,5 +9,7 @@ if not DATABASE_URL:
 
 @contextmanager
 def get_conn():
+    import psycopg  # only the direct-SQL paths need the driver
+
     with psycopg.connect(DATABASE_URL) as conn:
         yield conn
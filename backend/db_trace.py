@@ -0,0 +1,107 @@
+"""
+Per-request tracing of Supabase round trips.
+
+TimingMiddleware opens a trace for each HTTP request in a context variable;
+supabase_async records every awaited execute() / storage / auth call into it
+(kind, table or RPC name, HTTP method, duration, rows). The totals go out as
+response headers and into the slow-request log, and repeated names point at
+N+1 loops:
+
+    X-DB-Calls: 41
+    X-DB-Time-Ms: 812.4
+    Server-Timing: db;dur=812.4;desc="41 calls"
+"""
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional
+
+# Individual calls kept per request; totals keep counting past this
+MAX_TRACED_CALLS = 500
+
+
+class DbTrace:
+    __slots__ = ("calls", "count", "total_ms", "rows", "dropped", "started")
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self.count = 0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.dropped = 0
+        self.started = time.perf_counter()
+
+    def record(self, kind: str, name: str, method: Optional[str], duration_ms: float, rows: Optional[int]):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.rows += rows or 0
+        if len(self.calls) >= MAX_TRACED_CALLS:
+            self.dropped += 1
+            return
+        self.calls.append({
+            "kind": kind,
+            "name": name,
+            "method": method,
+            "ms": round(duration_ms, 2),
+            "rows": rows,
+            # Offset from the start of the request, for waterfall views
+            "at_ms": round((time.perf_counter() - self.started) * 1000.0 - duration_ms, 2),
+        })
+
+    def by_name(self) -> List[Dict[str, Any]]:
+        """Calls grouped by kind/name, most frequent first."""
+        groups: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            key = f"{call['kind']}:{call['name']}"
+            group = groups.setdefault(key, {"name": key, "calls": 0, "ms": 0.0, "rows": 0})
+            group["calls"] += 1
+            group["ms"] = round(group["ms"] + call["ms"], 2)
+            group["rows"] += call["rows"] or 0
+        return sorted(groups.values(), key=lambda g: (-g["calls"], -g["ms"]))
+
+    def summary(self, top: int = 5) -> Dict[str, Any]:
+        return {
+            "db_calls": self.count,
+            "db_ms": round(self.total_ms, 1),
+            "db_rows": self.rows,
+            "db_top": self.by_name()[:top],
+        }
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-DB-Calls": str(self.count),
+            "X-DB-Time-Ms": f"{self.total_ms:.1f}",
+        }
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} calls"'
+
+
+_current: ContextVar[Optional[DbTrace]] = ContextVar("db_trace", default=None)
+
+
+def start_trace() -> Token:
+    return _current.set(DbTrace())
+
+
+def end_trace(token: Token):
+    _current.reset(token)
+
+
+def current_trace() -> Optional[DbTrace]:
+    return _current.get()
+
+
+def record_call(kind: str, name: str, method: Optional[str], duration_ms: float, rows: Optional[int] = None):
+    """Add one round trip to the current request's trace (no-op outside a request)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.record(kind, name, method, duration_ms, rows)
+
+
+def count_rows(result: Any) -> Optional[int]:
+    data = getattr(result, "data", None)
+    if isinstance(data, list):
+        return len(data)
+    if data is None:
+        return 0
+    return 1
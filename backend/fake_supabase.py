@@ -0,0 +1,1070 @@
+"""
+In-memory stand-in for the Supabase admin client.
+
+Implements the part of supabase-py the backend uses, so routes can run
+without a live project (benchmarks, load tests, local profiling):
+
+- table()/from_() with select (column lists, aliases, count="exact", simple
+  embedded resources), eq/neq/gt/gte/lt/lte/in_/is_/like/ilike/contains/
+  filter/match and not_, order/limit/range, single/maybe_single, and
+  insert/update/upsert/delete
+- rpc() for the database functions the planner, heatmap and dashboard call
+  (register_rpc() adds more; unknown functions fail like a missing function)
+- storage.from_(bucket).download()/upload()/remove()
+- auth.get_user(token)
+
+Results are postgrest APIResponse objects, and errors are postgrest APIError
+or storage3 StorageApiError, so error handling behaves as it does against
+the real client. Filter values are compared the way PostgREST receives them:
+ISO date/timestamp strings compare as strings, and numbers and booleans are
+coerced to the stored type.
+
+Latency injection: every execute() sleeps for latency_ms (a number, a
+per-name dict override, or a callable(kind, name, rows) -> ms), plus
+per_row_ms per returned row and +/- jitter_ms. Calls run on the supabase-io
+pool exactly like real ones, so waits show up in db_trace and the executor
+metrics.
+
+    client = FakeSupabase(latency_ms=15, jitter_ms=5)
+    families = seed_families(client, families=2, children=4, weeks=12)
+    install(client)  # get_admin_client() now returns the stand-in
+
+`SUPABASE_FAKE=1` builds a seeded stand-in instead of a real client (sized by
+FAKE_SUPABASE_FAMILIES / _CHILDREN / _WEEKS / _LATENCY_MS / _SEED), so the
+whole app can run under uvicorn for load tests. Mint tokens for the seeded
+users with make_access_token() and SUPABASE_JWT_SECRET.
+"""
+import copy
+import datetime as dt
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from postgrest.base_request_builder import APIResponse, SingleAPIResponse
+from postgrest.exceptions import APIError
+from storage3.exceptions import StorageApiError
+
+LatencySpec = Union[float, Callable[[str, str, int], float]]
+
+# Conflict target for upsert() without on_conflict (the table's primary key)
+PRIMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    "calendar_days_cache": ("family_id", "child_id", "date"),
+    "learning_velocity": ("family_id", "child_id", "subject_id"),
+    "child_prefs": ("child_id",),
+}
+
+# Many-to-one embeds whose target table is not the FK column minus "_id" plus "s"
+EMBED_TARGETS: Dict[str, str] = {
+    "subject_id": "subject",
+    "family_id": "family",
+    "child_id": "children",
+    "unit_id": "external_units",
+    "course_id": "external_courses",
+    "provider_id": "external_providers",
+}
+
+
+def _now_iso() -> str:
+    return dt.datetime.now(dt.timezone.utc).isoformat()
+
+
+def _api_error(message: str, code: str, details: Optional[str] = None, hint: Optional[str] = None) -> APIError:
+    return APIError({"message": message, "code": code, "details": details, "hint": hint})
+
+
+def _coerce(stored: Any, value: Any) -> Any:
+    """Bring a filter value to the stored value's type (PostgREST receives strings)."""
+    if isinstance(stored, bool):
+        return value.lower() == "true" if isinstance(value, str) else bool(value)
+    if isinstance(stored, (int, float)) and isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    if isinstance(stored, str) and not isinstance(value, str) and value is not None:
+        return value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return value
+
+
+def _compare(op: str, stored: Any, value: Any) -> bool:
+    if op == "is":
+        if value is None or (isinstance(value, str) and value.lower() == "null"):
+            return stored is None
+        if isinstance(value, str):
+            value = value.lower() == "true"
+        return stored is value
+    if op == "in":
+        return stored is not None and any(stored == _coerce(stored, v) for v in value)
+    if stored is None:
+        return False
+    if op in ("like", "ilike"):
+        pattern = re.escape(str(value)).replace("%", ".*").replace("_", ".")
+        return re.fullmatch(pattern, str(stored), re.IGNORECASE if op == "ilike" else 0) is not None
+    if op == "cs":
+        wanted = value if isinstance(value, (list, tuple, set)) else [value]
+        if isinstance(stored, dict):
+            return all(stored.get(k) == v for k, v in dict(value).items())
+        return all(v in stored for v in wanted)
+    value = _coerce(stored, value)
+    try:
+        if op == "eq":
+            return stored == value
+        if op == "neq":
+            return stored != value
+        if op == "gt":
+            return stored > value
+        if op == "gte":
+            return stored >= value
+        if op == "lt":
+            return stored < value
+        if op == "lte":
+            return stored <= value
+    except TypeError:
+        return False
+    raise _api_error(f"operator {op} is not supported by the stand-in", "PGRST100")
+
+
+def _split_columns(columns: str) -> List[str]:
+    """Split a select string on top-level commas."""
+    parts, depth, current = [], 0, []
+    for ch in columns:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def _singular(table: str) -> str:
+    if table.endswith("ies"):
+        return table[:-3] + "y"
+    if table.endswith("ren"):  # children
+        return table[:-3]
+    return table[:-1] if table.endswith("s") else table
+
+
+class _Table:
+    """Rows of one table plus lazily built hash indexes on id columns."""
+
+    __slots__ = ("rows", "_indexes")
+
+    def __init__(self):
+        self.rows: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {}
+
+    def changed(self):
+        self._indexes.clear()
+
+    def append(self, row: Dict[str, Any]):
+        self.rows.append(row)
+        for column, index in self._indexes.items():
+            index.setdefault(row.get(column), []).append(row)
+
+    def lookup(self, column: str, value: Any) -> List[Dict[str, Any]]:
+        index = self._indexes.get(column)
+        if index is None:
+            index = {}
+            for row in self.rows:
+                index.setdefault(row.get(column), []).append(row)
+            self._indexes[column] = index
+        return index.get(value, [])
+
+
+class FakeQuery:
+    """Chainable request builder; execute() runs it against the in-memory tables."""
+
+    def __init__(self, client: "FakeSupabase", kind: str, name: str, params: Optional[dict] = None):
+        self._client = client
+        self._kind = kind
+        self._name = name
+        self._params = params or {}
+        self._action = "rpc" if kind == "rpc" else "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._head = False
+        self._payload: Any = None
+        self._on_conflict: Tuple[str, ...] = ()
+        self._ignore_duplicates = False
+        self._filters: List[Tuple[str, str, Any, bool]] = []
+        self._orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+        self._single: Optional[str] = None
+        self._negate = False
+
+    @property
+    def http_method(self) -> str:
+        if self._action == "rpc":
+            return "POST"
+        return {"select": "GET", "insert": "POST", "upsert": "POST", "update": "PATCH", "delete": "DELETE"}[self._action]
+
+    # Verbs
+    def select(self, *columns: str, count: Optional[str] = None, head: Optional[bool] = None) -> "FakeQuery":
+        self._columns = ",".join(columns) or "*"
+        self._count = count
+        self._head = bool(head)
+        return self
+
+    def insert(self, json: Any, *, count: Optional[str] = None, returning: Any = None, upsert: bool = False,
+               default_to_null: bool = True) -> "FakeQuery":
+        self._action = "upsert" if upsert else "insert"
+        self._payload = json
+        self._count = count
+        return self
+
+    def upsert(self, json: Any, *, count: Optional[str] = None, returning: Any = None, ignore_duplicates: bool = False,
+               on_conflict: str = "", default_to_null: bool = True) -> "FakeQuery":
+        self._action = "upsert"
+        self._payload = json
+        self._count = count
+        self._ignore_duplicates = ignore_duplicates
+        self._on_conflict = tuple(c.strip() for c in on_conflict.split(",") if c.strip())
+        return self
+
+    def update(self, json: Dict[str, Any], *, count: Optional[str] = None, returning: Any = None) -> "FakeQuery":
+        self._action = "update"
+        self._payload = json
+        self._count = count
+        return self
+
+    def delete(self, *, count: Optional[str] = None, returning: Any = None) -> "FakeQuery":
+        self._action = "delete"
+        self._count = count
+        return self
+
+    # Filters
+    @property
+    def not_(self) -> "FakeQuery":
+        self._negate = True
+        return self
+
+    def _filter(self, op: str, column: str, value: Any) -> "FakeQuery":
+        self._filters.append((op, column, value, self._negate))
+        self._negate = False
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter("eq", column, value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter("neq", column, value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter("gt", column, value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter("gte", column, value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter("lt", column, value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter("lte", column, value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "FakeQuery":
+        return self._filter("in", column, list(values))
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter("is", column, value)
+
+    def like(self, column: str, pattern: str) -> "FakeQuery":
+        return self._filter("like", column, pattern)
+
+    def ilike(self, column: str, pattern: str) -> "FakeQuery":
+        return self._filter("ilike", column, pattern)
+
+    def contains(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter("cs", column, value)
+
+    def match(self, query: Dict[str, Any]) -> "FakeQuery":
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def filter(self, column: str, operator: str, criteria: Any) -> "FakeQuery":
+        if operator.startswith("not."):
+            self._negate = True
+            operator = operator[4:]
+        if operator == "in" and isinstance(criteria, str):
+            criteria = [c.strip().strip('"') for c in criteria.strip("()").split(",") if c.strip()]
+        return self._filter(operator, column, criteria)
+
+    # Modifiers
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None,
+              foreign_table: Optional[str] = None) -> "FakeQuery":
+        self._orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None) -> "FakeQuery":
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None) -> "FakeQuery":
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self._single = "maybe"
+        return self
+
+    # Execution
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        for op, column, value, negate in self._filters:
+            if _compare(op, row.get(column), value) == negate:
+                return False
+        return True
+
+    def _candidates(self, table: _Table) -> List[Dict[str, Any]]:
+        # Narrow by the most selective id equality; every filter is still checked
+        best: Optional[List[Dict[str, Any]]] = None
+        for op, column, value, negate in self._filters:
+            if op == "eq" and not negate and isinstance(value, str) and (column == "id" or column.endswith("_id")):
+                rows = table.lookup(column, value)
+                if best is None or len(rows) < len(best):
+                    best = rows
+        return table.rows if best is None else best
+
+    def _sorted(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for column, desc, nullsfirst in reversed(self._orders):
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+        return rows
+
+    def _window(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self._offset:
+            rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        return rows
+
+    def _run(self) -> Tuple[Any, Optional[int]]:
+        client = self._client
+        if self._action == "rpc":
+            data = client._call_rpc(self._name, self._params)
+            if not isinstance(data, list):
+                return data, None
+            rows = [r for r in data if not isinstance(r, dict) or self._matches(r)]
+            total = len(rows)
+            rows = self._window(self._sorted(rows) if self._orders else rows)
+            return client._project(self._name, rows, self._columns), total
+
+        table = client._table(self._name)
+        if self._action == "select":
+            rows = [r for r in self._candidates(table) if self._matches(r)]
+            total = len(rows)
+            rows = self._window(self._sorted(rows) if self._orders else rows)
+            return ([] if self._head else client._project(self._name, rows, self._columns)), total
+        if self._action in ("insert", "upsert"):
+            rows = client._write(self._name, self._payload, self._action == "upsert", self._on_conflict,
+                                 self._ignore_duplicates)
+            return [dict(r) for r in rows], len(rows)
+        matched = [r for r in self._candidates(table) if self._matches(r)]
+        if self._action == "update":
+            for row in matched:
+                row.update(copy.deepcopy(self._payload))
+        else:
+            ids = {id(r) for r in matched}
+            table.rows = [r for r in table.rows if id(r) not in ids]
+        table.changed()
+        return [dict(r) for r in matched], len(matched)
+
+    def execute(self) -> Optional[Union[APIResponse, SingleAPIResponse]]:
+        client = self._client
+        with client._lock:
+            data, total = self._run()
+        rows = len(data) if isinstance(data, list) else (0 if data is None else 1)
+        client._after_call(self._kind, self._name, rows)
+        count = total if self._count else None
+        if self._single is None:
+            return APIResponse(data=data, count=count)
+        items = data if isinstance(data, list) else [data]
+        if len(items) == 1:
+            return SingleAPIResponse(data=items[0], count=count)
+        if not items and self._single == "maybe":
+            return None
+        raise _api_error(
+            "JSON object requested, multiple (or no) rows returned",
+            "PGRST116",
+            details=f"The result contains {len(items)} rows",
+        )
+
+
+class _FakeBucket:
+    def __init__(self, client: "FakeSupabase", bucket: str):
+        self._client = client
+        self._bucket = bucket
+
+    def download(self, path: str, options: Optional[dict] = None) -> bytes:
+        with self._client._lock:
+            data = self._client._objects.get(self._bucket, {}).get(path)
+        self._client._after_call("storage", f"{self._bucket}.download", 0)
+        if data is None:
+            raise StorageApiError("Object not found", "not_found", 404)
+        return data
+
+    def upload(self, path: str, file: Union[bytes, str], file_options: Optional[dict] = None) -> Dict[str, Any]:
+        data = file.encode("utf-8") if isinstance(file, str) else bytes(file)
+        with self._client._lock:
+            self._client._objects.setdefault(self._bucket, {})[path] = data
+        self._client._after_call("storage", f"{self._bucket}.upload", 0)
+        return {"path": path, "Key": f"{self._bucket}/{path}"}
+
+    def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        with self._client._lock:
+            objects = self._client._objects.get(self._bucket, {})
+            removed = [{"name": p} for p in paths if objects.pop(p, None) is not None]
+        self._client._after_call("storage", f"{self._bucket}.remove", 0)
+        return removed
+
+
+class _FakeStorage:
+    def __init__(self, client: "FakeSupabase"):
+        self._client = client
+
+    def from_(self, bucket: str) -> _FakeBucket:
+        return _FakeBucket(self._client, bucket)
+
+
+@dataclass
+class _FakeUser:
+    id: str
+    email: Optional[str] = None
+
+
+@dataclass
+class _FakeUserResponse:
+    user: _FakeUser
+
+
+class _FakeAuth:
+    def __init__(self, client: "FakeSupabase"):
+        self._client = client
+
+    def get_user(self, jwt_token: Optional[str] = None) -> Optional[_FakeUserResponse]:
+        """Accepts a token minted by make_access_token() or a bare user id."""
+        user_id = jwt_token
+        try:
+            import jwt
+            user_id = jwt.decode(jwt_token, options={"verify_signature": False}).get("sub")
+        except Exception:
+            pass
+        with self._client._lock:
+            profiles = self._client._table("profiles").lookup("id", user_id)
+        self._client._after_call("auth", "auth.get_user", 0)
+        if not profiles:
+            return None
+        return _FakeUserResponse(user=_FakeUser(id=user_id, email=profiles[0].get("email")))
+
+
+RpcHandler = Callable[["FakeSupabase", Dict[str, Any]], Any]
+RPC_HANDLERS: Dict[str, RpcHandler] = {}
+
+
+def rpc_handler(name: str) -> Callable[[RpcHandler], RpcHandler]:
+    """Register a database function for every stand-in client."""
+    def _register(fn: RpcHandler) -> RpcHandler:
+        RPC_HANDLERS[name] = fn
+        return fn
+    return _register
+
+
+class FakeSupabase:
+    """In-memory Supabase client; thread-safe, so it works from the supabase-io pool."""
+
+    def __init__(
+        self,
+        latency_ms: LatencySpec = 0.0,
+        jitter_ms: float = 0.0,
+        per_row_ms: float = 0.0,
+        latency_by_name: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        self._lock = threading.RLock()
+        self._tables: Dict[str, _Table] = {}
+        self._objects: Dict[str, Dict[str, bytes]] = {}
+        self._rpcs: Dict[str, RpcHandler] = {}
+        self._rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.set_latency(latency_ms, jitter_ms, per_row_ms, latency_by_name)
+
+    def set_latency(
+        self,
+        latency_ms: LatencySpec = 0.0,
+        jitter_ms: float = 0.0,
+        per_row_ms: float = 0.0,
+        latency_by_name: Optional[Dict[str, float]] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_row_ms = per_row_ms
+        self.latency_by_name = dict(latency_by_name or {})
+
+    # supabase-py surface
+    def table(self, table_name: str) -> FakeQuery:
+        return FakeQuery(self, "table", table_name)
+
+    def from_(self, table_name: str) -> FakeQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, **kwargs) -> FakeQuery:
+        return FakeQuery(self, "rpc", fn, dict(params or {}))
+
+    @property
+    def storage(self) -> _FakeStorage:
+        return _FakeStorage(self)
+
+    @property
+    def auth(self) -> _FakeAuth:
+        return _FakeAuth(self)
+
+    # Data access for seeding, RPC handlers and assertions
+    def register_rpc(self, name: str, fn: RpcHandler):
+        self._rpcs[name] = fn
+
+    def insert_rows(self, table_name: str, rows: Iterable[Dict[str, Any]]):
+        """Bulk load rows as given (no defaults, no conflict checks)."""
+        with self._lock:
+            table = self._table(table_name)
+            table.rows.extend(rows)
+            table.changed()
+
+    def put_object(self, bucket: str, path: str, data: Union[bytes, str]):
+        with self._lock:
+            self._objects.setdefault(bucket, {})[path] = data.encode("utf-8") if isinstance(data, str) else data
+
+    def rows(self, table_name: str, **equals: Any) -> List[Dict[str, Any]]:
+        """Live rows of a table matching column=value pairs (do not mutate outside the lock)."""
+        with self._lock:
+            table = self._table(table_name)
+            id_cols = [c for c in equals if c == "id" or c.endswith("_id")]
+            candidates = table.lookup(id_cols[0], equals[id_cols[0]]) if id_cols else table.rows
+            return [r for r in candidates if all(r.get(c) == v for c, v in equals.items())]
+
+    def row_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {name: len(t.rows) for name, t in sorted(self._tables.items()) if t.rows}
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    # Internals
+    def _table(self, name: str) -> _Table:
+        table = self._tables.get(name)
+        if table is None:
+            table = self._tables[name] = _Table()
+        return table
+
+    def _call_rpc(self, name: str, params: Dict[str, Any]) -> Any:
+        handler = self._rpcs.get(name) or RPC_HANDLERS.get(name)
+        if handler is None:
+            raise _api_error(
+                f"Could not find the function public.{name} in the schema cache",
+                "PGRST202",
+                hint="The stand-in has no handler; add one with register_rpc()",
+            )
+        return copy.deepcopy(handler(self, params))
+
+    def _write(self, name: str, payload: Any, upsert: bool, on_conflict: Tuple[str, ...],
+               ignore_duplicates: bool) -> List[Dict[str, Any]]:
+        table = self._table(name)
+        keys = on_conflict or PRIMARY_KEYS.get(name, ("id",))
+        written = []
+        for item in (payload if isinstance(payload, list) else [payload]):
+            row = copy.deepcopy(item)
+            existing = None
+            if all(row.get(k) is not None for k in keys):
+                existing = next(
+                    (r for r in table.lookup(keys[0], row[keys[0]]) if all(r.get(k) == row[k] for k in keys)),
+                    None,
+                )
+            if existing is not None:
+                if not upsert:
+                    raise _api_error(
+                        f'duplicate key value violates unique constraint "{name}_pkey"',
+                        "23505",
+                        details=f"Key ({', '.join(keys)}) already exists.",
+                    )
+                if not ignore_duplicates:
+                    existing.update(row)
+                    table.changed()
+                    written.append(existing)
+                continue
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("created_at", _now_iso())
+            table.append(row)
+            written.append(row)
+        return written
+
+    def _project(self, name: str, rows: List[Dict[str, Any]], columns: str) -> List[Any]:
+        if columns.strip() in ("", "*"):
+            return [dict(r) if isinstance(r, dict) else r for r in rows]
+        spec = _split_columns(columns)
+        return [self._project_row(name, r, spec) if isinstance(r, dict) else r for r in rows]
+
+    def _project_row(self, name: str, row: Dict[str, Any], spec: List[str]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for item in spec:
+            if "(" in item:
+                head, inner = item.split("(", 1)
+                inner = inner[: inner.rfind(")")]
+                alias, _, target = head.strip().rpartition(":")
+                target = target.split("!")[0].strip()
+                out[alias.strip() or target] = self._embed(name, row, target, inner)
+                continue
+            if item == "*":
+                out.update(row)
+                continue
+            alias, _, column = item.rpartition(":")
+            column = column.split("::")[0].strip()
+            out[alias.strip() or column] = row.get(column)
+        return out
+
+    def _embed(self, name: str, row: Dict[str, Any], target: str, inner: str) -> Any:
+        spec = _split_columns(inner or "*")
+        if target.endswith("_id"):
+            # alias:fk_column(...): many-to-one through that column
+            return self._embed_one(EMBED_TARGETS.get(target) or target[:-3] + "s", row.get(target), spec)
+        fk = next((k for k, v in EMBED_TARGETS.items() if v == target), f"{_singular(target)}_id")
+        if fk in row:
+            return self._embed_one(target, row.get(fk), spec)
+        # One-to-many: rows of the target pointing back at this row
+        children = self._table(target).lookup(f"{_singular(name)}_id", row.get("id")) if row.get("id") else []
+        return [self._project_row(target, r, spec) for r in children]
+
+    def _embed_one(self, table_name: str, key: Any, spec: List[str]) -> Optional[Dict[str, Any]]:
+        matches = self._table(table_name).lookup("id", key) if key else []
+        return self._project_row(table_name, matches[0], spec) if matches else None
+
+    def _after_call(self, kind: str, name: str, rows: int):
+        self.calls[f"{kind}:{name}"] += 1
+        if callable(self.latency_ms):
+            ms = self.latency_ms(kind, name, rows)
+        else:
+            ms = self.latency_by_name.get(name, self.latency_ms)
+        ms += rows * self.per_row_ms
+        if self.jitter_ms:
+            ms += self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if ms > 0:
+            time.sleep(ms / 1000.0)
+
+
+# Database functions the backend calls
+
+def _parse_date(value: Any) -> dt.date:
+    return value if isinstance(value, dt.date) else dt.date.fromisoformat(str(value)[:10])
+
+
+def _event_minutes(event: Dict[str, Any]) -> int:
+    if event.get("minutes") is not None:
+        return int(event["minutes"])
+    try:
+        start = dt.datetime.fromisoformat(event["start_ts"].replace("Z", "+00:00"))
+        end = dt.datetime.fromisoformat(event["end_ts"].replace("Z", "+00:00"))
+    except Exception:
+        return 0
+    return int((end - start).total_seconds() // 60)
+
+
+@rpc_handler("get_accessible_children")
+def _rpc_accessible_children(db: FakeSupabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = []
+    for member in db.rows("family_members", user_id=params.get("_user_id")):
+        if member.get("member_role") == "parent":
+            out.extend({"child_id": c["id"], "family_id": c["family_id"]}
+                       for c in db.rows("children", family_id=member["family_id"]))
+        elif member.get("member_role") == "tutor":
+            out.extend({"child_id": cid, "family_id": member["family_id"]} for cid in member.get("child_scope") or [])
+    return out
+
+
+@rpc_handler("get_required_minutes")
+def _rpc_required_minutes(db: FakeSupabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    week_start = _parse_date(params["p_week_start"])
+    weeks = int(params.get("p_weeks_ahead") or 2)
+    family_id, child_id = params["p_family_id"], params["p_child_id"]
+    velocity = {
+        v.get("subject_id"): v.get("velocity")
+        for v in db.rows("learning_velocity", family_id=family_id, child_id=child_id)
+    }
+    out = []
+    for syllabus in db.rows("syllabi", family_id=family_id, child_id=child_id):
+        start = _parse_date(syllabus["start_date"])
+        end = _parse_date(syllabus["end_date"]) if syllabus.get("end_date") else week_start
+        if not start <= week_start <= end:
+            continue
+        minutes = math.ceil(syllabus.get("expected_weekly_minutes", 0) * (velocity.get(syllabus["subject_id"]) or 1.0))
+        for i in range(weeks):
+            out.append({
+                "subject_id": syllabus["subject_id"],
+                "week": str(week_start + dt.timedelta(days=7 * i)),
+                "required_minutes": minutes,
+            })
+    return out
+
+
+@rpc_handler("get_standards_gaps")
+def _rpc_standards_gaps(db: FakeSupabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    child_id = params["p_child_id"]
+    state, grade, subject = params.get("p_state_code"), params.get("p_grade_level"), params.get("p_subject")
+    active = any(
+        p.get("state_code") == state and p.get("grade_level") == grade and p.get("is_active")
+        for p in db.rows("user_standards_preferences", child_id=child_id)
+    )
+    if not active:
+        return []
+    covered = {c.get("standard_id") for c in db.rows("standards_coverage", child_id=child_id)}
+    gaps = sorted(
+        (s for s in db.rows("standards")
+         if s.get("state_code") == state and s.get("grade_level") == grade
+         and (subject is None or s.get("subject") == subject) and s["id"] not in covered),
+        key=lambda s: s.get("standard_code") or "",
+    )
+    return [
+        {
+            "standard_id": s["id"],
+            "standard_code": s.get("standard_code"),
+            "standard_text": s.get("standard_text"),
+            "subject": s.get("subject"),
+            "estimated_hours": s.get("estimated_hours"),
+            "prerequisites": s.get("prerequisites") or [],
+        }
+        for s in gaps[: int(params.get("p_limit") or 10)]
+    ]
+
+
+@rpc_handler("get_required_minutes_batch")
+def _rpc_required_minutes_batch(db: FakeSupabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = []
+    for child_id in params.get("p_child_ids") or []:
+        single = {**params, "p_child_id": child_id}
+        out.extend({"child_id": child_id, **row} for row in _rpc_required_minutes(db, single))
+    return out
+
+
+@rpc_handler("get_standards_gaps_batch")
+def _rpc_standards_gaps_batch(db: FakeSupabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = []
+    for child_id in params.get("p_child_ids") or []:
+        prefs = sorted({
+            (p.get("state_code"), p.get("grade_level"))
+            for p in db.rows("user_standards_preferences", child_id=child_id)
+            if p.get("is_active")
+        }, key=lambda pref: (pref[0] or "", pref[1] or ""))
+        for state, grade in prefs:
+            single = {
+                "p_child_id": child_id,
+                "p_state_code": state,
+                "p_grade_level": grade,
+                "p_subject": params.get("p_subject"),
+                "p_limit": params.get("p_limit"),
+            }
+            out.extend(
+                {"child_id": child_id, "state_code": state, "grade_level": grade, **row}
+                for row in _rpc_standards_gaps(db, single)
+            )
+    return out
+
+
+@rpc_handler("get_curriculum_heatmap")
+def _rpc_curriculum_heatmap(db: FakeSupabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    start, end = _parse_date(params["p_start"]), _parse_date(params["p_end"])
+    subjects = {s["id"]: s.get("name") for s in db.rows("subject")}
+    totals: Dict[Tuple[dt.date, str], List[int]] = {}
+    for event in db.rows("events", family_id=params["p_family_id"]):
+        if not event.get("start_ts"):
+            continue
+        day = _parse_date(event["start_ts"])
+        if not start <= day <= end:
+            continue
+        key = (day - dt.timedelta(days=day.weekday()), subjects.get(event.get("subject_id")) or "Unassigned")
+        minutes = _event_minutes(event)
+        bucket = totals.setdefault(key, [0, 0])
+        bucket[0] += minutes
+        if event.get("status") == "done":
+            bucket[1] += minutes
+    out = []
+    week = start - dt.timedelta(days=start.weekday())
+    while week <= end:
+        rows = sorted((k[1], v) for k, v in totals.items() if k[0] == week)
+        for subject, (scheduled, done) in rows or [("No events", (0, 0))]:
+            out.append({"week_start": str(week), "subject": subject,
+                        "minutes_scheduled": scheduled, "minutes_done": done})
+        week += dt.timedelta(days=7)
+    return out
+
+
+@rpc_handler("shift_week_forward")
+def _rpc_shift_week_forward(db: FakeSupabase, params: Dict[str, Any]) -> int:
+    week_start = _parse_date(params["p_week_start"])
+    week_end = week_start + dt.timedelta(days=7)
+    shifted = 0
+    for event in db.rows("events", family_id=params["p_family_id"]):
+        if event.get("status") == "done" or not event.get("start_ts"):
+            continue
+        if week_start <= _parse_date(event["start_ts"]) < week_end:
+            for column in ("start_ts", "end_ts"):
+                ts = dt.datetime.fromisoformat(event[column].replace("Z", "+00:00"))
+                event[column] = (ts + dt.timedelta(days=7)).isoformat()
+            shifted += 1
+    db._table("events").changed()
+    return shifted
+
+
+@rpc_handler("refresh_calendar_days_cache")
+def _rpc_refresh_calendar_days_cache(db: FakeSupabase, params: Dict[str, Any]) -> None:
+    # Seeded cache rows are already current
+    return None
+
+
+@rpc_handler("refresh_standards_gap_analysis")
+def _rpc_refresh_standards_gap_analysis(db: FakeSupabase, params: Dict[str, Any]) -> None:
+    return None
+
+
+# Synthetic data
+
+SUBJECT_NAMES = ["Math", "Reading", "Writing", "Science", "History", "Art", "Music", "Spanish"]
+FIRST_NAMES = ["Ava", "Ben", "Cora", "Dev", "Eli", "Fern", "Gus", "Hana", "Ivy", "Jude", "Kai", "Lena"]
+STRENGTHS = ["focus", "curiosity", "problem solving", "vocabulary", "neat work", "asks questions"]
+STRUGGLES = ["fractions", "spelling", "long division", "reading stamina", "handwriting", "word problems"]
+STANDARDS_STATE = "CA"
+
+
+@dataclass
+class SeededFamily:
+    family_id: str
+    user_id: str
+    email: str
+    child_ids: List[str] = field(default_factory=list)
+    subject_ids: List[str] = field(default_factory=list)
+    year_plan_id: Optional[str] = None
+
+
+def _seed_standards(client: FakeSupabase, rng: random.Random, new_id: Callable[[], str]):
+    if client.rows("standards"):
+        return
+    rows = []
+    for grade in range(1, 13):
+        for subject in ("Math", "ELA", "Science"):
+            for n in range(1, 16):
+                rows.append({
+                    "id": new_id(),
+                    "state_code": STANDARDS_STATE,
+                    "grade_level": str(grade),
+                    "subject": subject,
+                    "standard_code": f"{STANDARDS_STATE}.{subject}.{grade}.{n:02d}",
+                    "standard_text": f"{subject} grade {grade} standard {n}",
+                    "estimated_hours": rng.choice([2, 3, 4, 6]),
+                    "prerequisites": [],
+                })
+    client.insert_rows("standards", rows)
+
+
+def seed_families(
+    client: FakeSupabase,
+    families: int = 1,
+    children: int = 3,
+    weeks: int = 12,
+    events_per_day: int = 3,
+    subjects: int = 5,
+    blackouts: int = 4,
+    outcome_rate: float = 0.6,
+    start: Optional[dt.date] = None,
+    seed: int = 0,
+) -> List[SeededFamily]:
+    """Load synthetic families into the stand-in.
+
+    Each family gets a parent account, `children` children, `subjects`
+    subjects with syllabi and velocities, `events_per_day` events per child
+    per school day over `weeks` weeks (half before `start`/today, half after),
+    outcomes for `outcome_rate` of the past events, daily attendance, a
+    calendar cache, blackouts, a year plan and standards preferences. The
+    same seed gives the same ids and rows (dates move with `start`).
+    """
+    rng = random.Random(seed)
+
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    today = start or dt.date.today()
+    first_day = today - dt.timedelta(days=today.weekday()) - dt.timedelta(weeks=weeks // 2)
+    days = [first_day + dt.timedelta(days=i) for i in range(weeks * 7)]
+    created_at = dt.datetime.combine(first_day, dt.time(8), tzinfo=dt.timezone.utc).isoformat()
+    _seed_standards(client, rng, new_id)
+
+    tables: Dict[str, List[Dict[str, Any]]] = {}
+
+    def add(table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        tables.setdefault(table, []).append(row)
+        return row
+
+    seeded = []
+    for f in range(families):
+        family_id, user_id = new_id(), new_id()
+        email = f"parent{f}@example.test"
+        add("family", {"id": family_id, "name": f"Family {f}", "timezone": "America/Los_Angeles", "created_at": created_at})
+        add("profiles", {"id": user_id, "email": email, "role": "parent", "family_id": family_id, "created_at": created_at})
+        add("family_members", {"id": new_id(), "family_id": family_id, "user_id": user_id,
+                               "member_role": "parent", "child_scope": [], "created_at": created_at})
+        family = SeededFamily(family_id=family_id, user_id=user_id, email=email)
+
+        for s in range(subjects):
+            subject_id = new_id()
+            family.subject_ids.append(subject_id)
+            add("subject", {"id": subject_id, "family_id": family_id,
+                            "name": SUBJECT_NAMES[s % len(SUBJECT_NAMES)], "created_at": created_at})
+
+        year_plan_id = new_id()
+        family.year_plan_id = year_plan_id
+        add("year_plans", {"id": year_plan_id, "family_id": family_id, "status": "active",
+                           "start_date": str(days[0]), "end_date": str(days[-1]), "created_at": created_at})
+
+        for c in range(children):
+            child_id = new_id()
+            family.child_ids.append(child_id)
+            grade = str(1 + (c * 2 + f) % 12)
+            add("children", {"id": child_id, "family_id": family_id,
+                             "first_name": FIRST_NAMES[c % len(FIRST_NAMES)], "grade_level": grade, "grade": grade,
+                             "avatar": None, "archived": False, "interests": ["nature", "drawing"],
+                             "created_at": created_at})
+            add("user_standards_preferences", {"id": new_id(), "child_id": child_id, "state_code": STANDARDS_STATE,
+                                               "grade_level": grade, "subject_id": None, "is_active": True})
+            add("year_plan_children", {"id": new_id(), "year_plan_id": year_plan_id, "child_id": child_id,
+                                       "subjects": [{"subject_id": sid, "target_minutes_per_week": 150}
+                                                    for sid in family.subject_ids]})
+            for subject_id in family.subject_ids:
+                add("syllabi", {"id": new_id(), "family_id": family_id, "child_id": child_id,
+                                "subject_id": subject_id, "expected_weekly_minutes": rng.choice([90, 120, 150, 180]),
+                                "start_date": str(days[0]), "end_date": str(days[-1])})
+                add("learning_velocity", {"family_id": family_id, "child_id": child_id, "subject_id": subject_id,
+                                          "velocity": round(rng.uniform(0.8, 1.2), 2)})
+                add("grades", {"id": new_id(), "child_id": child_id, "subject_id": subject_id,
+                               "term_label": "Fall", "grade": rng.choice(["A", "B", "C"]),
+                               "score": rng.randint(70, 100), "credits": 1, "rubric": None, "notes": None,
+                               "created_at": created_at})
+
+            for day in days:
+                school_day = day.weekday() < 5
+                add("calendar_days_cache", {
+                    "family_id": family_id, "child_id": child_id, "date": str(day),
+                    "day_status": "teach" if school_day else "off",
+                    "first_block_start": "09:00:00" if school_day else None,
+                    "last_block_end": "15:00:00" if school_day else None,
+                    "is_frozen": False,
+                })
+                if not school_day:
+                    continue
+                past = day < today
+                day_minutes = 0
+                for e in range(events_per_day):
+                    subject_id = rng.choice(family.subject_ids)
+                    begins = dt.datetime.combine(day, dt.time(9 + e), tzinfo=dt.timezone.utc)
+                    minutes = rng.choice([30, 45, 60])
+                    status = ("done" if rng.random() < 0.85 else "scheduled") if past else "scheduled"
+                    event_id = new_id()
+                    add("events", {
+                        "id": event_id, "family_id": family_id, "child_id": child_id, "subject_id": subject_id,
+                        "title": f"Lesson {e + 1}", "description": f"Week {day.isocalendar()[1]} lesson", "status": status,
+                        "start_ts": begins.isoformat(),
+                        "end_ts": (begins + dt.timedelta(minutes=minutes)).isoformat(),
+                        "source": "seed", "year_plan_id": year_plan_id, "created_at": created_at,
+                    })
+                    if status == "done":
+                        day_minutes += minutes
+                        if rng.random() < outcome_rate:
+                            add("event_outcomes", {
+                                "id": new_id(), "family_id": family_id, "child_id": child_id, "event_id": event_id,
+                                "subject_id": subject_id, "rating": rng.randint(1, 5),
+                                "grade": rng.choice(["A", "B", "C", None]),
+                                "strengths": rng.sample(STRENGTHS, 2),
+                                "struggles": rng.sample(STRUGGLES, rng.randint(0, 2)),
+                                "note": None, "created_at": (begins + dt.timedelta(hours=2)).isoformat(),
+                            })
+                if past:
+                    add("attendance_records", {
+                        "id": new_id(), "family_id": family_id, "child_id": child_id, "event_id": None,
+                        "day_date": str(day), "minutes": day_minutes,
+                        "status": "present" if day_minutes >= 90 else ("partial" if day_minutes else "absent"),
+                        "note": None, "created_at": created_at,
+                    })
+
+        for _ in range(blackouts):
+            starts = rng.choice(days)
+            add("blackout_periods", {
+                "id": new_id(), "family_id": family_id,
+                "child_id": rng.choice([None, rng.choice(family.child_ids)]) if family.child_ids else None,
+                "starts_on": str(starts), "ends_on": str(starts + dt.timedelta(days=rng.randint(0, 4))),
+                "reason": "Vacation", "created_at": created_at,
+            })
+        seeded.append(family)
+
+    for table, rows in tables.items():
+        client.insert_rows(table, rows)
+    return seeded
+
+
+def make_access_token(user_id: str, secret: str, email: Optional[str] = None, ttl_seconds: int = 3600) -> str:
+    """HS256 access token auth.py accepts when SUPABASE_JWT_SECRET is the same secret."""
+    import jwt
+    now = int(time.time())
+    return jwt.encode(
+        {"sub": user_id, "email": email, "aud": "authenticated", "role": "authenticated",
+         "iat": now, "exp": now + ttl_seconds},
+        secret,
+        algorithm="HS256",
+    )
+
+
+def client_from_env() -> FakeSupabase:
+    """Seeded stand-in configured by the FAKE_SUPABASE_* environment variables."""
+    seed = int(os.getenv("FAKE_SUPABASE_SEED", "0"))
+    client = FakeSupabase(
+        latency_ms=float(os.getenv("FAKE_SUPABASE_LATENCY_MS", "0")),
+        jitter_ms=float(os.getenv("FAKE_SUPABASE_JITTER_MS", "0")),
+        seed=seed,
+    )
+    families = seed_families(
+        client,
+        families=int(os.getenv("FAKE_SUPABASE_FAMILIES", "1")),
+        children=int(os.getenv("FAKE_SUPABASE_CHILDREN", "3")),
+        weeks=int(os.getenv("FAKE_SUPABASE_WEEKS", "12")),
+        seed=seed,
+    )
+    print(f"[FAKE-SUPABASE] seeded families={len(families)} rows={sum(client.row_counts().values())} "
+          f"users={[f.user_id for f in families][:5]}")
+    return client
+
+
+def install(client: Optional[FakeSupabase] = None) -> FakeSupabase:
+    """Make get_admin_client() (and so every route) use the stand-in."""
+    from supabase_client import set_admin_client
+    client = client or FakeSupabase()
+    set_admin_client(client)
+    return client
+
+
+def uninstall():
+    from supabase_client import set_admin_client
+    set_admin_client(None)
@@ -0,0 +1,89 @@
+"""
+JSON responses encoded with orjson.
+
+FastJSONResponse is the app's default response class, so handlers without a
+response_model are encoded by orjson instead of json.dumps. orjson is
+optional: without it the class falls back to the stdlib encoder with the
+same output options as Starlette's JSONResponse.
+
+FastAPI still runs jsonable_encoder() over returned dicts, and validates
+and re-serializes anything returned from a route with a response_model.
+For large payloads the route built itself (rows already shaped like the
+response model), return trusted_json(content) instead: a Response instance
+is sent as is, skipping both steps. The response_model stays on the route
+for the OpenAPI schema.
+
+    return trusted_json({"items": rows, "total": total})
+"""
+import dataclasses
+import datetime as dt
+import decimal
+import enum
+import json
+import uuid
+from typing import Any, Mapping, Optional, Union
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # stdlib fallback below
+
+
+def _default(value: Any) -> Any:
+    """Types orjson (or json) cannot encode natively."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON for content."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    """Parse JSON (e.g. bytes from dumps())."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_json(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> FastJSONResponse:
+    """Send data built by the handler itself without response_model validation."""
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
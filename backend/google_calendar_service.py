@@ -1,5 +1,4 @@
 import os
-import requests
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, Tuple
 
@@ -72,6 +71,7 @@ def _parse_expires_at(expires_at: Optional[str]) -> Optional[datetime]:
 
 
 def ensure_access_token(credential: Dict[str, Any]) -> Dict[str, Any]:
+    import requests  # imported on first use; not needed at startup
     expires_at = _parse_expires_at(credential.get("expires_at"))
     now = datetime.now(timezone.utc)
     if expires_at and expires_at - timedelta(minutes=2) > now:
@@ -115,6 +115,7 @@ def ensure_access_token(credential: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def fetch_account_email(access_token: str) -> Optional[str]:
+    import requests
     try:
         resp = requests.get(
             USERINFO_URL,
@@ -173,6 +174,7 @@ def _get_family_timezone(family_id: str) -> str:
 
 
 def push_event_to_google(credential: Dict[str, Any], event: Dict[str, Any]) -> Dict[str, Any]:
+    import requests
     credential = ensure_access_token(credential)
     timezone_name = _get_family_timezone(credential["family_id"])
     payload = _build_event_payload(event, timezone_name)
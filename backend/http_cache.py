@@ -0,0 +1,101 @@
+"""
+Strong ETags and If-None-Match handling for polled GET endpoints.
+
+Handlers compute an ETag from the data a response is built from (or from
+the encoded body) and call conditional_response(). When the client's
+If-None-Match matches, it returns an empty 304 and skips encoding the body.
+Responses are marked "private, no-cache": clients keep their copy but ask
+again every time, so an unchanged poll costs one small 304.
+
+    etag = etag_for(calendar_name, events)
+    return not_modified(request, etag) or conditional_response(
+        request, build_ics(events), "text/calendar", etag=etag
+    )
+"""
+import hashlib
+from typing import Any, Mapping, Optional, Union
+
+from fastapi import Request, Response
+
+from compression import ETAG_SUFFIXES
+from fast_json import dumps
+from metrics import increment_counter
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_for(*parts: Any) -> str:
+    """Strong ETag over bytes, strings or JSON-encodable values."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, (bytes, bytearray)):
+            part = dumps(part)
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return f'"{digest.hexdigest()}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ETAG_SUFFIXES.values():
+        if tag.endswith(f'{suffix}"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match already names this ETag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def _headers(etag: str, headers: Optional[Mapping[str, str]]) -> dict:
+    return {**(headers or {}), "ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(request: Request, etag: str, headers: Optional[Mapping[str, str]] = None) -> Optional[Response]:
+    """An empty 304 when the client already has this ETag, else None."""
+    if not if_none_match(request, etag):
+        return None
+    increment_counter("http_not_modified")
+    # Content-Disposition and friends are not repeated on a 304
+    kept = {k: v for k, v in (headers or {}).items() if k.lower() in ("vary", "content-location")}
+    return Response(status_code=304, headers=_headers(etag, kept))
+
+
+def conditional_response(
+    request: Request,
+    content: Union[str, bytes],
+    media_type: str,
+    etag: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """content with a strong ETag (hashed from the body if not given), or a 304."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    etag = etag or etag_for(content)
+    return not_modified(request, etag, headers) or Response(
+        content=content, media_type=media_type, headers=_headers(etag, headers)
+    )
+
+
+def conditional_json(
+    request: Request,
+    content: Any,
+    etag: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Like fast_json.trusted_json(), but with an ETag and If-None-Match support."""
+    if etag is not None:
+        cached = not_modified(request, etag, headers)
+        if cached is not None:
+            return cached
+    return conditional_response(request, dumps(content), "application/json", etag=etag, headers=headers)
@@ -0,0 +1,148 @@
+"""
+Per-user identity context: family, role, child scope and accessible children.
+
+Resolved once per request through the get_identity dependency and kept in a
+small bounded TTL cache, so handlers stop repeating the same profiles /
+family_members lookups. Write paths that change membership (invite accept,
+tutor scope updates) must call invalidate_identity().
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from fastapi import Depends, Request
+
+from auth import get_current_user
+from supabase_async import get_async_client
+
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "60"))
+IDENTITY_CACHE_MAX = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", "5000"))
+
+
+@dataclass(frozen=True)
+class IdentityContext:
+    user_id: str
+    email: Optional[str] = None
+    family_id: Optional[str] = None
+    role: Optional[str] = None  # family_members.member_role, else profiles.role
+    member_role: Optional[str] = None
+    profile_role: Optional[str] = None
+    child_scope: List[str] = field(default_factory=list)
+    accessible_child_ids: List[str] = field(default_factory=list)
+
+    @property
+    def is_parent(self) -> bool:
+        # Explicit parent membership, else profiles.role; a missing role is not parent
+        return self.family_id is not None and (self.member_role == "parent" or self.profile_role == "parent")
+
+    @property
+    def is_tutor(self) -> bool:
+        return self.role == "tutor"
+
+    @property
+    def is_child(self) -> bool:
+        return self.role == "child"
+
+    def can_access_child(self, child_id: str) -> bool:
+        return child_id in self.accessible_child_ids
+
+
+_identity_lock = threading.Lock()
+_identity_cache: "OrderedDict[str, Tuple[float, IdentityContext]]" = OrderedDict()
+
+
+def _cache_get(user_id: str) -> Optional[IdentityContext]:
+    with _identity_lock:
+        entry = _identity_cache.get(user_id)
+        if not entry:
+            return None
+        expires_at, ctx = entry
+        if expires_at < time.time():
+            _identity_cache.pop(user_id, None)
+            return None
+        _identity_cache.move_to_end(user_id)
+        return ctx
+
+
+def _cache_set(ctx: IdentityContext):
+    with _identity_lock:
+        _identity_cache[ctx.user_id] = (time.time() + IDENTITY_CACHE_TTL, ctx)
+        _identity_cache.move_to_end(ctx.user_id)
+        while len(_identity_cache) > IDENTITY_CACHE_MAX:
+            _identity_cache.popitem(last=False)
+
+
+def invalidate_identity(user_id: Optional[str] = None, family_id: Optional[str] = None):
+    """Drop cached identities for a user and/or every member of a family."""
+    with _identity_lock:
+        if user_id:
+            _identity_cache.pop(user_id, None)
+        if family_id:
+            stale = [uid for uid, (_, ctx) in _identity_cache.items() if ctx.family_id == family_id]
+            for uid in stale:
+                _identity_cache.pop(uid, None)
+
+
+async def _load_identity(user_id: str, email: Optional[str]) -> IdentityContext:
+    supabase = get_async_client()
+    profile_res, members_res = await asyncio.gather(
+        supabase.table("profiles").select("role, family_id").eq("id", user_id).maybe_single().execute(),
+        supabase.table("family_members").select("member_role, family_id, child_scope").eq("user_id", user_id).execute(),
+    )
+    profile = (profile_res.data if profile_res else None) or {}
+    members = (members_res.data if members_res else None) or []
+
+    family_id = profile.get("family_id")
+    member = None
+    if members:
+        # Prefer the membership row for the profile's family
+        member = next((m for m in members if m.get("family_id") == family_id), None) or members[0]
+        family_id = family_id or member.get("family_id")
+        if member.get("family_id") != family_id:
+            member = None
+
+    member_role = member.get("member_role") if member else None
+    profile_role = profile.get("role")
+    role = member_role or profile_role
+    child_scope = list((member.get("child_scope") if member else None) or [])
+
+    if family_id and (role == "parent" or role is None):
+        children_res = await supabase.table("children").select("id").eq("family_id", family_id).eq("archived", False).execute()
+        accessible = [c["id"] for c in (children_res.data or [])]
+    else:
+        accessible = child_scope
+
+    return IdentityContext(
+        user_id=user_id,
+        email=email,
+        family_id=family_id,
+        role=role,
+        member_role=member_role,
+        profile_role=profile_role,
+        child_scope=child_scope,
+        accessible_child_ids=accessible,
+    )
+
+
+async def resolve_identity(user_id: str, email: Optional[str] = None) -> IdentityContext:
+    """Cached identity lookup (users without a family are never cached)."""
+    ctx = _cache_get(user_id)
+    if ctx is not None:
+        return ctx
+    ctx = await _load_identity(user_id, email)
+    if ctx.family_id:
+        _cache_set(ctx)
+    return ctx
+
+
+async def get_identity(request: Request, user: dict = Depends(get_current_user)) -> IdentityContext:
+    """FastAPI dependency: the caller's identity, resolved once per request."""
+    ctx = getattr(request.state, "identity", None)
+    if ctx is None or ctx.user_id != user["id"]:
+        ctx = await resolve_identity(user["id"], user.get("email"))
+        request.state.identity = ctx
+    return ctx
@@ -5,12 +5,30 @@ All AI calls happen server-side only, never from browser
 import os
 import asyncio
 import json
+import threading
 import backoff
-from openai import AsyncOpenAI
 from typing import Any, Dict
 
+from context_budget import encode_within_budget, fit_text
+from llm_context import CONTEXT_FORMAT, ContextEncoder
+
 _OPENAI_KEY = os.environ["OPENAI_API_KEY"]
-client = AsyncOpenAI(api_key=_OPENAI_KEY)
+
+# The openai package is the slowest import in the app, so the client is built
+# on the first LLM call. Assigning llm.client directly (e.g. a stub) still works.
+client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Shared AsyncOpenAI client, built on first use."""
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                from openai import AsyncOpenAI
+                client = AsyncOpenAI(api_key=_OPENAI_KEY)
+    return client
 
 @backoff.on_exception(backoff.expo, Exception, max_tries=3)
 async def llm_extract_outline(text: str) -> Dict[str, Any]:
@@ -34,8 +52,8 @@ async def llm_extract_outline(text: str) -> Dict[str, Any]:
       "metadata": {"course_name": "...", "total_weeks": 12}
     }
     """
-    # Truncate to reasonable token limit (120k chars ~ 30k tokens)
-    truncated_text = text[:120000] if len(text) > 120000 else text
+    # Whitespace collapsed, then cut at a line boundary to OUTLINE_TOKEN_BUDGET
+    truncated_text = fit_text(text, call="extract_outline")
     
     prompt = f"""You are parsing a homeschool course syllabus.
 Extract and return ONLY valid JSON with this structure:
@@ -66,7 +84,7 @@ SYLLABUS TEXT:
 """
     
     try:
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a syllabus parser. Return only valid JSON."},
@@ -189,7 +207,7 @@ Rules:
 """
     
     try:
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are an educational recommendation engine. Return only valid JSON."},
@@ -252,6 +270,9 @@ async def llm_suggest_plan(context: dict) -> Dict[str, Any]:
       "rationale": ["..."],
     }
     """
+    encoder = ContextEncoder()
+    context_json = encode_within_budget(context, encoder, call="suggest_plan")
+
     prompt = f"""You are an intelligent scheduling assistant for homeschooling families.
 Propose schedule changes for the coming weeks.
 
@@ -277,8 +298,8 @@ Return ONLY valid JSON with this structure:
 {{
   "adds": [
     {{
-      "child_id": "uuid",
-      "subject_id": "uuid",
+      "child_id": "C1",
+      "subject_id": "S1",
       "title": "Math - Chapter 5",
       "start": "2025-11-06T09:00:00Z",
       "end": "2025-11-06T10:00:00Z",
@@ -288,7 +309,7 @@ Return ONLY valid JSON with this structure:
   ],
   "moves": [
     {{
-      "event_id": "uuid",
+      "event_id": "E1",
       "from_start": "2025-11-05T14:00:00Z",
       "from_end": "2025-11-05T15:00:00Z",
       "to_start": "2025-11-07T09:00:00Z",
@@ -298,7 +319,7 @@ Return ONLY valid JSON with this structure:
   ],
   "deletes": [
     {{
-      "event_id": "uuid",
+      "event_id": "E1",
       "reason": "EXACT DUPLICATE: Same event scheduled twice at same time"
     }}
   ],
@@ -308,12 +329,12 @@ Return ONLY valid JSON with this structure:
   ]
 }}
 
-CONTEXT:
-{json.dumps(context, indent=2)}
+CONTEXT ({CONTEXT_FORMAT}):
+{context_json}
 """
     
     try:
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a scheduling assistant. Return only valid JSON."},
@@ -324,12 +345,12 @@ CONTEXT:
         )
         
         content = response.choices[0].message.content
-        return json.loads(content)
+        return encoder.decode(json.loads(content))
     except json.JSONDecodeError as e:
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
-            return json.loads(json_match.group())
+            return encoder.decode(json.loads(json_match.group()))
         raise ValueError(f"Failed to parse LLM response as JSON: {e}")
 
 @backoff.on_exception(backoff.expo, Exception, max_tries=3)
@@ -364,6 +385,9 @@ async def llm_pack_week(context: dict) -> Dict[str, Any]:
     max_minutes_per_day = context.get("max_minutes_per_day", 240)
     current_minutes_by_day = context.get("current_minutes_by_day", {})
     
+    encoder = ContextEncoder()
+    context_json = encode_within_budget(context, encoder, call="pack_week")
+
     prompt = f"""You are an intelligent scheduling assistant for homeschooling families.
 Pack a week (Monday to Sunday) with optimal event placement based on year plan targets and availability.
 
@@ -384,8 +408,8 @@ Return ONLY valid JSON with this structure:
 {{
   "events": [
     {{
-      "child_id": "uuid",
-      "subject_id": "uuid",
+      "child_id": "C1",
+      "subject_id": "S1",
       "title": "Subject Name - Session",
       "start": "2025-11-06T09:00:00Z",
       "end": "2025-11-06T10:00:00Z",
@@ -398,12 +422,12 @@ Return ONLY valid JSON with this structure:
   ]
 }}
 
-CONTEXT:
-{json.dumps(context, indent=2)}
+CONTEXT ({CONTEXT_FORMAT}):
+{context_json}
 """
     
     try:
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a week packing assistant. Return only valid JSON."},
@@ -414,12 +438,12 @@ CONTEXT:
         )
         
         content = response.choices[0].message.content
-        return json.loads(content)
+        return encoder.decode(json.loads(content))
     except json.JSONDecodeError as e:
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
-            return json.loads(json_match.group())
+            return encoder.decode(json.loads(json_match.group()))
         raise ValueError(f"Failed to parse LLM response as JSON: {e}")
 
 @backoff.on_exception(backoff.expo, Exception, max_tries=3)
@@ -451,6 +475,9 @@ async def llm_catch_up(context: dict) -> Dict[str, Any]:
     max_minutes_per_day = context.get("max_minutes_per_day", 240)
     current_minutes_by_day = context.get("current_minutes_by_day", {})
     
+    encoder = ContextEncoder()
+    context_json = encoder.encode(context, call="catch_up")
+
     prompt = f"""You are an intelligent scheduling assistant for homeschooling families.
 Reschedule missed events to optimal future time slots.
 
@@ -472,7 +499,7 @@ Return ONLY valid JSON with this structure:
 {{
   "rescheduled": [
     {{
-      "event_id": "uuid",
+      "event_id": "E1",
       "original_start": "2025-11-05T10:00:00Z",
       "new_start": "2025-11-10T09:00:00Z",
       "new_end": "2025-11-10T10:00:00Z",
@@ -485,12 +512,12 @@ Return ONLY valid JSON with this structure:
   ]
 }}
 
-CONTEXT:
-{json.dumps(context, indent=2)}
+CONTEXT ({CONTEXT_FORMAT}):
+{context_json}
 """
     
     try:
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a catch-up scheduling assistant. Return only valid JSON."},
@@ -501,12 +528,12 @@ CONTEXT:
         )
         
         content = response.choices[0].message.content
-        return json.loads(content)
+        return encoder.decode(json.loads(content))
     except json.JSONDecodeError as e:
         import re
         json_match = re.search(r'\{.*\}', content, re.DOTALL)
         if json_match:
-            return json.loads(json_match.group())
+            return encoder.decode(json.loads(json_match.group()))
         raise ValueError(f"Failed to parse LLM response as JSON: {e}")
 
 
@@ -561,7 +588,7 @@ Guidelines:
 """
     
     try:
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are an educational assessment assistant. Return only valid JSON."},
@@ -645,7 +672,7 @@ Additional Records Context:
 Return ONLY the summary text (no JSON, no markdown, plain text)."""
     
     try:
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are an educational progress analyst. Return only plain text summaries."},
@@ -762,7 +789,7 @@ Rules:
 """
     
     try:
-        response = await client.chat.completions.create(
+        response = await get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are a syllabus generator. Return only valid JSON."},
@@ -0,0 +1,211 @@
+"""
+Compact encoding of planning contexts for LLM prompts.
+
+json.dumps(context, indent=2) spends most of a planning prompt on
+indentation, keys repeated on every availability row and event, and
+36-character UUIDs. ContextEncoder instead:
+
+- replaces each UUID with a short alias (C1 for a child, S1 for a subject,
+  E1 for an event, U1 for anything else), the same alias wherever the UUID
+  appears, including map keys such as "child_id:subject_id" and the child
+  ids keying the per-day minute maps;
+- writes every list of objects as a table, {"cols": [...], "rows": [[...]]}
+  (an availability.Availability straight from its rows(), without entry dicts);
+- drops indentation and spaces.
+
+decode() maps aliases in the parsed LLM response back to UUIDs: values of
+id fields ("id", "*_id", "*_ids") that are exactly an alias, and map keys
+made only of aliases. Free text such as titles and rationale is left alone.
+
+    encoder = ContextEncoder()
+    context_json = encoder.encode(context, call="pack_week")
+    ...  # prompt with CONTEXT_FORMAT and context_json
+    result = encoder.decode(json.loads(content))
+
+encode() logs llm.context_tokens with the token count of the encoded
+context and records it in the llm_context_tokens{call=...} histogram.
+Counts are exact when tiktoken is installed and estimated from length
+otherwise.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from availability import Availability
+from logger import log_event
+from metrics import observe
+
+CONTEXT_FORMAT = (
+    'lists of objects are tables {"cols":[...],"rows":[[...],...]} with row values in column order; '
+    "ids are short aliases (C = child, S = subject, E = event, U = other), use them exactly as given"
+)
+
+TOKEN_BUCKETS = (500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+_UUID = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+# A map key made only of aliases, e.g. "C1" or "C1:S2"
+_ALIAS_KEY = re.compile(r"[CSEU][0-9]+(?::[CSEU][0-9]+)*")
+
+_CHILD_KEYS = {"child_id", "children", "child_ids"}
+_EVENT_LISTS = {"events", "existing_events", "missed_events"}
+# Maps whose keys are ids, by position within the key ("child_id:subject_id")
+_ID_KEYED = {
+    "standards_gaps": ("C",),
+    "recent_struggles": ("C", "S"),
+    "availability_off_days": ("C",),
+    "future_windows_off_days": ("C",),
+}
+# {date: {child_id: minutes}} maps
+_DAY_MAPS = {"current_minutes_by_day", "past_minutes_by_day", "later_minutes_by_day"}
+
+# tiktoken encoding for gpt-4o; False when tiktoken or its data files are unavailable
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            # Optional and slow to import, so loaded on the first count
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text for gpt-4o (tiktoken), or about 4 characters a token without it."""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _prefix(key: Optional[str], parent: Optional[str]) -> str:
+    if key in _CHILD_KEYS:
+        return "C"
+    if key == "subject_id":
+        return "S"
+    if key == "event_id" or (key == "id" and parent in _EVENT_LISTS):
+        return "E"
+    return "U"
+
+
+class ContextEncoder:
+    """Encodes one prompt's context and decodes the matching response."""
+
+    def __init__(self):
+        self.aliases: Dict[str, str] = {}
+        self.uuids: Dict[str, str] = {}
+        self._counts: Dict[str, int] = {}
+
+    def alias(self, value: str, prefix: str = "U") -> str:
+        key = value.lower()
+        alias = self.aliases.get(key)
+        if alias is None:
+            self._counts[prefix] = self._counts.get(prefix, 0) + 1
+            alias = f"{prefix}{self._counts[prefix]}"
+            self.aliases[key] = alias
+            self.uuids[alias] = value
+        return alias
+
+    def _text(self, value: str, key: Optional[str], parent: Optional[str]) -> str:
+        if len(value) < 36:
+            return value
+        prefix = _prefix(key, parent)
+        return _UUID.sub(lambda m: self.alias(m.group(), prefix), value)
+
+    def _map_key(self, value: str, prefixes: Tuple[str, ...]) -> str:
+        """A key of an id-keyed map; the nth UUID in it gets the nth prefix."""
+        if len(value) < 36:
+            return value
+        position = iter(range(len(prefixes)))
+        return _UUID.sub(
+            lambda m: self.alias(m.group(), prefixes[next(position, len(prefixes) - 1)]), value
+        )
+
+    def compact(self, value: Any, key: Optional[str] = None, parent: Optional[str] = None) -> Any:
+        """value with UUIDs aliased and lists of objects as tables (key: the value's field name)."""
+        if isinstance(value, str):
+            return self._text(value, key, parent)
+        if isinstance(value, dict):
+            prefixes = _ID_KEYED.get(key) or (("C",) if parent in _DAY_MAPS else None)
+            if prefixes:
+                return {self._map_key(str(k), prefixes): self.compact(v, k, key) for k, v in value.items()}
+            return {
+                self._text(str(k), key, parent): self.compact(v, k, key)
+                for k, v in value.items()
+            }
+        if isinstance(value, Availability):
+            cols = value.columns
+            return {
+                "cols": list(cols),
+                "rows": [[self.compact(v, col, key) for col, v in zip(cols, row)] for row in value.rows()],
+            }
+        if isinstance(value, (list, tuple)):
+            items = list(value)
+            if len(items) > 1 and all(isinstance(item, dict) for item in items):
+                return self._table(items, key)
+            return [self.compact(item, key, parent) for item in items]
+        return value
+
+    def _table(self, rows: List[Dict[str, Any]], key: Optional[str]) -> Dict[str, Any]:
+        cols: Dict[str, None] = {}
+        for row in rows:
+            cols.update(dict.fromkeys(row))
+        return {
+            "cols": list(cols),
+            "rows": [[self.compact(row.get(col), col, key) for col in cols] for row in rows],
+        }
+
+    def measure(self, context: Any) -> Tuple[str, int]:
+        """Compact JSON for context and its tokens, without recording them."""
+        encoded = json.dumps(
+            self.compact(context), ensure_ascii=False, separators=(",", ":"), default=str
+        )
+        return encoded, count_tokens(encoded)
+
+    def encode(self, context: Any, call: str = "llm", measured: Optional[Tuple[str, int]] = None) -> str:
+        """Compact JSON for context (or an earlier measure() of it); logs and records its tokens."""
+        encoded, tokens = measured or self.measure(context)
+        observe("llm_context_tokens", tokens, labels={"call": call}, buckets=TOKEN_BUCKETS)
+        log_event(
+            "llm.context_tokens",
+            call=call,
+            tokens=tokens,
+            chars=len(encoded),
+            aliases=len(self.uuids),
+            exact=bool(_encoding),
+        )
+        return encoded
+
+    def _restore_key(self, value: str) -> str:
+        if not _ALIAS_KEY.fullmatch(value):
+            return value
+        parts = value.split(":")
+        if not all(part in self.uuids for part in parts):
+            return value
+        return ":".join(self.uuids[part] for part in parts)
+
+    def _restore_id(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self.uuids.get(value, value)
+        if isinstance(value, list):
+            return [self._restore_id(item) for item in value]
+        return value
+
+    def decode(self, value: Any, key: Optional[str] = None) -> Any:
+        """value with aliases in id fields and id-keyed maps replaced by their UUIDs."""
+        if not self.uuids:
+            return value
+        if key is not None and (key == "id" or key.endswith("_id") or key.endswith("_ids")):
+            return self._restore_id(value)
+        if isinstance(value, dict):
+            return {
+                (self._restore_key(k) if isinstance(k, str) else k): self.decode(v, k)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [self.decode(item, key) for item in value]
+        return value
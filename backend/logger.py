@@ -1,6 +1,7 @@
 import os
 import json
 import time
+from typing import Any, Dict, Optional
 
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "info").lower()
 _LEVELS = ["debug", "info", "warn", "error"]
@@ -13,8 +14,11 @@ def _should_log(level: str) -> bool:
         return True
 
 
-def log_event(event: str, **fields):
-    level = fields.pop("level", "info").lower()
+def log_event(event: str, extra: Optional[Dict[str, Any]] = None, **fields):
+    # Many call sites pass their fields as a dict instead of keywords
+    if extra:
+        fields = {**extra, **fields}
+    level = str(fields.pop("level", "info")).lower()
     if not _should_log(level):
         return
     payload = {
@@ -23,4 +27,4 @@ def log_event(event: str, **fields):
         "level": level,
         **fields,
     }
-    print(json.dumps(payload, ensure_ascii=False))
+    print(json.dumps(payload, ensure_ascii=False, default=str))
@@ -1,8 +1,10 @@
 """
 FastAPI application with LLM routes
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
 import sys
 from pathlib import Path
@@ -17,31 +19,84 @@ backend_dir = Path(__file__).parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
-from routers.llm_routes import router as llm_router
-from routers.external_routes import router as external_router
-from routers.google_calendar import router as google_calendar_router
-from routers.onboarding_routes import router as onboarding_router
-from routers.state_standards_routes import router as state_standards_router
-from routers.year_routes import router as year_router
-from routers.blackout_routes import router as blackout_router
-from routers.ai_routes import router as ai_router
-from routers.attendance_routes import router as attendance_router
-from routers.analytics_routes import router as analytics_router
-from routers.records_routes import router as records_router
-from routers.planner_routes import router as planner_router, events_router
-from routers.extension_routes import router as extension_router
-from routers.invite_routes import router as invite_router
-from routers.dashboard_routes import router as dashboard_router
-from routers.integrations_routes import router as integrations_router
-from routers.family_routes import router as family_router
-from routers.tutor_routes import router as tutor_router
-from routers.child_routes import router as child_router
-from routers.standards_routes import router as standards_router
+from startup import PRELOAD_DEPENDENCIES, import_report, mark_ready, preload, timed_import
+from metrics import monitor_event_loop_lag, publish_metrics_forever, set_gauge
+from request_timing import TimingMiddleware
+from profiling import ProfilingMiddleware
+from compression import CompressionMiddleware
+from state_backend import get_state_backend
+from supabase_async import shutdown_executor
+from logger import log_event
+from fast_json import FastJSONResponse
+
+# Included in this order; each module is imported through timed_import()
+# so startup reports what every router cost.
+ROUTERS = [
+    ("routers.llm_routes", "router"),
+    ("routers.external_routes", "router"),
+    ("routers.google_calendar", "router"),
+    ("routers.onboarding_routes", "router"),
+    ("routers.state_standards_routes", "router"),
+    ("routers.year_routes", "router"),
+    ("routers.blackout_routes", "router"),
+    ("routers.ai_routes", "router"),
+    ("routers.attendance_routes", "router"),
+    ("routers.analytics_routes", "router"),
+    ("routers.records_routes", "router"),
+    ("routers.planner_routes", "router"),
+    ("routers.planner_routes", "events_router"),
+    ("routers.extension_routes", "router"),
+    ("routers.invite_routes", "router"),
+    ("routers.dashboard_routes", "router"),
+    ("routers.integrations_routes", "router"),
+    ("routers.family_routes", "router"),
+    ("routers.tutor_routes", "router"),
+    ("routers.child_routes", "router"),
+    ("routers.standards_routes", "router"),
+    ("routers.metrics_routes", "router"),
+    ("routers.profile_routes", "router"),
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if PRELOAD_DEPENDENCIES:
+        # Pay for openai/supabase/pypdf imports and client setup before serving
+        preload()
+    report = import_report()
+    for module, ms in report["modules"].items():
+        set_gauge("startup_import_ms", ms, {"module": module})
+    set_gauge("startup_app_import_ms", report["app_ms"])
+    log_event(
+        "startup.imports",
+        app_ms=report["app_ms"],
+        routers_ms=report["routers_ms"],
+        slowest=dict(list(report["modules"].items())[:5]),
+        preloaded=report["preloaded"] or None,
+    )
+    tasks = [
+        asyncio.create_task(
+            monitor_event_loop_lag(float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.5")))
+        )
+    ]
+    if get_state_backend().shared:
+        # Workers share cache/rate-limit state; publish metrics for the merged view
+        tasks.append(asyncio.create_task(publish_metrics_forever()))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        shutdown_executor()
+
 
 app = FastAPI(
     title="Learnadoodle LLM API",
     description="LLM-powered syllabus parsing and schedule planning",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson-encoded; see fast_json.py for the trusted_json() fast path
+    default_response_class=FastJSONResponse,
 )
 
 # CORS configuration
@@ -75,49 +130,20 @@ app.add_middleware(
     max_age=600,
 )
 
-# Add request logging middleware for debugging (after CORS)
-@app.middleware("http")
-async def log_requests(request, call_next):
-    if request.method == "OPTIONS":
-        origin = request.headers.get('origin', 'none')
-        print(f"[CORS DEBUG] OPTIONS request to {request.url.path}")
-        print(f"[CORS DEBUG] Origin: {origin}")
-        print(f"[CORS DEBUG] Allowed origins: {allowed_origins}")
-        print(f"[CORS DEBUG] Access-Control-Request-Method: {request.headers.get('access-control-request-method', 'none')}")
-    try:
-        response = await call_next(request)
-        if request.method == "OPTIONS":
-            print(f"[CORS DEBUG] OPTIONS response status: {response.status_code}")
-            if response.status_code == 400:
-                print(f"[CORS DEBUG] 400 Error - checking if origin is allowed")
-        return response
-    except Exception as e:
-        if request.method == "OPTIONS":
-            print(f"[CORS DEBUG] Exception handling OPTIONS: {e}")
-        raise
+# gzip/brotli for text and JSON bodies above COMPRESS_MIN_BYTES
+app.add_middleware(CompressionMiddleware)
+
+# Opt-in sampling profiler (PROFILE_SECRET / PROFILE_SAMPLE_PERCENT)
+app.add_middleware(ProfilingMiddleware)
+
+# Per-route latency, status and size into metrics; Server-Timing; slow-request log.
+# Added last so it wraps CORS too.
+app.add_middleware(TimingMiddleware)
 
 # Include routers
-app.include_router(llm_router)
-app.include_router(external_router)
-app.include_router(google_calendar_router)
-app.include_router(onboarding_router)
-app.include_router(state_standards_router)
-app.include_router(year_router)
-app.include_router(blackout_router)
-app.include_router(ai_router)
-app.include_router(attendance_router)
-app.include_router(analytics_router)
-app.include_router(records_router)
-app.include_router(planner_router)
-app.include_router(events_router)
-app.include_router(extension_router)
-app.include_router(invite_router)
-app.include_router(dashboard_router)
-app.include_router(integrations_router)
-app.include_router(family_router)
-app.include_router(tutor_router)
-app.include_router(child_router)
-app.include_router(standards_router)
+for module_name, attr in ROUTERS:
+    app.include_router(getattr(timed_import(module_name), attr))
+mark_ready()
 
 @app.get("/health")
 async def health():
@@ -1,26 +1,291 @@
-import json
+"""
+In-process metrics: counters, gauges and latency histograms, optionally labeled.
+
+    increment_counter("ai_pack_week")
+    increment_counter("http_requests", labels={"route": "/api/ai/pack_week", "status": "200"})
+    set_gauge("supabase_pool_in_use", 3)
+    observe("supabase_http_ms", elapsed_ms)
+
+get_metrics() returns a flat dict (labeled series as `name{k="v"}`; histograms as
+`_count`, `_sum`, `_p50`, `_p95`, `_p99`); render_prometheus() returns the text
+exposition format served at /metrics. Keep label values low-cardinality
+(route templates, status codes), never ids.
+"""
+import math
+import os
+import re
 import threading
-from typing import Dict
+import time
+from bisect import bisect_left
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from state_backend import get_state_backend
+
+Labels = Optional[Mapping[str, object]]
+
+# Upper bounds in milliseconds
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (
+    1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000,
+)
+PERCENTILES = (50, 95, 99)
 
 _metrics_lock = threading.Lock()
-_metrics: Dict[str, float] = {}
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+# series -> bucket counts (last one is +Inf), sum, count
+_histograms: Dict[str, "_Histogram"] = {}
+
+# With a shared state backend each worker publishes its own snapshot and
+# get_metrics() merges them: counters and histograms are summed, gauges take the max.
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "1"))
+_METRICS_NAMESPACE = "metrics"
+_WORKER_KEY = f"pid:{os.getpid()}"
+# Snapshots of workers that stopped publishing still count, but their gauges don't
+_GAUGE_STALE_SECONDS = max(10.0, METRICS_FLUSH_SECONDS * 5)
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_:]")
+_LABEL_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # First bucket whose upper bound is >= value; past the last one is +Inf
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> dict:
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "_Histogram":
+        hist = cls(tuple(data["buckets"]))
+        hist.counts = list(data["counts"])
+        hist.sum = data["sum"]
+        hist.count = data["count"]
+        return hist
 
+    def merge(self, other: "_Histogram"):
+        if other.buckets != self.buckets:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
 
-def increment_counter(name: str, value: float = 1.0):
+    def percentile(self, pct: float) -> Optional[float]:
+        """Estimate from bucket counts (linear within the bucket)."""
+        if not self.count:
+            return None
+        rank = self.count * pct / 100.0
+        seen = 0
+        lower = 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else lower
+            if n and seen + n >= rank:
+                return round(lower + (upper - lower) * ((rank - seen) / n), 3)
+            seen += n
+            lower = upper
+        return lower
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    inner = ",".join(
+        f'{_LABEL_RE.sub("_", str(k))}="{_escape(v)}"' for k, v in sorted(labels.items())
+    )
+    return f"{name}{{{inner}}}"
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _split(series: str) -> Tuple[str, str]:
+    """('name', '{labels}' or '')."""
+    i = series.find("{")
+    return (series, "") if i < 0 else (series[:i], series[i:])
+
+
+def increment_counter(name: str, value: float = 1.0, labels: Labels = None):
+    key = _series(name, labels)
     with _metrics_lock:
-        _metrics[name] = _metrics.get(name, 0.0) + value
+        _counters[key] = _counters.get(key, 0.0) + value
 
 
-def set_gauge(name: str, value: float):
+def set_gauge(name: str, value: float, labels: Labels = None):
+    key = _series(name, labels)
     with _metrics_lock:
-        _metrics[name] = value
+        _gauges[key] = value
 
 
-def get_metrics() -> Dict[str, float]:
+def observe(name: str, value: float, labels: Labels = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+    """Record one sample (milliseconds by convention) in a histogram."""
+    key = _series(name, labels)
+    with _metrics_lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = _Histogram(buckets)
+        hist.observe(value)
+
+
+def _local_snapshot() -> dict:
     with _metrics_lock:
-        return dict(_metrics)
+        return {
+            "ts": time.time(),
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": {k: h.to_dict() for k, h in _histograms.items()},
+        }
+
+
+def publish_metrics():
+    """Write this worker's snapshot to the shared backend (no-op in memory mode)."""
+    backend = get_state_backend()
+    if backend.shared:
+        backend.set(_METRICS_NAMESPACE, _WORKER_KEY, _local_snapshot(), ttl_seconds=86400)
+
+
+def _collect() -> Tuple[Dict[str, float], Dict[str, float], Dict[str, _Histogram]]:
+    """Counters, gauges and histograms for this process, or merged across workers."""
+    backend = get_state_backend()
+    if not backend.shared:
+        with _metrics_lock:
+            histograms = {k: _Histogram.from_dict(h.to_dict()) for k, h in _histograms.items()}
+            return dict(_counters), dict(_gauges), histograms
+
+    publish_metrics()
+    now = time.time()
+    counters: Dict[str, float] = {}
+    gauges: Dict[str, float] = {}
+    histograms: Dict[str, _Histogram] = {}
+    for snapshot in backend.items(_METRICS_NAMESPACE).values():
+        for name, value in snapshot["counters"].items():
+            counters[name] = counters.get(name, 0.0) + value
+        if now - snapshot["ts"] <= _GAUGE_STALE_SECONDS:
+            for name, value in snapshot["gauges"].items():
+                gauges[name] = max(gauges.get(name, value), value)
+        for name, data in snapshot.get("histograms", {}).items():
+            hist = _Histogram.from_dict(data)
+            if name in histograms:
+                histograms[name].merge(hist)
+            else:
+                histograms[name] = hist
+    return counters, gauges, histograms
+
+
+def get_metrics() -> Dict[str, float]:
+    counters, gauges, histograms = _collect()
+    merged: Dict[str, float] = {**counters, **gauges}
+    for series, hist in histograms.items():
+        name, labels = _split(series)
+        merged[f"{name}_count{labels}"] = hist.count
+        merged[f"{name}_sum{labels}"] = round(hist.sum, 3)
+        for pct in PERCENTILES:
+            merged[f"{name}_p{pct}{labels}"] = hist.percentile(pct)
+    return merged
+
+
+def _prom_name(name: str) -> str:
+    name = _NAME_RE.sub("_", name)
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def _prom_value(value: float) -> str:
+    if value is None:
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _with_label(labels: str, extra: str) -> str:
+    if not labels:
+        return "{" + extra + "}"
+    return labels[:-1] + "," + extra + "}"
+
+
+def render_prometheus() -> str:
+    """Text exposition format (version 0.0.4)."""
+    counters, gauges, histograms = _collect()
+    lines: List[str] = []
+
+    def _group(values: Dict[str, float]) -> Dict[str, List[Tuple[str, float]]]:
+        grouped: Dict[str, List[Tuple[str, float]]] = {}
+        for series, value in sorted(values.items()):
+            name, labels = _split(series)
+            grouped.setdefault(_prom_name(name), []).append((labels, value))
+        return grouped
+
+    for kind, values in (("counter", counters), ("gauge", gauges)):
+        for name, samples in _group(values).items():
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{labels} {_prom_value(value)}" for labels, value in samples)
+
+    grouped: Dict[str, List[Tuple[str, _Histogram]]] = {}
+    for series, hist in sorted(histograms.items()):
+        name, labels = _split(series)
+        grouped.setdefault(_prom_name(name), []).append((labels, hist))
+    for name, samples in grouped.items():
+        lines.append(f"# TYPE {name} histogram")
+        for labels, hist in samples:
+            cumulative = 0
+            for bound, n in zip(list(hist.buckets) + [math.inf], hist.counts):
+                cumulative += n
+                le = 'le="%s"' % _prom_value(bound)
+                lines.append(f"{name}_bucket{_with_label(labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{labels} {_prom_value(hist.sum)}")
+            lines.append(f"{name}_count{labels} {hist.count}")
+    return "\n".join(lines) + "\n"
 
 
 def reset_metrics():
     with _metrics_lock:
-        _metrics.clear()
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+    backend = get_state_backend()
+    if backend.shared:
+        backend.clear(_METRICS_NAMESPACE)
+
+
+async def publish_metrics_forever(interval: float = METRICS_FLUSH_SECONDS):
+    """Publish this worker's snapshot every `interval` seconds (shared backend only)."""
+    import asyncio
+
+    from supabase_async import run_blocking
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_blocking(publish_metrics)
+        except Exception as e:
+            print(f"[METRICS] publish failed: {e}")
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    """Sample event-loop lag forever: how late a sleep(interval) wakes up.
+
+    Publishes event_loop_lag_ms (last sample), event_loop_lag_max_ms
+    (worst sample since the last reset) and the event_loop_lag_sample_ms histogram.
+    Blocking calls on the loop show up here directly.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag_ms = max(0.0, (loop.time() - started - interval) * 1000.0)
+        with _metrics_lock:
+            _gauges["event_loop_lag_ms"] = lag_ms
+            _gauges["event_loop_lag_max_ms"] = max(_gauges.get("event_loop_lag_max_ms", 0.0), lag_ms)
+        observe("event_loop_lag_sample_ms", lag_ms)
@@ -0,0 +1,169 @@
+"""
+On-demand sampling profiler for live requests.
+
+A request is profiled when it carries `X-Profile-Secret: <PROFILE_SECRET>` (or
+`?__profile=<PROFILE_SECRET>`), or at random for PROFILE_SAMPLE_PERCENT of
+requests. While it runs, a background thread samples the event-loop thread's
+Python stack every PROFILE_INTERVAL_MS and counts identical stacks. The result
+is kept in folded-stack format ("outer;inner;leaf count" per line), which
+flamegraph.pl and speedscope read directly.
+
+Profiles go into a ring of the last PROFILE_RING_SIZE in the state backend, so
+every worker sees them. Download them from /api/admin/profiles. Explicitly
+requested profiles return their id in `X-Profile-Id`.
+
+The sampler sees everything running on the loop thread, so concurrent
+requests share the profile. That is fine for finding hot paths, but it is
+not a per-request attribution.
+"""
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from request_timing import route_template
+from state_backend import get_state_backend, run_state_io
+
+PROFILE_SECRET = os.getenv("PROFILE_SECRET")
+PROFILE_SAMPLE_PERCENT = float(os.getenv("PROFILE_SAMPLE_PERCENT", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", "20"))
+PROFILE_TTL_SECONDS = float(os.getenv("PROFILE_TTL_SECONDS", "86400"))
+# Profiles running at once; more requests in the meantime are simply not profiled
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "2"))
+
+_NAMESPACE = "profiles"
+# Downloading profiles (with the secret header) must not profile itself
+_ADMIN_PREFIX = "/api/admin/profiles"
+_active = threading.BoundedSemaphore(PROFILE_MAX_CONCURRENT)
+
+
+class StackSampler:
+    """Samples one thread's stack on a timer and counts folded stacks."""
+
+    def __init__(self, thread_id: int, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000.0
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+def folded(samples: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+def check_secret(supplied: Optional[str]) -> bool:
+    return bool(PROFILE_SECRET) and supplied is not None and hmac.compare_digest(supplied, PROFILE_SECRET)
+
+
+def _requested(scope: Scope) -> bool:
+    if not PROFILE_SECRET:
+        return False
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile-secret":
+            return check_secret(value.decode("latin-1"))
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return any(check_secret(v) for v in query.get("__profile", []))
+
+
+def _store(record: Dict[str, Any]):
+    backend = get_state_backend()
+    backend.set(_NAMESPACE, record["id"], record, ttl_seconds=PROFILE_TTL_SECONDS)
+    profiles = backend.items(_NAMESPACE)
+    if len(profiles) > PROFILE_RING_SIZE:
+        oldest = sorted(profiles.values(), key=lambda p: p["ts"])[: len(profiles) - PROFILE_RING_SIZE]
+        for profile in oldest:
+            backend.delete(_NAMESPACE, profile["id"])
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Stored profiles, newest first, without their stacks."""
+    profiles = get_state_backend().items(_NAMESPACE).values()
+    return [
+        {k: v for k, v in p.items() if k != "folded"}
+        for p in sorted(profiles, key=lambda p: p["ts"], reverse=True)
+    ]
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    return get_state_backend().get(_NAMESPACE, profile_id)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope.get("path", "").startswith(_ADMIN_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        requested = _requested(scope)
+        sampled = not requested and PROFILE_SAMPLE_PERCENT > 0 and random.random() * 100 < PROFILE_SAMPLE_PERCENT
+        if not (requested or sampled) or not _active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status = {"code": 500}
+
+        async def _send(message: Message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if requested:
+                    MutableHeaders(scope=message)["X-Profile-Id"] = profile_id
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident())
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            samples = sampler.stop()
+            _active.release()
+            try:
+                # The shared backend may wait on disk; keep that off the event loop
+                await run_state_io(get_state_backend(), _store, {
+                    "id": profile_id,
+                    "ts": time.time(),
+                    "trigger": "request" if requested else "sample",
+                    "method": scope.get("method"),
+                    "route": route_template(scope),
+                    "path": scope.get("path"),
+                    "status": status["code"],
+                    "duration_ms": round((time.perf_counter() - started) * 1000.0, 1),
+                    "interval_ms": PROFILE_INTERVAL_MS,
+                    "samples": sum(samples.values()),
+                    "folded": folded(samples),
+                })
+            except Exception as e:
+                print(f"[PROFILE] Failed to store profile {profile_id}: {e}")
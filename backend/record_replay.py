@@ -0,0 +1,425 @@
+"""
+Record Supabase and OpenAI traffic once, replay it offline.
+
+Recording wraps the real clients: every execute() (table or RPC), storage
+and auth call, and every AsyncOpenAI chat.completions.create() is stored in
+a Cassette. Each entry keeps the builder chain that produced it, the
+response (or the APIError), how long it took, and when it started within
+its flow. A flow is one named request, see Cassette.flow().
+
+Replaying serves the same responses without a network and sleeps for the
+recorded duration times `scale`. Use scale=1.0 for the original timings, 0
+for none, or anything in between. Supabase waits happen on the supabase-io
+pool like real round trips; OpenAI waits are asyncio sleeps.
+
+A call is matched on its exact chain first. If that fails (ids or
+timestamps generated per request), it falls back to the n-th recorded call
+with the same table/RPC and the same builder methods. Each replay session
+keeps its own counters, so a flow can run many times, including
+concurrently. A call with no recording raises ReplayMiss.
+
+    cassette = Cassette()
+    set_admin_client(RecordingSupabase(get_admin_client(), cassette))
+    llm.client = RecordingOpenAI(llm.get_client(), cassette)
+    with cassette.flow("pack_week"):
+        ...  # drive the request
+    cassette.save("flows.json")
+
+    cassette = Cassette.load("flows.json")
+    set_admin_client(ReplaySupabase(cassette, scale=1.0))
+    llm.client = ReplayOpenAI(cassette, scale=1.0)
+
+benchmarks/replay_flows.py wraps this for ai_routes / llm_routes requests.
+"""
+import asyncio
+import base64
+import contextlib
+import hashlib
+import json
+import threading
+import time
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from postgrest.base_request_builder import APIResponse, SingleAPIResponse
+from postgrest.exceptions import APIError
+
+CASSETTE_VERSION = 1
+
+_WRITE_METHODS = {"insert": "POST", "upsert": "POST", "update": "PATCH", "delete": "DELETE"}
+
+
+class ReplayMiss(LookupError):
+    """A replayed call has no recorded counterpart."""
+
+
+class ReplayedError(RuntimeError):
+    """Re-raised in place of a non-PostgREST error seen while recording."""
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return {"__b64__": base64.b64encode(bytes(value)).decode("ascii")}
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_jsonable(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _restore(value: Any, namespace: bool = False) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {"__b64__"}:
+            return base64.b64decode(value["__b64__"])
+        restored = {k: _restore(v, namespace) for k, v in value.items()}
+        return SimpleNamespace(**restored) if namespace else restored
+    if isinstance(value, list):
+        return [_restore(v, namespace) for v in value]
+    return value
+
+
+def _key(kind: str, name: str, chain: List[Tuple]) -> Tuple[str, str]:
+    """Exact key (whole chain with arguments) and shape key (method names only)."""
+    exact = json.dumps([kind, name, _jsonable(chain)], sort_keys=True, default=str)
+    shape = json.dumps([kind, name, [step[0] for step in chain]])
+    return hashlib.sha1(exact.encode()).hexdigest(), shape
+
+
+class Cassette:
+    """Recorded calls, grouped into named flows; JSON on disk."""
+
+    def __init__(self, entries: Optional[List[Dict[str, Any]]] = None, meta: Optional[Dict[str, Any]] = None):
+        self.entries: List[Dict[str, Any]] = entries or []
+        self.meta: Dict[str, Any] = meta or {}
+        self._lock = threading.Lock()
+        self._flow: ContextVar[Optional[Tuple[str, float]]] = ContextVar("cassette_flow", default=None)
+        self._session: ContextVar[Optional[Dict[str, int]]] = ContextVar("cassette_session", default=None)
+        self._default_session: Dict[str, int] = {}
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_shape: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self.entries:
+            self._index(entry)
+
+    # Recording
+    @contextlib.contextmanager
+    def flow(self, name: str) -> Iterator[None]:
+        """Tag calls made inside the block (including on the I/O pool) with a flow name."""
+        token = self._flow.set((name, time.perf_counter()))
+        try:
+            yield
+        finally:
+            self._flow.reset(token)
+
+    def record(self, kind: str, name: str, chain: List[Tuple], started: float, **fields: Any):
+        key, shape = _key(kind, name, chain)
+        flow = self._flow.get()
+        entry = {
+            "flow": flow[0] if flow else None,
+            "offset_ms": round((started - flow[1]) * 1000.0, 3) if flow else None,
+            "ms": round((time.perf_counter() - started) * 1000.0, 3),
+            "kind": kind,
+            "name": name,
+            "chain": _jsonable(chain),
+            "key": key,
+            "shape": shape,
+            **fields,
+        }
+        with self._lock:
+            self.entries.append(entry)
+            self._index(entry)
+
+    def _index(self, entry: Dict[str, Any]):
+        self._by_key.setdefault(entry["key"], []).append(entry)
+        self._by_shape.setdefault(entry["shape"], []).append(entry)
+
+    # Replay
+    @contextlib.contextmanager
+    def session(self) -> Iterator[None]:
+        """Replay the recording from the start for calls made inside the block."""
+        token = self._session.set({})
+        try:
+            yield
+        finally:
+            self._session.reset(token)
+
+    def take(self, kind: str, name: str, chain: List[Tuple]) -> Dict[str, Any]:
+        key, shape = _key(kind, name, chain)
+        counters = self._session.get()
+        if counters is None:
+            counters = self._default_session
+        with self._lock:
+            for index_key, candidates in ((key, self._by_key.get(key)), (shape, self._by_shape.get(shape))):
+                if candidates:
+                    n = counters.get(index_key, 0)
+                    counters[index_key] = n + 1
+                    return candidates[n % len(candidates)]
+        raise ReplayMiss(f"No recorded {kind} call for {name} with {[step[0] for step in chain]}")
+
+    def flows(self) -> Dict[str, List[Dict[str, Any]]]:
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self.entries:
+            grouped.setdefault(entry.get("flow") or "", []).append(entry)
+        return grouped
+
+    # Storage
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"version": CASSETTE_VERSION, "meta": self.meta, "entries": self.entries}, fh, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with open(path, "r", encoding="utf-8") as fh:
+            payload = json.load(fh)
+        if payload.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {payload.get('version')}")
+        return cls(payload.get("entries"), payload.get("meta"))
+
+
+def _response_fields(result: Any) -> Dict[str, Any]:
+    if result is None:
+        return {"response": None}
+    return {
+        "response": "single" if isinstance(result, SingleAPIResponse) else "list",
+        "data": _jsonable(result.data),
+        "count": result.count,
+    }
+
+
+class _RecordingQuery:
+    """Forwards a real PostgREST builder chain and records what execute() returned."""
+
+    def __init__(self, builder: Any, cassette: Cassette, kind: str, name: str, chain: List[Tuple]):
+        self._builder = builder
+        self._cassette = cassette
+        self._kind = kind
+        self._name = name
+        self._chain = chain
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._builder, attr)
+        if callable(value):
+            def _chain(*args, **kwargs):
+                return self._next(value(*args, **kwargs), (attr, args, kwargs))
+            return _chain
+        return self._next(value, (attr,))
+
+    def _next(self, value: Any, step: Tuple) -> Any:
+        if value is not None and hasattr(value, "execute"):
+            return _RecordingQuery(value, self._cassette, self._kind, self._name, self._chain + [step])
+        return value
+
+    def execute(self) -> Any:
+        started = time.perf_counter()
+        try:
+            result = self._builder.execute()
+        except APIError as e:
+            self._cassette.record(self._kind, self._name, self._chain, started,
+                                  error={"message": e.message, "code": e.code, "details": e.details, "hint": e.hint})
+            raise
+        self._cassette.record(self._kind, self._name, self._chain, started, **_response_fields(result))
+        return result
+
+
+class _RecordingCalls:
+    """Records plain method calls (storage buckets, auth)."""
+
+    def __init__(self, target: Any, cassette: Cassette, kind: str, name: str):
+        self._target = target
+        self._cassette = cassette
+        self._kind = kind
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._target, attr)
+        if not callable(value):
+            return value
+
+        def _call(*args, **kwargs):
+            started = time.perf_counter()
+            chain = [(attr, args, kwargs)]
+            try:
+                result = value(*args, **kwargs)
+            except Exception as e:
+                self._cassette.record(self._kind, f"{self._name}.{attr}", chain, started,
+                                      error={"message": str(e), "type": type(e).__name__})
+                raise
+            self._cassette.record(self._kind, f"{self._name}.{attr}", chain, started, data=_jsonable(result))
+            return result
+        return _call
+
+
+class RecordingSupabase:
+    """Wraps the real admin client; every round trip lands in the cassette."""
+
+    def __init__(self, client: Any, cassette: Cassette):
+        self._client = client
+        self.cassette = cassette
+
+    def table(self, table_name: str) -> _RecordingQuery:
+        return _RecordingQuery(self._client.table(table_name), self.cassette, "table", table_name, [])
+
+    def from_(self, table_name: str) -> _RecordingQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, **kwargs) -> _RecordingQuery:
+        return _RecordingQuery(self._client.rpc(fn, params or {}, **kwargs), self.cassette, "rpc", fn,
+                               [("rpc", (params or {},), kwargs)])
+
+    @property
+    def storage(self) -> SimpleNamespace:
+        return SimpleNamespace(from_=lambda bucket: _RecordingCalls(
+            self._client.storage.from_(bucket), self.cassette, "storage", bucket))
+
+    @property
+    def auth(self) -> _RecordingCalls:
+        return _RecordingCalls(self._client.auth, self.cassette, "auth", "auth")
+
+
+class _ReplayQuery:
+    """Collects a builder chain like postgrest (mutating, returns self); execute() plays it back."""
+
+    def __init__(self, player: "ReplaySupabase", kind: str, name: str, chain: List[Tuple]):
+        self._player = player
+        self._kind = kind
+        self._name = name
+        self._chain = chain
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        if attr == "not_":
+            self._chain.append((attr,))
+            return self
+
+        def _chain(*args, **kwargs):
+            self._chain.append((attr, args, kwargs))
+            return self
+        return _chain
+
+    @property
+    def http_method(self) -> str:
+        if self._kind == "rpc":
+            return "POST"
+        return next((_WRITE_METHODS[s[0]] for s in self._chain if s[0] in _WRITE_METHODS), "GET")
+
+    def execute(self) -> Any:
+        entry = self._player.cassette.take(self._kind, self._name, self._chain)
+        self._player.wait(entry)
+        if entry.get("error"):
+            raise APIError(entry["error"])
+        if entry.get("response") is None:
+            return None
+        data = _restore(entry.get("data"))
+        if entry["response"] == "single":
+            return SingleAPIResponse(data=data, count=entry.get("count"))
+        return APIResponse(data=data, count=entry.get("count"))
+
+
+class _ReplayCalls:
+    def __init__(self, player: "ReplaySupabase", kind: str, name: str, namespace: bool = False):
+        self._player = player
+        self._kind = kind
+        self._name = name
+        self._namespace = namespace
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+
+        def _call(*args, **kwargs):
+            entry = self._player.cassette.take(self._kind, f"{self._name}.{attr}", [(attr, args, kwargs)])
+            self._player.wait(entry)
+            if entry.get("error"):
+                raise ReplayedError(f"{entry['error'].get('type')}: {entry['error'].get('message')}")
+            return _restore(entry.get("data"), self._namespace)
+        return _call
+
+
+class ReplaySupabase:
+    """Serves recorded responses in place of the admin client (sync, like the real one)."""
+
+    def __init__(self, cassette: Cassette, scale: float = 1.0):
+        self.cassette = cassette
+        self.scale = scale
+
+    def wait(self, entry: Dict[str, Any]):
+        if self.scale > 0 and entry.get("ms"):
+            time.sleep(entry["ms"] * self.scale / 1000.0)
+
+    def table(self, table_name: str) -> _ReplayQuery:
+        return _ReplayQuery(self, "table", table_name, [])
+
+    def from_(self, table_name: str) -> _ReplayQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, **kwargs) -> _ReplayQuery:
+        return _ReplayQuery(self, "rpc", fn, [("rpc", (params or {},), kwargs)])
+
+    @property
+    def storage(self) -> SimpleNamespace:
+        return SimpleNamespace(from_=lambda bucket: _ReplayCalls(self, "storage", bucket))
+
+    @property
+    def auth(self) -> _ReplayCalls:
+        return _ReplayCalls(self, "auth", "auth", namespace=True)
+
+
+def _completion_chain(kwargs: Dict[str, Any]) -> List[Tuple]:
+    return [("create", (), kwargs)]
+
+
+class _RecordingCompletions:
+    def __init__(self, completions: Any, cassette: Cassette):
+        self._completions = completions
+        self._cassette = cassette
+
+    async def create(self, **kwargs) -> Any:
+        started = time.perf_counter()
+        model = str(kwargs.get("model"))
+        try:
+            response = await self._completions.create(**kwargs)
+        except Exception as e:
+            self._cassette.record("openai", model, _completion_chain(kwargs), started,
+                                  error={"message": str(e), "type": type(e).__name__})
+            raise
+        self._cassette.record("openai", model, _completion_chain(kwargs), started, data=_jsonable(response))
+        return response
+
+
+class RecordingOpenAI:
+    """Wraps an AsyncOpenAI client; chat.completions.create() calls land in the cassette."""
+
+    def __init__(self, client: Any, cassette: Cassette):
+        self._client = client
+        self.chat = SimpleNamespace(completions=_RecordingCompletions(client.chat.completions, cassette))
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._client, attr)
+
+
+class _ReplayCompletions:
+    def __init__(self, cassette: Cassette, scale: float):
+        self._cassette = cassette
+        self._scale = scale
+
+    async def create(self, **kwargs) -> Any:
+        from openai.types.chat import ChatCompletion
+
+        entry = self._cassette.take("openai", str(kwargs.get("model")), _completion_chain(kwargs))
+        if self._scale > 0 and entry.get("ms"):
+            await asyncio.sleep(entry["ms"] * self._scale / 1000.0)
+        if entry.get("error"):
+            raise ReplayedError(f"{entry['error'].get('type')}: {entry['error'].get('message')}")
+        return ChatCompletion.model_validate(entry["data"])
+
+
+class ReplayOpenAI:
+    """Stands in for AsyncOpenAI with recorded completions."""
+
+    def __init__(self, cassette: Cassette, scale: float = 1.0):
+        self.chat = SimpleNamespace(completions=_ReplayCompletions(cassette, scale))
@@ -0,0 +1,88 @@
+"""
+Pure ASGI middleware that times every HTTP request.
+
+Records per-route latency (histogram http_request_ms), request counts by
+status, response bytes and Supabase round trips per request (db_trace.py)
+into metrics.py, adds Server-Timing / X-DB-* headers (database totals as of
+the first response byte), and logs requests slower than SLOW_REQUEST_MS with
+their database totals. Unlike @app.middleware("http") it does not wrap the
+response in a BaseHTTPMiddleware stream, so streaming responses pass
+straight through.
+"""
+import os
+import time
+from typing import Any, Dict
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from db_trace import DbTrace, current_trace, end_trace, start_trace
+from logger import log_event
+from metrics import increment_counter, observe
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+# Supabase round trips per request
+DB_CALL_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template (e.g. /api/events/{event_id}/complete); never the raw path."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class TimingMiddleware:
+    def __init__(self, app: ASGIApp, slow_request_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state: Dict[str, Any] = {"status": 500, "bytes": 0}
+        token = start_trace()
+        trace = current_trace()
+
+        async def _send(message: Message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", f"app;dur={elapsed_ms:.1f}")
+                headers.append("Server-Timing", trace.server_timing())
+                for name, value in trace.headers().items():
+                    headers[name] = value
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            end_trace(token)
+            self._record(scope, state, (time.perf_counter() - started) * 1000.0, trace)
+
+    def _record(self, scope: Scope, state: Dict[str, Any], elapsed_ms: float, trace: DbTrace):
+        route = route_template(scope)
+        method = scope.get("method", "")
+        status = state["status"]
+        observe("http_request_ms", elapsed_ms, labels={"route": route, "method": method})
+        increment_counter("http_requests", labels={"route": route, "method": method, "status": status})
+        increment_counter("http_response_bytes", state["bytes"], labels={"route": route})
+        observe("http_request_db_calls", trace.count, labels={"route": route}, buckets=DB_CALL_BUCKETS)
+        if elapsed_ms >= self.slow_request_ms:
+            log_event(
+                "http.slow_request",
+                level="warn",
+                method=method,
+                route=route,
+                path=scope.get("path"),
+                status=status,
+                duration_ms=round(elapsed_ms, 1),
+                bytes=state["bytes"],
+                **trace.summary(),
+            )
@@ -21,6 +21,7 @@ from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user, child_belongs_to_family
 from logger import log_event
 from metrics import increment_counter
+from cache import invalidate_async
 
 try:
     from llm import llm_pack_week, llm_catch_up, llm_event_tags, llm_summarize_progress, llm_generate_syllabus, llm_inspire_learning
@@ -37,22 +38,23 @@ except ImportError:
     llm_inspire_learning = getattr(llm_module, 'llm_inspire_learning', None)
 
 try:
-    from routers.util import load_planning_context
+    from routers.util import load_planning_context, planning_snapshot_is_current
 except ImportError:
     import importlib.util
     spec = importlib.util.spec_from_file_location("util", backend_dir / "routers" / "util.py")
     util_module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(util_module)
     load_planning_context = util_module.load_planning_context
+    planning_snapshot_is_current = util_module.planning_snapshot_is_current
 
 try:
-    from supabase_client import get_admin_client
+    from supabase_async import get_async_client
 except ImportError:
     import importlib.util
-    spec = importlib.util.spec_from_file_location("supabase_client", backend_dir / "supabase_client.py")
-    supabase_client = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(supabase_client)
-    get_admin_client = supabase_client.get_admin_client
+    spec = importlib.util.spec_from_file_location("supabase_async", backend_dir / "supabase_async.py")
+    supabase_async = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(supabase_async)
+    get_async_client = supabase_async.get_async_client
 
 router = APIRouter(prefix="/api/ai", tags=["ai"])
 
@@ -110,7 +112,7 @@ class GenerateSyllabusOut(BaseModel):
 # Helper Functions
 # ============================================================
 
-def _insert_ai_task(
+async def _insert_ai_task(
     supabase,
     family_id: str,
     kind: str,
@@ -122,7 +124,7 @@ def _insert_ai_task(
     now = datetime.utcnow().isoformat() + "Z"
     
     try:
-        result = supabase.table("ai_task_runs").insert({
+        result = await supabase.table("ai_task_runs").insert({
             "id": task_id,
             "family_id": family_id,
             "kind": kind,
@@ -147,7 +149,7 @@ def _insert_ai_task(
         )
 
 
-def _update_ai_task(
+async def _update_ai_task(
     supabase,
     task_id: str,
     status: str,
@@ -170,7 +172,7 @@ def _update_ai_task(
     if error is not None:
         update_data["error"] = error
     
-    supabase.table("ai_task_runs").update(update_data).eq("id", task_id).execute()
+    await supabase.table("ai_task_runs").update(update_data).eq("id", task_id).execute()
 
 
 # ============================================================
@@ -187,8 +189,8 @@ async def summarize_progress(
     Generate a progress summary for a date range.
     Uses get_progress_snapshot RPC to fetch data, then formats it.
     """
-    supabase = get_admin_client()
-    family_id = get_family_id_for_user(user["id"])
+    supabase = get_async_client()
+    family_id = await get_family_id_for_user(user["id"])
     
     if not family_id:
         raise HTTPException(
@@ -215,7 +217,7 @@ async def summarize_progress(
     # Create task record (optional - don't block if it fails)
     task_id = None
     try:
-        task_id = _insert_ai_task(
+        task_id = await _insert_ai_task(
             supabase,
             family_id,
             "summarize_progress",
@@ -226,7 +228,7 @@ async def summarize_progress(
             user["id"]
         )
         if task_id:
-            _update_ai_task(supabase, task_id, "running")
+            await _update_ai_task(supabase, task_id, "running")
     except Exception as e:
         print(f"[AI_ROUTES] Warning: Failed to create task record (non-blocking): {e}")
         # Continue without task logging
@@ -236,7 +238,7 @@ async def summarize_progress(
         # Call RPC to get progress snapshot
         try:
             print(f"[AI_ROUTES] Calling get_progress_snapshot with family_id={family_id}, start={body.rangeStart}, end={body.rangeEnd}")
-            rpc_result = supabase.rpc(
+            rpc_result = await supabase.rpc(
                 "get_progress_snapshot",
                 {
                     "p_family_id": str(family_id),  # Ensure it's a string
@@ -345,7 +347,7 @@ async def summarize_progress(
         if task_id:
             try:
                 print(f"[AI_ROUTES] Updating task record: {task_id}")
-                _update_ai_task(
+                await _update_ai_task(
                     supabase,
                     task_id,
                     "succeeded",
@@ -357,7 +359,7 @@ async def summarize_progress(
         
         try:
             print(f"[AI_ROUTES] Incrementing counter")
-            increment_counter("ai_summarize_progress", {"family_id": family_id})
+            increment_counter("ai_summarize_progress")
             print(f"[AI_ROUTES] Counter incremented")
         except Exception as e:
             print(f"[AI_ROUTES] Warning: Failed to increment counter (non-blocking): {e}")
@@ -393,7 +395,7 @@ async def summarize_progress(
         error_msg = str(e)
         if task_id:
             try:
-                _update_ai_task(supabase, task_id, "failed", error=error_msg)
+                await _update_ai_task(supabase, task_id, "failed", error=error_msg)
             except Exception as e2:
                 print(f"[AI_ROUTES] Warning: Failed to update task record on error (non-blocking): {e2}")
         raise HTTPException(
@@ -413,8 +415,8 @@ async def pack_week(
     Uses LLM to analyze year plans, availability windows, and existing events
     to create optimal schedule. Creates events and refreshes calendar cache.
     """
-    supabase = get_admin_client()
-    family_id = get_family_id_for_user(user["id"])
+    supabase = get_async_client()
+    family_id = await get_family_id_for_user(user["id"])
     
     if not family_id:
         raise HTTPException(
@@ -432,7 +434,7 @@ async def pack_week(
         )
     
     # Create task record
-    task_id = _insert_ai_task(
+    task_id = await _insert_ai_task(
         supabase,
         family_id,
         "pack_week",
@@ -444,13 +446,13 @@ async def pack_week(
     )
     
     try:
-        _update_ai_task(supabase, task_id, "running")
+        await _update_ai_task(supabase, task_id, "running")
         
         # Determine child IDs to pack for
         child_ids = body.childIds or []
         if not child_ids:
             # Get all children for the family
-            children_res = supabase.table("children").select("id").eq("family_id", family_id).eq("archived", False).execute()
+            children_res = await supabase.table("children").select("id").eq("family_id", family_id).eq("archived", False).execute()
             child_ids = [c["id"] for c in (children_res.data or [])]
         
         if not child_ids:
@@ -473,7 +475,7 @@ async def pack_week(
             # fall back to basic context
             log_event("ai_pack_week.context_load_error", {"task_id": task_id, "error": str(ctx_error)})
             # Get basic availability and events using get_week_view RPC
-            week_view_res = supabase.rpc(
+            week_view_res = await supabase.rpc(
                 "get_week_view",
                 {
                     "_family_id": family_id,
@@ -492,7 +494,7 @@ async def pack_week(
         
         # Get active year plans with targets (plans that overlap with this week)
         # Plan overlaps if: start_date <= week_end AND end_date >= week_start
-        year_plans_res = supabase.table("year_plans").select(
+        year_plans_res = await supabase.table("year_plans").select(
             "id, start_date, end_date, year_plan_children(*, child_id, subjects)"
         ).eq("family_id", family_id).lte("start_date", str(week_end)).gte("end_date", str(week_start)).execute()
         
@@ -534,7 +536,7 @@ async def pack_week(
             log_event("ai_pack_week.llm_error", {"task_id": task_id, "error": error_msg})
             # Fallback: return empty result with error message
             try:
-                _update_ai_task(supabase, task_id, "failed", error=f"LLM call failed: {error_msg}")
+                await _update_ai_task(supabase, task_id, "failed", error=f"LLM call failed: {error_msg}")
             except Exception as e2:
                 print(f"[AI_ROUTES] Warning: Failed to update task record on LLM error: {e2}")
             raise HTTPException(
@@ -544,6 +546,14 @@ async def pack_week(
         
         events_to_create = llm_result.get("events", [])
         rationale = llm_result.get("rationale", [])
+
+        # Another write (e.g. a second pack_week) may have landed while the LLM was working
+        snapshot_version = context.get("snapshot_version")
+        snapshot_current = await planning_snapshot_is_current(
+            family_id, body.weekStart, child_ids, 1, snapshot_version, route="pack_week"
+        )
+        if not snapshot_current:
+            rationale.append("Note: the schedule changed while this plan was generated; check the week for overlaps")
         
         # Validate events don't exceed max_minutes_per_day constraint
         max_minutes_per_day = context.get("max_minutes_per_day", 240)
@@ -603,7 +613,7 @@ async def pack_week(
                 minutes = event_data.get("minutes", 60)
                 end_ts = start_ts + timedelta(minutes=minutes)
                 
-                event_res = supabase.table("events").insert({
+                event_res = await supabase.table("events").insert({
                     "family_id": family_id,
                     "child_id": event_data["child_id"],
                     "subject_id": event_data.get("subject_id"),
@@ -629,7 +639,7 @@ async def pack_week(
         # Refresh calendar cache
         try:
             print(f"[AI_ROUTES] Refreshing calendar cache for week {week_start} to {week_end}")
-            supabase.rpc(
+            await supabase.rpc(
                 "refresh_calendar_days_cache",
                 {
                     "p_family_id": family_id,
@@ -642,16 +652,26 @@ async def pack_week(
             error_msg = str(e)
             print(f"[AI_ROUTES] Warning: Failed to refresh cache (non-blocking): {error_msg}")
             log_event("ai_pack_week.cache_refresh_error", {"task_id": task_id, "error": error_msg})
+        finally:
+            # After the refresh, so a planning context loaded meanwhile is not cached with the old days
+            if created_events:
+                await invalidate_async(family_id=family_id, child_ids={e.get("child_id") for e in created_events})
         
         notes = "\n".join(rationale) if rationale else f"Created {len(created_events)} events for the week."
         
         print(f"[AI_ROUTES] Updating task record: {task_id}")
         try:
-            _update_ai_task(
+            await _update_ai_task(
                 supabase,
                 task_id,
                 "succeeded",
-                result={"events": created_events, "notes": notes, "rationale": rationale}
+                result={
+                    "events": created_events,
+                    "notes": notes,
+                    "rationale": rationale,
+                    "snapshot_version": snapshot_version,
+                    "stale": not snapshot_current,
+                }
             )
             print(f"[AI_ROUTES] Task record updated successfully")
         except Exception as e:
@@ -659,7 +679,7 @@ async def pack_week(
         
         try:
             print(f"[AI_ROUTES] Incrementing counter")
-            increment_counter("ai_pack_week", {"family_id": family_id})
+            increment_counter("ai_pack_week")
             print(f"[AI_ROUTES] Counter incremented")
         except Exception as e:
             print(f"[AI_ROUTES] Warning: Failed to increment counter (non-blocking): {e}")
@@ -706,7 +726,7 @@ async def pack_week(
         raise
     except Exception as e:
         error_msg = str(e)
-        _update_ai_task(supabase, task_id, "failed", error=error_msg)
+        await _update_ai_task(supabase, task_id, "failed", error=error_msg)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to pack week: {error_msg}"
@@ -724,8 +744,8 @@ async def catch_up(
     Uses LLM to find optimal future time slots for missed events,
     avoiding conflicts and blackouts. Updates events and refreshes cache.
     """
-    supabase = get_admin_client()
-    family_id = get_family_id_for_user(user["id"])
+    supabase = get_async_client()
+    family_id = await get_family_id_for_user(user["id"])
     
     if not family_id:
         raise HTTPException(
@@ -740,7 +760,7 @@ async def catch_up(
         )
     
     # Create task record
-    task_id = _insert_ai_task(
+    task_id = await _insert_ai_task(
         supabase,
         family_id,
         "catch_up",
@@ -751,10 +771,10 @@ async def catch_up(
     )
     
     try:
-        _update_ai_task(supabase, task_id, "running")
+        await _update_ai_task(supabase, task_id, "running")
         
         # Load missed events
-        events_res = supabase.table("events").select(
+        events_res = await supabase.table("events").select(
             "id, child_id, subject_id, title, start_ts, end_ts, status"
         ).in_("id", body.missedEventIds).eq("family_id", family_id).execute()
         
@@ -785,7 +805,7 @@ async def catch_up(
             # If load_planning_context fails, fall back to basic context
             log_event("ai_catch_up.context_load_error", {"task_id": task_id, "error": str(ctx_error)})
             # Get basic availability using get_week_view RPC
-            week_view_res = supabase.rpc(
+            week_view_res = await supabase.rpc(
                 "get_week_view",
                 {
                     "_family_id": family_id,
@@ -804,7 +824,7 @@ async def catch_up(
             }
         
         # Get existing scheduled events in future window
-        existing_events_res = supabase.table("events").select(
+        existing_events_res = await supabase.table("events").select(
             "id, child_id, start_ts, end_ts"
         ).eq("family_id", family_id).in_("child_id", child_ids).eq("status", "scheduled").gte("start_ts", future_start.isoformat()).lte("start_ts", future_end.isoformat()).execute()
         
@@ -838,7 +858,7 @@ async def catch_up(
         except Exception as llm_error:
             log_event("ai_catch_up.llm_error", {"task_id": task_id, "error": str(llm_error)})
             # Fallback: return empty result with error message
-            _update_ai_task(supabase, task_id, "failed", error=f"LLM call failed: {str(llm_error)}")
+            await _update_ai_task(supabase, task_id, "failed", error=f"LLM call failed: {str(llm_error)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"AI service unavailable: {str(llm_error)}"
@@ -846,6 +866,13 @@ async def catch_up(
         
         rescheduled_moves = llm_result.get("rescheduled", [])
         rationale = llm_result.get("rationale", [])
+
+        snapshot_version = context.get("snapshot_version")
+        snapshot_current = await planning_snapshot_is_current(
+            family_id, str(future_start), child_ids, 4, snapshot_version, route="catch_up"
+        )
+        if not snapshot_current:
+            rationale.append("Note: the schedule changed while this plan was generated; check the moved events for overlaps")
         
         # Validate rescheduling doesn't exceed max_minutes_per_day constraint
         max_minutes_per_day = context.get("max_minutes_per_day", 240)
@@ -934,7 +961,7 @@ async def catch_up(
                 new_end = datetime.fromisoformat(move["new_end"].replace("Z", "+00:00"))
                 
                 # Update event
-                update_res = supabase.table("events").update({
+                update_res = await supabase.table("events").update({
                     "start_ts": new_start.isoformat(),
                     "end_ts": new_end.isoformat(),
                     "status": "scheduled"  # Reset from missed/overdue
@@ -953,7 +980,7 @@ async def catch_up(
         
         # Refresh calendar cache
         try:
-            supabase.rpc(
+            await supabase.rpc(
                 "refresh_calendar_days_cache",
                 {
                     "p_family_id": family_id,
@@ -963,17 +990,26 @@ async def catch_up(
             ).execute()
         except Exception as e:
             log_event("ai_catch_up.cache_refresh_error", {"task_id": task_id, "error": str(e)})
+        finally:
+            if rescheduled_events:
+                await invalidate_async(family_id=family_id, child_ids=child_ids)
         
         notes = "\n".join(rationale) if rationale else f"Rescheduled {len(rescheduled_events)} events."
         
-        _update_ai_task(
+        await _update_ai_task(
             supabase,
             task_id,
             "succeeded",
-            result={"rescheduled": rescheduled_events, "notes": notes, "rationale": rationale}
+            result={
+                "rescheduled": rescheduled_events,
+                "notes": notes,
+                "rationale": rationale,
+                "snapshot_version": snapshot_version,
+                "stale": not snapshot_current,
+            }
         )
         
-        increment_counter("ai_catch_up", {"family_id": family_id})
+        increment_counter("ai_catch_up")
         log_event("ai_catch_up", {"family_id": family_id, "task_id": task_id, "events_rescheduled": len(rescheduled_events)})
         
         return CatchUpOut(
@@ -987,7 +1023,7 @@ async def catch_up(
         raise
     except Exception as e:
         error_msg = str(e)
-        _update_ai_task(supabase, task_id, "failed", error=error_msg)
+        await _update_ai_task(supabase, task_id, "failed", error=error_msg)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to catch up: {error_msg}"
@@ -1015,18 +1051,18 @@ async def get_event_tags(
     Loads event details (title, subject, description) and calls LLM to suggest
     appropriate tags for outcome reporting.
     """
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Family not found"
         )
     
-    supabase = get_admin_client()
+    supabase = get_async_client()
     
     try:
         # Load event and verify family access
-        event_res = supabase.table("events").select("*").eq("id", body.event_id).single().execute()
+        event_res = await supabase.table("events").select("*").eq("id", body.event_id).single().execute()
         if not event_res.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1044,7 +1080,7 @@ async def get_event_tags(
         subject_name = "General"
         if event.get("subject_id"):
             try:
-                subject_res = supabase.table("subject").select("name").eq("id", event["subject_id"]).single().execute()
+                subject_res = await supabase.table("subject").select("name").eq("id", event["subject_id"]).single().execute()
                 if subject_res.data:
                     subject_name = subject_res.data.get("name", "General")
             except Exception:
@@ -1108,13 +1144,13 @@ async def generate_syllabus(
     """
     log_event("ai_generate_syllabus.start", user_id=user["id"], url=body.url[:50], course_id=body.course_id)
     
-    supabase = get_admin_client()
+    supabase = get_async_client()
     
     try:
         # Load course metadata if course_id is provided
         metadata = {}
         if body.course_id:
-            course_res = supabase.table("external_courses").select(
+            course_res = await supabase.table("external_courses").select(
                 "id, subject, grade_band, public_url, source_url, duration_sec, external_providers(name)"
             ).eq("id", body.course_id).single().execute()
             
@@ -1166,7 +1202,7 @@ async def generate_syllabus(
                     lessons = unit_data.get("lessons", [])
                     
                     # Upsert unit
-                    unit_res = supabase.table("external_units").upsert(
+                    unit_res = await supabase.table("external_units").upsert(
                         {
                             "course_id": body.course_id,
                             "ordinal": unit_idx,
@@ -1186,7 +1222,7 @@ async def generate_syllabus(
                             lesson_title = lesson_data.get("title", f"Lesson {lesson_idx}")
                             duration_min = lesson_data.get("duration_min", 15)
                             
-                            supabase.table("external_lessons").upsert(
+                            await supabase.table("external_lessons").upsert(
                                 {
                                     "unit_id": unit_id,
                                     "ordinal": lesson_idx,
@@ -1216,6 +1252,9 @@ async def generate_syllabus(
                     "course_id": body.course_id,
                     "error": str(upsert_error)
                 })
+            finally:
+                # Even a partial upsert changes the outline
+                await invalidate_async(course_id=body.course_id)
         
         log_event("ai_generate_syllabus.success", {
             "url": body.url[:50],
@@ -1274,7 +1313,7 @@ async def inspire_learning(
     log_event("ai_inspire_learning.start", user_id=user["id"], child_id=body.child_id)
     
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1282,16 +1321,16 @@ async def inspire_learning(
             )
         
         # Verify child belongs to family
-        if not child_belongs_to_family(body.child_id, family_id):
+        if not await child_belongs_to_family(body.child_id, family_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Child not in family"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Get child info
-        child_res = supabase.table("children").select("id, first_name, interests").eq("id", body.child_id).single().execute()
+        child_res = await supabase.table("children").select("id, first_name, interests").eq("id", body.child_id).single().execute()
         if not child_res.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1306,17 +1345,17 @@ async def inspire_learning(
         
         # Get subjects the child is studying
         # Query subject_id directly, then fetch subject names separately
-        events_res = supabase.table("events").select("subject_id").eq("child_id", body.child_id).not_.is_("subject_id", "null").limit(50).execute()
+        events_res = await supabase.table("events").select("subject_id").eq("child_id", body.child_id).not_.is_("subject_id", "null").limit(50).execute()
         subject_ids = list(set([e.get("subject_id") for e in (events_res.data or []) if e.get("subject_id")]))
         
         subjects = []
         if subject_ids:
-            subjects_res = supabase.table("subject").select("name").in_("id", subject_ids).execute()
+            subjects_res = await supabase.table("subject").select("name").in_("id", subject_ids).execute()
             subjects = [s.get("name") for s in (subjects_res.data or []) if s.get("name")]
         
         # Get recent event outcomes (last 30 days) with strengths/struggles
         thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
-        outcomes_res = supabase.table("event_outcomes").select("strengths, struggles, rating").eq("child_id", body.child_id).gte("created_at", thirty_days_ago).limit(50).execute()
+        outcomes_res = await supabase.table("event_outcomes").select("strengths, struggles, rating").eq("child_id", body.child_id).gte("created_at", thirty_days_ago).limit(50).execute()
         recent_outcomes = [
             {
                 "strengths": o.get("strengths", []),
@@ -1327,7 +1366,7 @@ async def inspire_learning(
         ]
         
         # Get viewing history from external_courses/external_lessons (via events)
-        viewing_res = supabase.table("events").select("external_lesson:external_lesson_id(external_units(external_courses(public_url, external_providers(name))))").eq("child_id", body.child_id).not_.is_("external_lesson_id", "null").limit(20).execute()
+        viewing_res = await supabase.table("events").select("external_lesson:external_lesson_id(external_units(external_courses(public_url, external_providers(name))))").eq("child_id", body.child_id).not_.is_("external_lesson_id", "null").limit(20).execute()
         viewing_history = []
         for event in (viewing_res.data or []):
             lesson = event.get("external_lesson")
@@ -1421,7 +1460,7 @@ async def inspire_learning(
         stored_suggestions = []
         for suggestion in suggestions:
             try:
-                insert_res = supabase.table("learning_suggestions").insert({
+                insert_res = await supabase.table("learning_suggestions").insert({
                     "family_id": family_id,
                     "child_id": body.child_id,
                     "title": suggestion.get("title"),
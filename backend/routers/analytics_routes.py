@@ -6,6 +6,7 @@ from fastapi import APIRouter, HTTPException, Depends, Query, status
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime, timedelta
+import os
 import sys
 from pathlib import Path
 
@@ -17,10 +18,14 @@ if str(backend_dir) not in sys.path:
 from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
+from cache import get_or_load, family_tag, child_tag
+from fast_json import trusted_json
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300"))
+
 
 class SubjectPerformanceRow(BaseModel):
     subject_id: Optional[str]
@@ -77,14 +82,14 @@ async def get_subject_performance(
     - Average rating and grade
     - Most common strengths and struggles
     """
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Family not found"
         )
     
-    supabase = get_admin_client()
+    supabase = get_async_client()
     
     try:
         end_date = date.today()
@@ -100,7 +105,7 @@ async def get_subject_performance(
         if childId:
             events_query = events_query.eq("child_id", childId)
         
-        events_res = events_query.execute()
+        events_res = await events_query.execute()
         events = events_res.data or []
         
         # Build query for outcomes
@@ -113,7 +118,7 @@ async def get_subject_performance(
         if childId:
             outcomes_query = outcomes_query.eq("child_id", childId)
         
-        outcomes_res = outcomes_query.execute()
+        outcomes_res = await outcomes_query.execute()
         outcomes = outcomes_res.data or []
         
         # Build query for attendance
@@ -126,14 +131,14 @@ async def get_subject_performance(
         if childId:
             attendance_query = attendance_query.eq("child_id", childId)
         
-        attendance_res = attendance_query.execute()
+        attendance_res = await attendance_query.execute()
         attendance = attendance_res.data or []
         
         # Get subject names
         subject_ids = list(set([e.get("subject_id") for e in events if e.get("subject_id")]))
         subject_lookup = {}
         if subject_ids:
-            subjects_res = supabase.table("subject").select("id, name").in_("id", subject_ids).execute()
+            subjects_res = await supabase.table("subject").select("id, name").in_("id", subject_ids).execute()
             for s in (subjects_res.data or []):
                 subject_lookup[s["id"]] = s["name"]
         
@@ -280,14 +285,14 @@ async def get_trends(
     
     Returns weekly data points showing average rating and completion count.
     """
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Family not found"
         )
     
-    supabase = get_admin_client()
+    supabase = get_async_client()
     
     try:
         end_date = date.today()
@@ -303,14 +308,14 @@ async def get_trends(
         if childId:
             outcomes_query = outcomes_query.eq("child_id", childId)
         
-        outcomes_res = outcomes_query.execute()
+        outcomes_res = await outcomes_query.execute()
         outcomes = outcomes_res.data or []
         
         # Get subject names
         subject_ids = list(set([o.get("subject_id") for o in outcomes if o.get("subject_id")]))
         subject_lookup = {}
         if subject_ids:
-            subjects_res = supabase.table("subject").select("id, name").in_("id", subject_ids).execute()
+            subjects_res = await supabase.table("subject").select("id, name").in_("id", subject_ids).execute()
             for s in (subjects_res.data or []):
                 subject_lookup[s["id"]] = s["name"]
         
@@ -404,14 +409,14 @@ async def get_recommendations(
     - Low attendance → suggests checking for burnout
     - Declining ratings → suggests reviewing approach
     """
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Family not found"
         )
     
-    supabase = get_admin_client()
+    supabase = get_async_client()
     
     try:
         end_date = date.today()
@@ -427,7 +432,7 @@ async def get_recommendations(
         if childId:
             outcomes_query = outcomes_query.eq("child_id", childId)
         
-        outcomes_res = outcomes_query.execute()
+        outcomes_res = await outcomes_query.execute()
         outcomes = outcomes_res.data or []
         
         # Get attendance data
@@ -440,14 +445,14 @@ async def get_recommendations(
         if childId:
             attendance_query = attendance_query.eq("child_id", childId)
         
-        attendance_res = attendance_query.execute()
+        attendance_res = await attendance_query.execute()
         attendance = attendance_res.data or []
         
         # Get subject names
         subject_ids = list(set([o.get("subject_id") for o in outcomes if o.get("subject_id")]))
         subject_lookup = {}
         if subject_ids:
-            subjects_res = supabase.table("subject").select("id, name").in_("id", subject_ids).execute()
+            subjects_res = await supabase.table("subject").select("id, name").in_("id", subject_ids).execute()
             for s in (subjects_res.data or []):
                 subject_lookup[s["id"]] = s["name"]
         
@@ -577,14 +582,14 @@ async def get_analytics_overview(
     """
     Get complete analytics overview: performance, trends, and recommendations.
     """
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Family not found"
         )
     
-    try:
+    async def _load_overview():
         # Call the other endpoints directly (they're in the same module)
         performance = await get_subject_performance(
             childId=childId,
@@ -607,11 +612,23 @@ async def get_analytics_overview(
             __=None
         )
         
+        # Cached as plain JSON data; every hit is sent without re-validation
         return AnalyticsOut(
             subject_performance=performance,
             trends=trends,
             recommendations=recommendations
+        ).model_dump(mode="json")
+    
+    try:
+        # Dropped by cache.invalidate() whenever events/outcomes for the family change
+        tags = [family_tag(family_id)] + ([child_tag(childId)] if childId else [])
+        overview = await get_or_load(
+            f"analytics:overview:{family_id}:{childId or 'all'}:{days}:{weeks}",
+            _load_overview,
+            ttl_seconds=ANALYTICS_CACHE_TTL,
+            tags=tags,
         )
+        return trusted_json(overview)
         
     except HTTPException:
         raise
@@ -17,7 +17,8 @@ if str(backend_dir) not in sys.path:
 from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user
 from logger import log_event
-from supabase_client import get_admin_client
+from cache import invalidate_async
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api/events", tags=["attendance"])
 
@@ -71,18 +72,18 @@ async def complete_event(
     if body is None:
         body = CompleteEventInput()
     
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Family not found"
         )
     
-    supabase = get_admin_client()
+    supabase = get_async_client()
     
     try:
         # Load event and verify family access
-        event_res = supabase.table("events").select("*").eq("id", event_id).single().execute()
+        event_res = await supabase.table("events").select("*").eq("id", event_id).single().execute()
         if not event_res.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -106,7 +107,7 @@ async def complete_event(
         # Note: There may be a database trigger that tries to update subject_credit_ledger
         # If that trigger fails due to missing columns, the update will still fail
         # Run the SQL migration 2025-11-18_fix_event_credit_trigger.sql to fix this
-        update_res = supabase.table("events").update({
+        update_res = await supabase.table("events").update({
             "status": "done"
         }).eq("id", event_id).execute()
         
@@ -134,7 +135,7 @@ async def complete_event(
         }
         
         # Use upsert with conflict resolution on event_id (unique constraint)
-        attendance_res = supabase.table("attendance_records").upsert(
+        attendance_res = await supabase.table("attendance_records").upsert(
             attendance_data,
             on_conflict="event_id"
         ).execute()
@@ -146,6 +147,7 @@ async def complete_event(
             )
         
         attendance = attendance_res.data[0] if isinstance(attendance_res.data, list) else attendance_res.data
+        await invalidate_async(family_id=family_id, child_ids=[event.get("child_id")])
         
         log_event("event.completed", event_id=event_id, family_id=family_id, minutes=minutes)
         
@@ -183,18 +185,18 @@ async def save_outcome(
     
     Upserts into event_outcomes table (one outcome per event).
     """
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Family not found"
         )
     
-    supabase = get_admin_client()
+    supabase = get_async_client()
     
     try:
         # Load event and verify family access
-        event_res = supabase.table("events").select("*").eq("id", event_id).single().execute()
+        event_res = await supabase.table("events").select("*").eq("id", event_id).single().execute()
         if not event_res.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -223,7 +225,7 @@ async def save_outcome(
         }
         
         # Upsert outcome (unique constraint on event_id)
-        outcome_res = supabase.table("event_outcomes").upsert(
+        outcome_res = await supabase.table("event_outcomes").upsert(
             outcome_data,
             on_conflict="event_id"
         ).execute()
@@ -235,6 +237,7 @@ async def save_outcome(
             )
         
         outcome = outcome_res.data[0] if isinstance(outcome_res.data, list) else outcome_res.data
+        await invalidate_async(family_id=family_id, child_ids=[event.get("child_id")])
         
         log_event("event.outcome.saved", event_id=event_id, family_id=family_id, has_rating=body.rating is not None, has_strengths=len(body.strengths or []) > 0, has_struggles=len(body.struggles or []) > 0)
         
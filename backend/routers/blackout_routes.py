@@ -19,8 +19,9 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 from auth import get_current_user, rate_limiter
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
 from logger import log_event
+from cache import invalidate_async
 
 def hash_family_id(family_id: str) -> str:
     """Hash family ID for logging (matches year_routes pattern)"""
@@ -47,8 +48,8 @@ async def sync_blackouts(
     
     try:
         # Get user's family ID
-        supabase = get_admin_client()
-        profile_resp = supabase.table("profiles").select("family_id").eq("id", user["id"]).single().execute()
+        supabase = get_async_client()
+        profile_resp = await supabase.table("profiles").select("family_id").eq("id", user["id"]).single().execute()
         
         if not profile_resp.data:
             raise HTTPException(
@@ -63,7 +64,7 @@ async def sync_blackouts(
         file_path = f"{state}/{year}.json"
         
         try:
-            file_resp = supabase.storage.from_(bucket_name).download(file_path)
+            file_resp = await supabase.storage.from_(bucket_name).download(file_path)
             
             if not file_resp:
                 raise HTTPException(
@@ -92,7 +93,7 @@ async def sync_blackouts(
                     # Upsert into calendar_days_cache
                     # Note: calendar_days_cache might need family_id, date, and other fields
                     # Adjust based on your actual schema
-                    upsert_resp = supabase.table("calendar_days_cache").upsert({
+                    upsert_resp = await supabase.table("calendar_days_cache").upsert({
                         "family_id": family_id,
                         "date": blackout_date.isoformat(),
                         "day_status": "off",
@@ -117,6 +118,9 @@ async def sync_blackouts(
                     skipped += 1
                     continue
             
+            if upserted:
+                await invalidate_async(family_id=family_id)
+            
             log_event(
                 "year.sync_blackouts.success",
                 user_id=user["id"],
@@ -14,10 +14,10 @@ backend_dir = Path(__file__).parent.parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
-from auth import get_current_user, rate_limiter
-from helpers import get_family_id_for_user
+from auth import rate_limiter
+from identity import IdentityContext, get_identity
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api/child", tags=["child"])
 
@@ -38,7 +38,7 @@ class ChildOverviewOut(BaseModel):
 
 @router.get("/overview", response_model=ChildOverviewOut)
 async def get_child_overview(
-    user: dict = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     __: None = Depends(rate_limiter),
 ):
     """
@@ -46,27 +46,12 @@ async def get_child_overview(
     Only accessible to users with child role.
     """
     try:
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
-        # Get user's role from family_members or profiles
-        role = None
-        family_id = None
+        family_id = identity.family_id
+        child_scope = identity.child_scope
         
-        # Check family_members first
-        member_res = supabase.table("family_members").select("member_role, family_id, child_scope").eq("user_id", user["id"]).maybe_single().execute()
-        if member_res.data:
-            role = member_res.data.get("member_role")
-            family_id = member_res.data.get("family_id")
-            child_scope = member_res.data.get("child_scope") or []
-        else:
-            # Fallback to profiles
-            profile_res = supabase.table("profiles").select("role, family_id").eq("id", user["id"]).maybe_single().execute()
-            if profile_res.data:
-                role = profile_res.data.get("role")
-                family_id = profile_res.data.get("family_id")
-                child_scope = []
-        
-        if role != "child":
+        if not identity.is_child:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Child role required"
@@ -81,7 +66,7 @@ async def get_child_overview(
             if family_id:
                 # For now, just get the first child in the family
                 # In a real system, you'd link child records to user accounts more explicitly
-                children_res = supabase.table("children").select("id").eq("family_id", family_id).eq("archived", False).limit(1).execute()
+                children_res = await supabase.table("children").select("id").eq("family_id", family_id).eq("archived", False).limit(1).execute()
                 if children_res.data and len(children_res.data) > 0:
                     child_id = children_res.data[0]["id"]
         
@@ -98,7 +83,7 @@ async def get_child_overview(
         today_end = datetime.combine(today, datetime.max.time()).isoformat()
         
         events_res = (
-            supabase.table("events")
+            await supabase.table("events")
             .select("*")
             .eq("child_id", child_id)
             .gte("start_at", today_start)
@@ -115,7 +100,7 @@ async def get_child_overview(
             # Get attendance records ordered by date descending
             # Note: PostgREST order() doesn't support desc=True directly, need to use desc() method or order with column:desc syntax
             attendance_res = (
-                supabase.table("attendance_records")
+                await supabase.table("attendance_records")
                 .select("day_date")
                 .eq("child_id", child_id)
                 .order("day_date", desc=False)
@@ -141,13 +126,13 @@ async def get_child_overview(
                 
                 streak = current_streak
         except Exception as streak_error:
-            log_event("child.overview.streak_error", user_id=user["id"], error=str(streak_error))
+            log_event("child.overview.streak_error", user_id=identity.user_id, error=str(streak_error))
         
         # Get progress from child_progress view
         progress_data = {}
         try:
             progress_res = (
-                supabase.table("child_progress")
+                await supabase.table("child_progress")
                 .select("*")
                 .eq("child_id", child_id)
                 .execute()
@@ -180,9 +165,9 @@ async def get_child_overview(
                     "latest_grade": latest_grade,
                 }
         except Exception as progress_error:
-            log_event("child.overview.progress_error", user_id=user["id"], error=str(progress_error))
+            log_event("child.overview.progress_error", user_id=identity.user_id, error=str(progress_error))
         
-        log_event("child.overview.success", user_id=user["id"], child_id=child_id)
+        log_event("child.overview.success", user_id=identity.user_id, child_id=child_id)
         
         return ChildOverviewOut(
             today_events=today_events,
@@ -193,7 +178,7 @@ async def get_child_overview(
     except HTTPException:
         raise
     except Exception as e:
-        log_event("child.overview.error", user_id=user["id"], error=str(e))
+        log_event("child.overview.error", user_id=identity.user_id, error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch child overview: {str(e)}"
@@ -17,7 +17,7 @@ if str(backend_dir) not in sys.path:
 from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api", tags=["dashboard"])
 
@@ -62,10 +62,10 @@ async def get_me(
     Get current user's profile, role, family_id, and accessible children.
     """
     try:
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Get profile
-        profile_res = supabase.table("profiles").select("*").eq("id", user["id"]).single().execute()
+        profile_res = await supabase.table("profiles").select("*").eq("id", user["id"]).single().execute()
         if not profile_res.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -79,7 +79,7 @@ async def get_me(
         # Get family_members entry if exists
         # Use admin client to bypass RLS (service role)
         try:
-            member_res = supabase.table("family_members").select("*").eq("user_id", user["id"]).maybe_single().execute()
+            member_res = await supabase.table("family_members").select("*").eq("user_id", user["id"]).maybe_single().execute()
             if member_res.data:
                 role = member_res.data.get("member_role", role)
                 family_id = member_res.data.get("family_id", family_id)
@@ -90,7 +90,7 @@ async def get_me(
         # Get accessible children using RPC
         accessible_children = []
         try:
-            accessible_res = supabase.rpc(
+            accessible_res = await supabase.rpc(
                 "get_accessible_children",
                 {"_user_id": user["id"]}
             ).execute()
@@ -98,7 +98,7 @@ async def get_me(
             if accessible_res.data:
                 child_ids = [c.get("child_id") for c in accessible_res.data if c.get("child_id")]
                 if child_ids:
-                    children_res = supabase.table("children").select("id, first_name, nickname, age, avatar_url").in_("id", child_ids).execute()
+                    children_res = await supabase.table("children").select("id, first_name, nickname, age, avatar_url").in_("id", child_ids).execute()
                     accessible_children = [
                         {
                             "id": c["id"],
@@ -113,7 +113,7 @@ async def get_me(
             # Fallback: if RPC doesn't exist, use legacy logic
             log_event("dashboard.get_me.rpc_fallback", user_id=user["id"], error=str(rpc_error))
             if family_id:
-                children_res = supabase.table("children").select("id, first_name, nickname, age, avatar_url").eq("family_id", family_id).eq("archived", False).execute()
+                children_res = await supabase.table("children").select("id, first_name, nickname, age, avatar_url").eq("family_id", family_id).eq("archived", False).execute()
                 accessible_children = [
                     {
                         "id": c["id"],
@@ -156,11 +156,11 @@ async def get_child_progress(
     Scoped to accessible children based on user's role.
     """
     try:
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Get accessible child IDs
         try:
-            accessible_res = supabase.rpc(
+            accessible_res = await supabase.rpc(
                 "get_accessible_children",
                 {"_user_id": user["id"]}
             ).execute()
@@ -171,9 +171,9 @@ async def get_child_progress(
         except Exception as rpc_error:
             # Fallback: use family_id
             log_event("dashboard.child_progress.rpc_fallback", user_id=user["id"], error=str(rpc_error))
-            family_id = get_family_id_for_user(user["id"])
+            family_id = await get_family_id_for_user(user["id"])
             if family_id:
-                children_res = supabase.table("children").select("id").eq("family_id", family_id).execute()
+                children_res = await supabase.table("children").select("id").eq("family_id", family_id).execute()
                 accessible_child_ids = [c["id"] for c in (children_res.data or [])]
             else:
                 accessible_child_ids = []
@@ -196,7 +196,7 @@ async def get_child_progress(
         if subject_id:
             query = query.eq("subject_id", subject_id)
         
-        result = query.execute()
+        result = await query.execute()
         
         progress_data = []
         for row in (result.data or []):
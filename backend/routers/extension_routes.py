@@ -19,7 +19,7 @@ try:
     from auth import get_current_user, rate_limiter
     from helpers import get_family_id_for_user, child_belongs_to_family
     from logger import log_event
-    from supabase_client import get_admin_client
+    from supabase_async import get_async_client, run_blocking
 except ImportError:
     import importlib.util
     spec = importlib.util.spec_from_file_location("auth", backend_dir / "auth.py")
@@ -39,10 +39,13 @@ except ImportError:
     spec.loader.exec_module(logger_module)
     log_event = logger_module.log_event
     
-    spec = importlib.util.spec_from_file_location("supabase_client", backend_dir / "supabase_client.py")
-    supabase_client = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(supabase_client)
-    get_admin_client = supabase_client.get_admin_client
+    spec = importlib.util.spec_from_file_location("supabase_async", backend_dir / "supabase_async.py")
+    supabase_async = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(supabase_async)
+    get_async_client = supabase_async.get_async_client
+    run_blocking = supabase_async.run_blocking
+
+from cache import invalidate_async
 
 # Import YouTube helpers from external_routes
 try:
@@ -162,7 +165,7 @@ async def extension_add(
     
     try:
         # Get family_id from user
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -172,15 +175,15 @@ async def extension_add(
         # If child_id provided, validate it belongs to family
         child_id = body.child_id
         if child_id:
-            if not child_belongs_to_family(child_id, family_id):
+            if not await child_belongs_to_family(child_id, family_id):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Forbidden: Child not in family"
                 )
         else:
             # If no child_id, get first child for the family
-            supabase = get_admin_client()
-            children_res = supabase.table("children").select("id").eq(
+            supabase = get_async_client()
+            children_res = await supabase.table("children").select("id").eq(
                 "family_id", family_id
             ).eq("archived", False).limit(1).execute()
             
@@ -206,12 +209,12 @@ async def extension_add(
             )
         
         # Fetch YouTube video metadata
-        meta = fetch_youtube_video_meta(yt_id)
+        meta = await run_blocking(fetch_youtube_video_meta, yt_id)
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Call RPC to create course/lesson and backlog task
-        rpc_result = supabase.rpc(
+        rpc_result = await supabase.rpc(
             "add_external_link",
             {
                 "p_family_id": family_id,
@@ -248,7 +251,7 @@ async def extension_add(
             now = datetime.utcnow()
             start_ts = now - timedelta(minutes=duration_minutes)
             
-            event_res = supabase.table("events").insert({
+            event_res = await supabase.table("events").insert({
                 "family_id": family_id,
                 "child_id": child_id,
                 "external_lesson_id": lesson_id,
@@ -262,11 +265,12 @@ async def extension_add(
             
             if event_res.data:
                 event_id = event_res.data[0]["id"]
+                await invalidate_async(family_id=family_id, child_ids=[child_id])
                 
                 # Optionally delete the backlog task since we created an event
                 if backlog_task_id:
                     try:
-                        supabase.table("backlog_items").delete().eq("id", backlog_task_id).execute()
+                        await supabase.table("backlog_items").delete().eq("id", backlog_task_id).execute()
                         backlog_task_id = None  # Clear it from response
                     except Exception as e:
                         log_event("extension.add.backlog_delete_error", error=str(e))
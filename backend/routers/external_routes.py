@@ -5,19 +5,21 @@ Link-only catalog for external educational content
 import os
 import re
 import math
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional, Tuple
 import sys
 from pathlib import Path
 from fastapi import status
-from auth import get_current_user, rate_limiter
+from auth import get_current_user, rate_limiter, rate_limiter_stats
 from helpers import get_family_id_for_user, child_belongs_to_family
 from datetime import datetime, date, timedelta, time
-from cache import get_cached, set_cached
+from cache import get_or_load, cache_names, cache_stats, course_tag, invalidate_async
 from logger import log_event
 from metrics import increment_counter, get_metrics
-import requests
+from fast_json import trusted_json
+from state_backend import get_state_backend, run_state_io
+from http_cache import conditional_json
 
 # Add parent directory to path
 backend_dir = Path(__file__).parent.parent
@@ -25,17 +27,25 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 try:
-    from supabase_client import get_admin_client
+    from supabase_async import get_async_client, run_blocking
 except ImportError:
     import importlib.util
-    spec = importlib.util.spec_from_file_location("supabase_client", backend_dir / "supabase_client.py")
-    supabase_client = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(supabase_client)
-    get_admin_client = supabase_client.get_admin_client
+    spec = importlib.util.spec_from_file_location("supabase_async", backend_dir / "supabase_async.py")
+    supabase_async = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(supabase_async)
+    get_async_client = supabase_async.get_async_client
+    run_blocking = supabase_async.run_blocking
 
 router = APIRouter(prefix="/api/external", tags=["external"])
 ALLOWED_METRICS_EMAILS = set(filter(None, os.environ.get("METRICS_ALLOWED_EMAILS", "").split(",")))
 
+# Catalog reads: served from cache for TTL seconds, then served stale (while one
+# background refresh runs) until HARD_TTL, so an expiry never blocks a request.
+COURSES_CACHE_TTL = float(os.getenv("COURSES_CACHE_TTL_SECONDS", "60"))
+COURSES_CACHE_HARD_TTL = float(os.getenv("COURSES_CACHE_HARD_TTL_SECONDS", "600"))
+OUTLINE_CACHE_TTL = float(os.getenv("OUTLINE_CACHE_TTL_SECONDS", "120"))
+OUTLINE_CACHE_HARD_TTL = float(os.getenv("OUTLINE_CACHE_HARD_TTL_SECONDS", "1800"))
+
 
 class CourseOut(BaseModel):
     id: str
@@ -120,95 +130,103 @@ async def list_courses(
             str(offset),
         ])
 
-        cached = get_cached(cache_key)
-        if cached:
-            increment_counter("courses_cache_hits")
-            log_event("external.courses.cached", user_email=_user.get("email"), offset=offset, limit=limit)
-            return cached
-
-        supabase = get_admin_client()
-
-        # Get provider ID if provider filter is specified
-        provider_id = None
-        if provider:
-            provider_resp = supabase.table("external_providers").select("id").eq("name", provider).limit(1).execute()
-            if provider_resp.data:
-                provider_id = provider_resp.data[0]["id"]
-
-        # Build query
-        query = supabase.table("external_courses").select(
-            """
-            id,
-            subject,
-            grade_band,
-            lesson_count,
-            public_url,
-            subject_key,
-            stage_key,
-            external_providers (
-                name,
-                license,
-                attribution_text
+        loaded = False
+
+        async def _load_courses():
+            nonlocal loaded
+            loaded = True
+            supabase = get_async_client()
+
+            # Get provider ID if provider filter is specified
+            provider_id = None
+            if provider:
+                provider_resp = await supabase.table("external_providers").select("id").eq("name", provider).limit(1).execute()
+                if provider_resp.data:
+                    provider_id = provider_resp.data[0]["id"]
+
+            # Build query
+            query = supabase.table("external_courses").select(
+                """
+                id,
+                subject,
+                grade_band,
+                lesson_count,
+                public_url,
+                subject_key,
+                stage_key,
+                external_providers (
+                    name,
+                    license,
+                    attribution_text
+                )
+                """,
+                count="exact"
             )
-            """,
-            count="exact"
-        )
-
-        if provider_id:
-            query = query.eq("provider_id", provider_id)
-
-        if subject:
-            query = query.eq("subject", subject)
-
-        if subject_key:
-            query = query.eq("subject_key", subject_key)
-
-        if stage_key:
-            query = query.eq("stage_key", stage_key)
-
-        if q:
-            query = query.ilike("source_slug", f"%{q}%")
-
-        resp = query.order("subject").range(offset, offset + limit - 1).execute()
 
-        # Supabase Python client raises exceptions on error, doesn't set resp.error
-        # So we can directly use resp.data
-        data = resp.data or []
-        total = resp.count if hasattr(resp, 'count') else len(data)
-
-        courses = []
-        for course in data:
-            provider_data = course.get("external_providers")
-            if isinstance(provider_data, list) and len(provider_data) > 0:
-                provider_data = provider_data[0]
-            elif not provider_data:
-                provider_data = {}
+            if provider_id:
+                query = query.eq("provider_id", provider_id)
+
+            if subject:
+                query = query.eq("subject", subject)
+
+            if subject_key:
+                query = query.eq("subject_key", subject_key)
+
+            if stage_key:
+                query = query.eq("stage_key", stage_key)
+
+            if q:
+                query = query.ilike("source_slug", f"%{q}%")
+
+            resp = await query.order("subject").range(offset, offset + limit - 1).execute()
+
+            # Supabase Python client raises exceptions on error, doesn't set resp.error
+            # So we can directly use resp.data
+            data = resp.data or []
+            total = resp.count if hasattr(resp, 'count') else len(data)
+
+            courses = []
+            for course in data:
+                provider_data = course.get("external_providers")
+                if isinstance(provider_data, list) and len(provider_data) > 0:
+                    provider_data = provider_data[0]
+                elif not provider_data:
+                    provider_data = {}
+
+                course_obj = CourseOut(
+                    id=course["id"],
+                    provider_name=provider_data.get("name", "Unknown"),
+                    subject=course.get("subject"),
+                    grade_band=course.get("grade_band"),
+                    lesson_count=course.get("lesson_count"),
+                    public_url=course["public_url"],
+                    license=provider_data.get("license"),
+                    attribution_text=provider_data.get("attribution_text"),
+                    subject_key=course.get("subject_key"),
+                    stage_key=course.get("stage_key"),
+                )
+                courses.append(course_obj.dict())
 
-            course_obj = CourseOut(
-                id=course["id"],
-                provider_name=provider_data.get("name", "Unknown"),
-                subject=course.get("subject"),
-                grade_band=course.get("grade_band"),
-                lesson_count=course.get("lesson_count"),
-                public_url=course["public_url"],
-                license=provider_data.get("license"),
-                attribution_text=provider_data.get("attribution_text"),
-                subject_key=course.get("subject_key"),
-                stage_key=course.get("stage_key"),
-            )
-            courses.append(course_obj.dict())
+            return {
+                "items": courses,
+                "total": total,
+                "limit": limit,
+                "offset": offset,
+            }
 
-        result = {
-            "items": courses,
-            "total": total,
-            "limit": limit,
-            "offset": offset,
-        }
-        set_cached(cache_key, result, ttl_seconds=60)
-        increment_counter("courses_cache_miss")
-        increment_counter("courses_total_requests")
-        log_event("external.courses.fetch", total=total, limit=limit, offset=offset, user_email=_user.get("email"))
-        return result
+        # Concurrent misses for the same page share one database load
+        result = await get_or_load(
+            cache_key, _load_courses, ttl_seconds=COURSES_CACHE_TTL, hard_ttl_seconds=COURSES_CACHE_HARD_TTL
+        )
+        if loaded:
+            increment_counter("courses_cache_miss")
+            increment_counter("courses_total_requests")
+            log_event("external.courses.fetch", total=result["total"], limit=limit, offset=offset, user_email=_user.get("email"))
+        else:
+            increment_counter("courses_cache_hits")
+            log_event("external.courses.cached", user_email=_user.get("email"), offset=offset, limit=limit)
+        # Items were built through CourseOut when the page was loaded
+        return trusted_json(result)
     except Exception as e:
         # If table doesn't exist, return empty array instead of error
         error_msg = str(e)
@@ -222,85 +240,96 @@ async def list_courses(
 @router.get("/courses/{course_id}/outline", response_model=OutlineOut)
 async def course_outline(
     course_id: str,
+    request: Request,
     _: dict = Depends(get_current_user),
     __: None = Depends(rate_limiter),
 ):
     """Get course outline (units and lessons)"""
     try:
         cache_key = f"outline:{course_id}"
-        cached_outline = get_cached(cache_key)
-        if cached_outline:
-            increment_counter("outline_cache_hits")
-            log_event("external.outline.cached", course_id=course_id, user_email=_["email"])
-            return cached_outline
-
-        supabase = get_admin_client()
-
-        # Get course header
-        course_resp = supabase.table("external_courses").select(
-            """
-            id,
-            subject,
-            grade_band,
-            public_url,
-            external_providers (
-                name
-            )
-            """
-        ).eq("id", course_id).single().execute()
-
-        if not course_resp.data:
-            raise HTTPException(status_code=404, detail="Course not found")
-
-        course_data = course_resp.data
-        provider_data = course_data.get("external_providers")
-        if isinstance(provider_data, list) and len(provider_data) > 0:
-            provider_data = provider_data[0]
-        elif not provider_data:
-            provider_data = {}
-
-        # Get units
-        units_resp = supabase.table("external_units").select(
-            "id, ordinal, title_safe, public_url"
-        ).eq("course_id", course_id).order("ordinal").execute()
-
-        units = []
-        for unit in units_resp.data or []:
-            # Get lessons for this unit
-            lessons_resp = supabase.table("external_lessons").select(
-                "id, ordinal, title_safe, resource_type, public_url"
-            ).eq("unit_id", unit["id"]).order("ordinal").execute()
-
-            lessons = [
-                LessonOut(
-                    id=lesson["id"],
-                    ordinal=lesson["ordinal"],
-                    title_safe=lesson["title_safe"],
-                    resource_type=lesson.get("resource_type"),
-                    public_url=lesson["public_url"],
+        loaded = False
+
+        async def _load_outline():
+            nonlocal loaded
+            loaded = True
+            supabase = get_async_client()
+
+            # Get course header
+            course_resp = await supabase.table("external_courses").select(
+                """
+                id,
+                subject,
+                grade_band,
+                public_url,
+                external_providers (
+                    name
                 )
-                for lesson in lessons_resp.data or []
-            ]
-
-            units.append(UnitOut(
-                ordinal=unit["ordinal"],
-                title_safe=unit["title_safe"],
-                public_url=unit.get("public_url"),
-                lessons=lessons,
-            ))
-
-        outline_payload = OutlineOut(
-            course_id=course_data["id"],
-            provider_name=provider_data.get("name", "Unknown"),
-            subject=course_data.get("subject"),
-            grade_band=course_data.get("grade_band"),
-            public_url=course_data["public_url"],
-            units=units,
+                """
+            ).eq("id", course_id).single().execute()
+
+            if not course_resp.data:
+                raise HTTPException(status_code=404, detail="Course not found")
+
+            course_data = course_resp.data
+            provider_data = course_data.get("external_providers")
+            if isinstance(provider_data, list) and len(provider_data) > 0:
+                provider_data = provider_data[0]
+            elif not provider_data:
+                provider_data = {}
+
+            # Get units
+            units_resp = await supabase.table("external_units").select(
+                "id, ordinal, title_safe, public_url"
+            ).eq("course_id", course_id).order("ordinal").execute()
+
+            units = []
+            for unit in units_resp.data or []:
+                # Get lessons for this unit
+                lessons_resp = await supabase.table("external_lessons").select(
+                    "id, ordinal, title_safe, resource_type, public_url"
+                ).eq("unit_id", unit["id"]).order("ordinal").execute()
+
+                lessons = [
+                    LessonOut(
+                        id=lesson["id"],
+                        ordinal=lesson["ordinal"],
+                        title_safe=lesson["title_safe"],
+                        resource_type=lesson.get("resource_type"),
+                        public_url=lesson["public_url"],
+                    )
+                    for lesson in lessons_resp.data or []
+                ]
+
+                units.append(UnitOut(
+                    ordinal=unit["ordinal"],
+                    title_safe=unit["title_safe"],
+                    public_url=unit.get("public_url"),
+                    lessons=lessons,
+                ))
+
+            return OutlineOut(
+                course_id=course_data["id"],
+                provider_name=provider_data.get("name", "Unknown"),
+                subject=course_data.get("subject"),
+                grade_band=course_data.get("grade_band"),
+                public_url=course_data["public_url"],
+                units=units,
+            ).model_dump(mode="json")
+
+        outline_payload = await get_or_load(
+            cache_key,
+            _load_outline,
+            ttl_seconds=OUTLINE_CACHE_TTL,
+            tags=[course_tag(course_id)],
+            hard_ttl_seconds=OUTLINE_CACHE_HARD_TTL,
         )
-        set_cached(cache_key, outline_payload, ttl_seconds=120)
-        increment_counter("outline_cache_miss")
-        log_event("external.outline.fetch", course_id=course_id, user_email=_["email"])
-        return outline_payload
+        if loaded:
+            increment_counter("outline_cache_miss")
+            log_event("external.outline.fetch", course_id=course_id, user_email=_["email"])
+        else:
+            increment_counter("outline_cache_hits")
+            log_event("external.outline.cached", course_id=course_id, user_email=_["email"])
+        return conditional_json(request, outline_payload)
     except HTTPException:
         raise
     except Exception as e:
@@ -316,15 +345,15 @@ async def schedule_course(
 ):
     """Schedule an external course"""
     try:
-        supabase = get_admin_client()
-        family_id = get_family_id_for_user(current_user["id"])
+        supabase = get_async_client()
+        family_id = await get_family_id_for_user(current_user["id"])
         if not family_id or family_id != body.family_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-        if not child_belongs_to_family(body.child_id, family_id):
+        if not await child_belongs_to_family(body.child_id, family_id):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Child not in family")
 
-        resp = supabase.rpc(
+        resp = await supabase.rpc(
             "schedule_external_course",
             {
                 "p_family_id": body.family_id,
@@ -354,12 +383,12 @@ async def list_progress(
     user=Depends(get_current_user),
     __: None = Depends(rate_limiter),
 ):
-    family_id = get_family_id_for_user(user["id"])
-    if not family_id or not child_belongs_to_family(child_id, family_id):
+    family_id = await get_family_id_for_user(user["id"])
+    if not family_id or not await child_belongs_to_family(child_id, family_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-    supabase = get_admin_client()
-    resp = supabase.table("external_lesson_progress").select(
+    supabase = get_async_client()
+    resp = await supabase.table("external_lesson_progress").select(
         "external_lesson_id,status,started_at,completed_at"
     ).eq("family_id", family_id).eq("child_id", child_id).execute()
 
@@ -376,11 +405,11 @@ async def upsert_progress(
     __: None = Depends(rate_limiter),
 ):
     payload.validate_status()
-    family_id = get_family_id_for_user(user["id"])
-    if not family_id or not child_belongs_to_family(payload.child_id, family_id):
+    family_id = await get_family_id_for_user(user["id"])
+    if not family_id or not await child_belongs_to_family(payload.child_id, family_id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-    supabase = get_admin_client()
+    supabase = get_async_client()
     now_iso = datetime.utcnow().isoformat()
     upsert_payload = {
         "family_id": family_id,
@@ -393,7 +422,7 @@ async def upsert_progress(
     if payload.status == "done":
         upsert_payload["completed_at"] = now_iso
 
-    resp = supabase.table("external_lesson_progress").upsert(upsert_payload).execute()
+    resp = await supabase.table("external_lesson_progress").upsert(upsert_payload).execute()
     increment_counter("progress_updates")
     log_event("external.progress.upsert", child_id=payload.child_id, lesson_id=payload.external_lesson_id, status=payload.status, user_email=user.get("email"))
     return resp.data[0] if resp.data else upsert_payload
@@ -404,7 +433,17 @@ async def external_metrics(user=Depends(get_current_user)):
     email = user.get("email")
     if ALLOWED_METRICS_EMAILS and (email not in ALLOWED_METRICS_EMAILS):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return get_metrics()
+    return await run_state_io(get_state_backend(), _collect_metrics)
+
+
+def _collect_metrics() -> dict:
+    """Metrics plus cache and rate-limiter stats; reads the shared state backend."""
+    metrics = get_metrics()
+    for name in cache_names():
+        prefix = "cache_" if name == "default" else f"cache_{name}_"
+        metrics.update({f"{prefix}{k}": v for k, v in cache_stats(name).items()})
+    metrics.update({f"rate_limit_{k}": v for k, v in rate_limiter_stats().items()})
+    return metrics
 
 
 @router.post("/refresh")
@@ -520,6 +559,7 @@ def paraphrase_title(raw: str) -> str:
 
 def fetch_youtube_video_meta(video_id: str) -> dict:
     """Fetch video metadata from YouTube API."""
+    import requests  # imported on first use; not needed at startup
     if not YOUTUBE_API_KEY:
         raise HTTPException(status_code=500, detail="Missing YOUTUBE_API_KEY")
     
@@ -563,6 +603,7 @@ def fetch_youtube_video_meta(video_id: str) -> dict:
 
 def fetch_youtube_playlist_items(playlist_id: str) -> List[dict]:
     """Fetch all items from a YouTube playlist."""
+    import requests
     if not YOUTUBE_API_KEY:
         raise HTTPException(status_code=500, detail="Missing YOUTUBE_API_KEY")
     
@@ -626,6 +667,7 @@ def fetch_youtube_playlist_items(playlist_id: str) -> List[dict]:
 
 def fetch_youtube_playlist_title(playlist_id: str) -> str:
     """Fetch playlist title."""
+    import requests
     if not YOUTUBE_API_KEY:
         raise HTTPException(status_code=500, detail="Missing YOUTUBE_API_KEY")
     
@@ -697,7 +739,7 @@ async def add_from_link(
     
     try:
         # Validate family access
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id or family_id != body.family_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -705,7 +747,7 @@ async def add_from_link(
             )
         
         # Validate child if provided
-        if body.child_id and not child_belongs_to_family(body.child_id, family_id):
+        if body.child_id and not await child_belongs_to_family(body.child_id, family_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Forbidden: Child not in family"
@@ -717,15 +759,15 @@ async def add_from_link(
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Handle video
         if kind == "video":
-            meta = fetch_youtube_video_meta(yt_id)
+            meta = await run_blocking(fetch_youtube_video_meta, yt_id)
             minutes = math.ceil((meta["seconds"] or 0) / 60) if meta["seconds"] else None
             
             # Upsert item
-            item_resp = supabase.table("family_youtube_items").upsert({
+            item_resp = await supabase.table("family_youtube_items").upsert({
                 "family_id": family_id,
                 "kind": "video",
                 "yt_id": yt_id,
@@ -740,7 +782,7 @@ async def add_from_link(
                 raise HTTPException(status_code=500, detail="Failed to create item")
             
             # Upsert single lesson
-            lesson_resp = supabase.table("family_youtube_lessons").upsert({
+            lesson_resp = await supabase.table("family_youtube_lessons").upsert({
                 "item_id": item["id"],
                 "ordinal": 1,
                 "title_safe": paraphrase_title(meta["title"]),
@@ -753,7 +795,7 @@ async def add_from_link(
             
             # Schedule if requested
             if body.child_id and body.start_date:
-                scheduled_events = schedule_youtube_lessons(
+                scheduled_events = await schedule_youtube_lessons(
                     supabase=supabase,
                     family_id=family_id,
                     child_id=body.child_id,
@@ -779,14 +821,14 @@ async def add_from_link(
         
         # Handle playlist
         if kind == "playlist":
-            items = fetch_youtube_playlist_items(yt_id)
+            items = await run_blocking(fetch_youtube_playlist_items, yt_id)
             if not items:
                 raise HTTPException(status_code=404, detail="Playlist is empty or unavailable")
             
-            playlist_title = fetch_youtube_playlist_title(yt_id)
+            playlist_title = await run_blocking(fetch_youtube_playlist_title, yt_id)
             
             # Upsert item
-            item_resp = supabase.table("family_youtube_items").upsert({
+            item_resp = await supabase.table("family_youtube_items").upsert({
                 "family_id": family_id,
                 "kind": "playlist",
                 "yt_id": yt_id,
@@ -817,7 +859,7 @@ async def add_from_link(
             # Batch upsert lessons
             for i in range(0, len(lessons_payload), 500):
                 chunk = lessons_payload[i:i+500]
-                supabase.table("family_youtube_lessons").upsert(
+                await supabase.table("family_youtube_lessons").upsert(
                     chunk,
                     on_conflict="item_id,ordinal"
                 ).execute()
@@ -827,7 +869,7 @@ async def add_from_link(
             
             # Schedule if requested
             if body.child_id and body.start_date:
-                scheduled_events = schedule_youtube_lessons(
+                scheduled_events = await schedule_youtube_lessons(
                     supabase=supabase,
                     family_id=family_id,
                     child_id=body.child_id,
@@ -874,7 +916,7 @@ async def add_link(
     
     try:
         # Get family_id from user
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -882,7 +924,7 @@ async def add_link(
             )
         
         # Validate child belongs to family
-        if not child_belongs_to_family(body.child_id, family_id):
+        if not await child_belongs_to_family(body.child_id, family_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Forbidden: Child not in family"
@@ -902,12 +944,12 @@ async def add_link(
             )
         
         # Fetch YouTube video metadata
-        meta = fetch_youtube_video_meta(yt_id)
+        meta = await run_blocking(fetch_youtube_video_meta, yt_id)
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Call RPC to create course/lesson and backlog task
-        rpc_result = supabase.rpc(
+        rpc_result = await supabase.rpc(
             "add_external_link",
             {
                 "p_family_id": family_id,
@@ -951,7 +993,7 @@ async def add_link(
         )
 
 
-def schedule_youtube_lessons(
+async def schedule_youtube_lessons(
     supabase,
     family_id: str,
     child_id: str,
@@ -964,7 +1006,7 @@ def schedule_youtube_lessons(
 ) -> int:
     """Schedule YouTube lessons as events."""
     # Get lessons ordered by ordinal
-    lessons_resp = supabase.table("family_youtube_lessons").select(
+    lessons_resp = await supabase.table("family_youtube_lessons").select(
         "id, ordinal, est_minutes"
     ).eq("item_id", item_id).order("ordinal", desc=False).execute()
     
@@ -997,13 +1039,13 @@ def schedule_youtube_lessons(
         end_datetime = start_datetime + timedelta(minutes=minutes)
         
         # Check for existing event (idempotency)
-        existing = supabase.table("events").select("id").eq(
+        existing = await supabase.table("events").select("id").eq(
             "child_id", child_id
         ).eq("family_youtube_lesson_id", lesson["id"]).limit(1).execute()
         
         if not existing.data:
             # Insert event
-            supabase.table("events").insert({
+            await supabase.table("events").insert({
                 "family_id": family_id,
                 "child_id": child_id,
                 "start_ts": start_datetime.isoformat(),
@@ -1021,5 +1063,7 @@ def schedule_youtube_lessons(
             v_dow += 1
             current_date = target_date + timedelta(days=1)
     
+    if placed:
+        await invalidate_async(family_id=family_id, child_ids=[child_id])
     return placed
 
@@ -19,8 +19,9 @@ if str(backend_dir) not in sys.path:
 
 from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user, child_belongs_to_family
+from identity import IdentityContext, get_identity, invalidate_identity
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api/family", tags=["family"])
 
@@ -70,21 +71,21 @@ async def get_family_members(
     log_event("family.get_members.start", user_id=user["id"])
 
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
 
-        supabase = get_admin_client()
+        supabase = get_async_client()
 
         # Get family name (if available)
-        family_res = supabase.table("family").select("name").eq("id", family_id).single().execute()
+        family_res = await supabase.table("family").select("name").eq("id", family_id).single().execute()
         family_name = family_res.data.get("name") if family_res.data else None
 
         # Get children
-        children_res = supabase.table("children").select("id, first_name").eq("family_id", family_id).eq("archived", False).execute()
+        children_res = await supabase.table("children").select("id, first_name").eq("family_id", family_id).eq("archived", False).execute()
         children = []
         for child in (children_res.data or []):
             first_name = child.get("first_name") or "Child"
@@ -95,7 +96,7 @@ async def get_family_members(
             ))
 
         # Get family members
-        members_res = supabase.table("family_members").select(
+        members_res = await supabase.table("family_members").select(
             "id, user_id, member_role, child_scope"
         ).eq("family_id", family_id).execute()
 
@@ -103,7 +104,7 @@ async def get_family_members(
         user_ids = [m.get("user_id") for m in (members_res.data or []) if m.get("user_id")]
         profiles_map = {}
         if user_ids:
-            profiles_res = supabase.table("profiles").select("id, email").in_("id", user_ids).execute()
+            profiles_res = await supabase.table("profiles").select("id, email").in_("id", user_ids).execute()
             for profile in (profiles_res.data or []):
                 profiles_map[profile["id"]] = profile.get("email")
 
@@ -154,18 +155,18 @@ async def invite_tutor(
     log_event("family.invite_tutor.start", user_id=user["id"], email=body.email, child_ids=body.child_ids)
 
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
 
-        supabase = get_admin_client()
+        supabase = get_async_client()
 
         # Verify current user is a parent
         # Use maybe_single() instead of single() to handle case where user doesn't have a family_members row yet
-        current_member_res = supabase.table("family_members").select("member_role").eq("user_id", user["id"]).eq("family_id", family_id).maybe_single().execute()
+        current_member_res = await supabase.table("family_members").select("member_role").eq("user_id", user["id"]).eq("family_id", family_id).maybe_single().execute()
         is_parent = False
         
         # Check family_members first
@@ -173,7 +174,7 @@ async def invite_tutor(
             is_parent = True
         else:
             # Fallback: check profiles.role
-            profile_res = supabase.table("profiles").select("role").eq("id", user["id"]).maybe_single().execute()
+            profile_res = await supabase.table("profiles").select("role").eq("id", user["id"]).maybe_single().execute()
             if profile_res and profile_res.data and profile_res.data.get("role") == 'parent':
                 is_parent = True
         
@@ -194,7 +195,7 @@ async def invite_tutor(
                     detail="Tutors must have access to at least one child"
                 )
             for child_id in body.child_ids:
-                if not child_belongs_to_family(child_id, family_id):
+                if not await child_belongs_to_family(child_id, family_id):
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail=f"Child ID {child_id} does not belong to your family"
@@ -206,7 +207,7 @@ async def invite_tutor(
                     detail="Child invites must specify exactly one child record"
                 )
             child_id = body.child_ids[0]
-            if not child_belongs_to_family(child_id, family_id):
+            if not await child_belongs_to_family(child_id, family_id):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Child ID {child_id} does not belong to your family"
@@ -229,9 +230,9 @@ async def invite_tutor(
         log_event("family.invite_tutor.starting", user_id=user["id"], method="rpc_first")
         
         # Ensure we're using the admin client (service_role) to bypass RLS
-        log_event("family.invite_tutor.before_get_admin_client", user_id=user["id"])
-        supabase = get_admin_client()
-        log_event("family.invite_tutor.after_get_admin_client", user_id=user["id"])
+        log_event("family.invite_tutor.before_get_async_client", user_id=user["id"])
+        supabase = get_async_client()
+        log_event("family.invite_tutor.after_get_async_client", user_id=user["id"])
         
         log_event("family.invite_tutor.before_try_block", user_id=user["id"])
         try:
@@ -248,7 +249,7 @@ async def invite_tutor(
             # PostgREST may raise APIError or other exceptions
             try:
                 log_event("family.invite_tutor.about_to_call_rpc", user_id=user["id"])
-                rpc_result = supabase.rpc(
+                rpc_result = await supabase.rpc(
                     "create_family_invite",
                     {
                         "p_family_id": family_id,
@@ -376,7 +377,7 @@ async def invite_tutor(
             # Try direct insert as fallback
             log_event("family.invite_tutor.direct_insert_fallback", user_id=user["id"])
             try:
-                invite_res = supabase.table("invites").insert({
+                invite_res = await supabase.table("invites").insert({
                     "family_id": family_id,
                     "email": body.email,
                     "token": token,
@@ -396,7 +397,7 @@ async def invite_tutor(
                 else:
                     # Try to fetch by token
                     log_event("family.invite_tutor.fetch_by_token_fallback", user_id=user["id"], token=token[:8])
-                    fetch_res = supabase.table("invites").select("id, token").eq("token", token).limit(1).execute()
+                    fetch_res = await supabase.table("invites").select("id, token").eq("token", token).limit(1).execute()
                     if fetch_res.data and len(fetch_res.data) > 0:
                         invite = fetch_res.data[0]
                         log_event("family.invite_tutor.fetch_success", user_id=user["id"], invite_id=invite.get("id"))
@@ -469,6 +470,7 @@ async def update_tutor_scope(
     member_id: str,
     body: UpdateTutorScopeIn,
     user: dict = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     __: None = Depends(rate_limiter),
 ):
     """
@@ -478,27 +480,24 @@ async def update_tutor_scope(
     log_event("family.update_tutor_scope.start", user_id=user["id"], member_id=member_id, child_ids=body.child_ids)
 
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = identity.family_id
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
 
-        supabase = get_admin_client()
+        supabase = get_async_client()
 
         # Verify current user is a parent
-        current_member_res = supabase.table("family_members").select("member_role").eq("user_id", user["id"]).eq("family_id", family_id).single().execute()
-        if not current_member_res.data or current_member_res.data.get("member_role") != 'parent':
-            profile_res = supabase.table("profiles").select("role").eq("id", user["id"]).single().execute()
-            if not profile_res.data or profile_res.data.get("role") != 'parent':
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Only parents can update tutor access"
-                )
+        if not identity.is_parent:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only parents can update tutor access"
+            )
 
         # Verify member exists and is a tutor in this family
-        member_res = supabase.table("family_members").select("*").eq("id", member_id).eq("family_id", family_id).single().execute()
+        member_res = await supabase.table("family_members").select("*").eq("id", member_id).eq("family_id", family_id).single().execute()
         if not member_res.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -511,16 +510,20 @@ async def update_tutor_scope(
                 detail="Member is not a tutor"
             )
 
-        # Validate child_ids belong to family
-        for child_id in body.child_ids:
-            if not child_belongs_to_family(child_id, family_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Child ID {child_id} does not belong to your family"
-                )
+        # Validate child_ids belong to family (cached list first, one query for the rest)
+        unknown_ids = [cid for cid in body.child_ids if not identity.can_access_child(cid)]
+        if unknown_ids:
+            known_res = await supabase.table("children").select("id").eq("family_id", family_id).in_("id", unknown_ids).execute()
+            known_ids = {c["id"] for c in (known_res.data or [])}
+            for child_id in unknown_ids:
+                if child_id not in known_ids:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Child ID {child_id} does not belong to your family"
+                    )
 
         # Update child_scope
-        update_res = supabase.table("family_members").update({
+        update_res = await supabase.table("family_members").update({
             "child_scope": body.child_ids,
             "updated_at": datetime.now().isoformat()
         }).eq("id", member_id).select("*").single().execute()
@@ -532,9 +535,12 @@ async def update_tutor_scope(
             )
 
         # Get profile email for response
-        profile_res = supabase.table("profiles").select("email").eq("id", update_res.data["user_id"]).single().execute()
+        profile_res = await supabase.table("profiles").select("email").eq("id", update_res.data["user_id"]).single().execute()
         email = profile_res.data.get("email") if profile_res.data else None
 
+        # The tutor's accessible children changed
+        invalidate_identity(user_id=update_res.data.get("user_id"))
+
         log_event("family.update_tutor_scope.success", user_id=user["id"], member_id=member_id)
 
         return MemberOut(
@@ -4,16 +4,16 @@ import urllib.parse
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 
-import requests
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from pydantic import BaseModel, Field
 
 from auth import get_current_user, rate_limiter
 from cache import get_cached, set_cached
+from state_backend import get_state_backend, run_state_io
 from helpers import get_family_id_for_user
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client, run_blocking
 from google_calendar_service import (
     get_credential,
     upsert_credential,
@@ -41,9 +41,11 @@ def _get_google_client() -> tuple[str, str, str]:
     return client_id, client_secret, redirect_uri
 
 
-def _build_state(user_id: str, family_id: str) -> str:
+async def _build_state(user_id: str, family_id: str) -> str:
     state = secrets.token_urlsafe(24)
-    set_cached(
+    await run_state_io(
+        get_state_backend(),
+        set_cached,
         f"google_oauth_state:{state}",
         {"user_id": user_id, "family_id": family_id},
         ttl_seconds=STATE_TTL_SECONDS,
@@ -53,11 +55,11 @@ def _build_state(user_id: str, family_id: str) -> str:
 
 @router.get("/status")
 async def get_status(user=Depends(get_current_user), _: None = Depends(rate_limiter)):
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(status_code=400, detail="Family not found")
 
-    credential = get_credential(user["id"], family_id)
+    credential = await run_blocking(get_credential, user["id"], family_id)
     if not credential:
         return {"connected": False}
 
@@ -76,12 +78,12 @@ async def start_oauth(
     user=Depends(get_current_user),
     _: None = Depends(rate_limiter),
 ):
-    resolved_family_id = family_id or get_family_id_for_user(user["id"])
+    resolved_family_id = family_id or await get_family_id_for_user(user["id"])
     if not resolved_family_id:
         raise HTTPException(status_code=400, detail="Family not found")
 
     client_id, _, redirect_uri = _get_google_client()
-    state = _build_state(user["id"], resolved_family_id)
+    state = await _build_state(user["id"], resolved_family_id)
 
     scope_param = " ".join(DEFAULT_SCOPES)
     query = {
@@ -101,8 +103,9 @@ async def start_oauth(
 
 @router.get("/oauth/callback")
 async def oauth_callback(state: str, code: Optional[str] = None, error: Optional[str] = None):
+    import requests  # imported on first use; not needed at startup
     cache_key = f"google_oauth_state:{state}"
-    state_value = get_cached(cache_key)
+    state_value = await run_state_io(get_state_backend(), get_cached, cache_key)
     if not state_value:
         raise HTTPException(status_code=400, detail="Invalid or expired OAuth state")
 
@@ -120,7 +123,7 @@ async def oauth_callback(state: str, code: Optional[str] = None, error: Optional
         "grant_type": "authorization_code",
     }
 
-    token_resp = requests.post(TOKEN_URL, data=data, timeout=20)
+    token_resp = await run_blocking(requests.post, TOKEN_URL, data=data, timeout=20)
     if token_resp.status_code != 200:
         log_event("google.oauth.token_failed", status=token_resp.status_code, body=token_resp.text)
         raise HTTPException(status_code=500, detail="Failed to exchange code for tokens")
@@ -137,16 +140,17 @@ async def oauth_callback(state: str, code: Optional[str] = None, error: Optional
     scope = token_data.get("scope")
     scope_list = scope.split(" ") if isinstance(scope, str) else DEFAULT_SCOPES
 
-    email = fetch_account_email(access_token) if access_token else None
+    email = await run_blocking(fetch_account_email, access_token) if access_token else None
 
     # Preserve existing refresh token if Google did not return a new one
     user_id = state_value["user_id"]
     family_id = state_value["family_id"]
-    existing = get_credential(user_id, family_id)
+    existing = await run_blocking(get_credential, user_id, family_id)
     if existing and not refresh_token:
         refresh_token = existing.get("refresh_token")
 
-    upsert_credential(
+    await run_blocking(
+        upsert_credential,
         user_id,
         family_id,
         {
@@ -178,13 +182,13 @@ async def oauth_callback(state: str, code: Optional[str] = None, error: Optional
 
 @router.delete("/credential")
 async def disconnect(user=Depends(get_current_user), _: None = Depends(rate_limiter)):
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(status_code=400, detail="Family not found")
 
-    supabase = get_admin_client()
+    supabase = get_async_client()
     log_event("google.disconnect", user_id=user["id"], family_id=family_id)
-    supabase.table("google_calendar_credentials").delete().eq("user_id", user["id"]).eq("family_id", family_id).execute()
+    await supabase.table("google_calendar_credentials").delete().eq("user_id", user["id"]).eq("family_id", family_id).execute()
     return {"disconnected": True}
 
 
@@ -203,16 +207,16 @@ class SyncRequest(BaseModel):
 
 @router.post("/push_event")
 async def push_event(body: PushEventRequest, user=Depends(get_current_user), _: None = Depends(rate_limiter)):
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(status_code=400, detail="Family not found")
 
-    credential = get_credential(user["id"], family_id)
+    credential = await run_blocking(get_credential, user["id"], family_id)
     if not credential:
         raise HTTPException(status_code=400, detail="Google Calendar not connected")
 
-    supabase = get_admin_client()
-    event_resp = (
+    supabase = get_async_client()
+    event_resp = await (
         supabase
         .table("events")
         .select("id, family_id, title, description, notes, start_ts, end_ts")
@@ -226,7 +230,7 @@ async def push_event(body: PushEventRequest, user=Depends(get_current_user), _:
         raise HTTPException(status_code=404, detail="Event not found")
 
     try:
-        result = push_event_to_google(credential, event)
+        result = await run_blocking(push_event_to_google, credential, event)
     except Exception as exc:  # noqa: BLE001
         log_event("google.push_event.error", error=str(exc), event_id=body.event_id)
         raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -236,18 +240,18 @@ async def push_event(body: PushEventRequest, user=Depends(get_current_user), _:
 
 @router.post("/sync")
 async def sync_events(body: SyncRequest, user=Depends(get_current_user), _: None = Depends(rate_limiter)):
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(status_code=400, detail="Family not found")
 
-    credential = get_credential(user["id"], family_id)
+    credential = await run_blocking(get_credential, user["id"], family_id)
     if not credential:
         raise HTTPException(status_code=400, detail="Google Calendar not connected")
 
     start_iso = body.start or datetime.now(timezone.utc).isoformat()
     end_iso = body.end or (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
 
-    supabase = get_admin_client()
+    supabase = get_async_client()
     query = (
         supabase
         .table("events")
@@ -258,7 +262,7 @@ async def sync_events(body: SyncRequest, user=Depends(get_current_user), _: None
         .order("start_ts", desc=False)
         .limit(body.limit)
     )
-    resp = query.execute()
+    resp = await query.execute()
     events = resp.data or []
     if not events:
         return {"synced": 0, "results": []}
@@ -267,13 +271,13 @@ async def sync_events(body: SyncRequest, user=Depends(get_current_user), _: None
     failures = 0
     for event in events:
         try:
-            result = push_event_to_google(credential, event)
+            result = await run_blocking(push_event_to_google, credential, event)
             results.append({"event_id": event["id"], **result})
         except Exception as exc:  # noqa: BLE001
             failures += 1
             log_event("google.sync.event_failed", event_id=event["id"], error=str(exc))
 
-    supabase.table("google_calendar_sync_log").insert({
+    await supabase.table("google_calendar_sync_log").insert({
         "credential_id": credential["id"],
         "status": "success" if failures == 0 else "error",
         "message": f"Synced {len(events)} events ({failures} failures)",
@@ -287,16 +291,16 @@ async def sync_events(body: SyncRequest, user=Depends(get_current_user), _: None
 
 @router.post("/refresh-token")
 async def refresh_token(user=Depends(get_current_user), _: None = Depends(rate_limiter)):
-    family_id = get_family_id_for_user(user["id"])
+    family_id = await get_family_id_for_user(user["id"])
     if not family_id:
         raise HTTPException(status_code=400, detail="Family not found")
 
-    credential = get_credential(user["id"], family_id)
+    credential = await run_blocking(get_credential, user["id"], family_id)
     if not credential:
         raise HTTPException(status_code=400, detail="Google Calendar not connected")
 
     try:
-        updated = ensure_access_token(credential)
+        updated = await run_blocking(ensure_access_token, credential)
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -2,7 +2,7 @@
 FastAPI routes for calendar integrations and quota monitoring
 Part of Phase 6 - Parent/Child/Tutor Ecosystem + Integrations
 """
-from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
@@ -10,7 +10,6 @@ from datetime import datetime, timedelta
 import sys
 from pathlib import Path
 import os
-import requests
 import io
 
 # Add parent directory to path
@@ -20,8 +19,10 @@ if str(backend_dir) not in sys.path:
 
 from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user
+from http_cache import conditional_response, etag_for, not_modified
+from identity import IdentityContext, get_identity
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api/integrations", tags=["integrations"])
 
@@ -55,38 +56,12 @@ class IntegrationStatusOut(BaseModel):
 # Helper Functions
 # ============================================================
 
-def _check_parent_role(user_id: str, family_id: str, supabase) -> bool:
-    """Check if user is a parent in the family"""
-    try:
-        # Check family_members first
-        member_check = supabase.table("family_members").select("member_role").eq("family_id", family_id).eq("user_id", user_id).eq("member_role", "parent").single().execute()
-        if member_check.data:
-            return True
-    except Exception:
-        # If family_members query fails, fall through to profiles check
-        pass
-    
-    # Fallback: check profiles.role
-    try:
-        profile_check = supabase.table("profiles").select("role, family_id").eq("id", user_id).single().execute()
-        if profile_check.data:
-            profile_family_id = profile_check.data.get("family_id")
-            role = profile_check.data.get("role")
-            # Check if profile's family_id matches and role is parent (or null, which defaults to parent)
-            if profile_family_id == family_id:
-                return role == "parent" or role is None  # Default to parent if role is null
-    except Exception:
-        pass
-    
-    # Final fallback: if user has children in this family, assume they're a parent
-    try:
-        children_check = supabase.table("children").select("id").eq("family_id", family_id).limit(1).execute()
-        if children_check.data:
-            return True  # Permissive: if they can see children, allow access
-    except Exception:
-        pass
-    
-    return False
+def _check_parent_role(identity: IdentityContext, family_id: str) -> bool:
+    """Check if user is a parent in the family (family_members role, else profiles.role)"""
+    if identity.family_id != family_id:
+        return False
+    # Integrations have always treated a profile without a role as a parent
+    return identity.is_parent or identity.profile_role is None
 
 
 def _generate_ics_content(events: List[Dict[str, Any]], title: str = "Learnadoodle Calendar") -> str:
@@ -109,8 +84,9 @@ def _generate_ics_content(events: List[Dict[str, Any]], title: str = "Learnadood
         dtend = end_dt.strftime("%Y%m%dT%H%M%SZ")
         
         # Escape special characters in description
-        description = event.get("description", "").replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
-        title_text = event.get("title", "Event").replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+        # Nullable columns come back as None, not missing
+        description = (event.get("description") or "").replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+        title_text = (event.get("title") or "Event").replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
         
         lines.extend([
             "BEGIN:VEVENT",
@@ -134,6 +110,7 @@ def _generate_ics_content(events: List[Dict[str, Any]], title: str = "Learnadood
 @router.get("/status")
 async def get_integration_status(
     user: dict = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     __: None = Depends(rate_limiter),
 ):
     """
@@ -141,17 +118,17 @@ async def get_integration_status(
     Only accessible to parents.
     """
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = identity.family_id
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Verify user is a parent
-        if not _check_parent_role(user["id"], family_id, supabase):
+        if not _check_parent_role(identity, family_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only parents can view integrations"
@@ -160,7 +137,7 @@ async def get_integration_status(
         # Get calendar integrations
         integrations = {}
         try:
-            integrations_res = supabase.table("calendar_integrations").select("*").eq("family_id", family_id).execute()
+            integrations_res = await supabase.table("calendar_integrations").select("*").eq("family_id", family_id).execute()
             integrations = {i["provider"]: i for i in (integrations_res.data or [])}
         except Exception as e:
             log_event("integrations.status.calendar_integrations_query_failed", user_id=user["id"], error=str(e))
@@ -169,7 +146,7 @@ async def get_integration_status(
         # Get Google Calendar status (from google_calendar_credentials if exists)
         google_email = None
         try:
-            google_cred_res = supabase.table("google_calendar_credentials").select("account_email").eq("family_id", family_id).limit(1).execute()
+            google_cred_res = await supabase.table("google_calendar_credentials").select("account_email").eq("family_id", family_id).limit(1).execute()
             if google_cred_res.data and len(google_cred_res.data) > 0:
                 google_email = google_cred_res.data[0].get("account_email")
         except Exception as e:
@@ -239,6 +216,7 @@ async def get_integration_status(
 @router.get("/youtube/quota", response_model=YouTubeQuotaOut)
 async def get_youtube_quota_info(
     user: dict = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     __: None = Depends(rate_limiter),
 ):
     """
@@ -246,17 +224,15 @@ async def get_youtube_quota_info(
     Accessible to parents only.
     """
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = identity.family_id
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
         
-        supabase = get_admin_client()
-        
         # Verify user is a parent
-        if not _check_parent_role(user["id"], family_id, supabase):
+        if not _check_parent_role(identity, family_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only parents can view quota information"
@@ -301,6 +277,7 @@ async def get_youtube_quota_info(
 @router.get("/ics/family/{family_id}.ics")
 async def get_family_ics(
     family_id: str,
+    request: Request,
     user: dict = Depends(get_current_user),
     __: None = Depends(rate_limiter),
 ):
@@ -309,34 +286,31 @@ async def get_family_ics(
     Only accessible to family members.
     """
     try:
-        user_family_id = get_family_id_for_user(user["id"])
+        user_family_id = await get_family_id_for_user(user["id"])
         if not user_family_id or user_family_id != family_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Get family name
-        family_res = supabase.table("family").select("name").eq("id", family_id).single().execute()
+        family_res = await supabase.table("family").select("name").eq("id", family_id).single().execute()
         family_name = family_res.data.get("name", "Family") if family_res.data else "Family"
         
         # Get all future events for the family
         now = datetime.now().isoformat()
-        events_res = supabase.table("events").select("id, title, description, start_ts, end_ts, status").eq("family_id", family_id).gte("start_ts", now).order("start_ts").execute()
+        events_res = await supabase.table("events").select("id, title, description, start_ts, end_ts, status").eq("family_id", family_id).gte("start_ts", now).order("start_ts").execute()
         
         events = events_res.data or []
+        calendar_name = f"{family_name} Calendar"
+        headers = {"Content-Disposition": f'attachment; filename="learnadoodle-family-{family_id}.ics"'}
         
-        # Generate ICS content
-        ics_content = _generate_ics_content(events, f"{family_name} Calendar")
-        
-        return Response(
-            content=ics_content,
-            media_type="text/calendar",
-            headers={
-                "Content-Disposition": f'attachment; filename="learnadoodle-family-{family_id}.ics"'
-            }
+        # Calendar clients poll this; an unchanged feed is answered with a 304
+        etag = etag_for(calendar_name, events)
+        return not_modified(request, etag, headers) or conditional_response(
+            request, _generate_ics_content(events, calendar_name), "text/calendar", etag=etag, headers=headers
         )
         
     except HTTPException:
@@ -352,6 +326,7 @@ async def get_family_ics(
 @router.get("/ics/child/{child_id}.ics")
 async def get_child_ics(
     child_id: str,
+    request: Request,
     user: dict = Depends(get_current_user),
     __: None = Depends(rate_limiter),
 ):
@@ -360,10 +335,10 @@ async def get_child_ics(
     Only accessible to users who can access that child.
     """
     try:
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Get child info
-        child_res = supabase.table("children").select("id, first_name, family_id").eq("id", child_id).single().execute()
+        child_res = await supabase.table("children").select("id, first_name, family_id").eq("id", child_id).single().execute()
         if not child_res.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -374,7 +349,7 @@ async def get_child_ics(
         family_id = child["family_id"]
         
         # Verify user has access to this child
-        user_family_id = get_family_id_for_user(user["id"])
+        user_family_id = await get_family_id_for_user(user["id"])
         if not user_family_id or user_family_id != family_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -383,7 +358,7 @@ async def get_child_ics(
         
         # Check if user can access this specific child (using get_accessible_children RPC)
         try:
-            accessible_res = supabase.rpc(
+            accessible_res = await supabase.rpc(
                 "get_accessible_children",
                 {"_user_id": user["id"]}
             ).execute()
@@ -402,20 +377,16 @@ async def get_child_ics(
         
         # Get all future events for the child
         now = datetime.now().isoformat()
-        events_res = supabase.table("events").select("id, title, description, start_ts, end_ts, status").eq("child_id", child_id).gte("start_ts", now).order("start_ts").execute()
+        events_res = await supabase.table("events").select("id, title, description, start_ts, end_ts, status").eq("child_id", child_id).gte("start_ts", now).order("start_ts").execute()
         
         events = events_res.data or []
-        
-        # Generate ICS content
         child_name = child.get("first_name") or child.get("name", "Child")
-        ics_content = _generate_ics_content(events, f"{child_name} Calendar")
-        
-        return Response(
-            content=ics_content,
-            media_type="text/calendar",
-            headers={
-                "Content-Disposition": f'attachment; filename="learnadoodle-child-{child_id}.ics"'
-            }
+        calendar_name = f"{child_name} Calendar"
+        headers = {"Content-Disposition": f'attachment; filename="learnadoodle-child-{child_id}.ics"'}
+        
+        etag = etag_for(calendar_name, events)
+        return not_modified(request, etag, headers) or conditional_response(
+            request, _generate_ics_content(events, calendar_name), "text/calendar", etag=etag, headers=headers
         )
         
     except HTTPException:
@@ -432,6 +403,7 @@ async def get_child_ics(
 async def generate_apple_ics_url(
     child_id: Optional[str] = Query(None, description="Generate ICS URL for specific child (optional, default: family)"),
     user: dict = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     __: None = Depends(rate_limiter),
 ):
     """
@@ -440,17 +412,17 @@ async def generate_apple_ics_url(
     Returns the ICS URL that can be subscribed to in Apple Calendar.
     """
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = identity.family_id
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Verify user is a parent
-        if not _check_parent_role(user["id"], family_id, supabase):
+        if not _check_parent_role(identity, family_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only parents can generate ICS URLs"
@@ -464,7 +436,7 @@ async def generate_apple_ics_url(
             ics_url = f"{base_url}/api/integrations/ics/family/{family_id}.ics"
         
         # Store in calendar_integrations
-        supabase.table("calendar_integrations").upsert({
+        await supabase.table("calendar_integrations").upsert({
             "family_id": family_id,
             "provider": "apple",
             "ics_url": ics_url,
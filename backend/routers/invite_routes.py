@@ -18,8 +18,9 @@ if str(backend_dir) not in sys.path:
 
 from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user
+from identity import IdentityContext, get_identity, invalidate_identity
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api/invites", tags=["invites"])
 
@@ -65,13 +66,13 @@ def _generate_invite_token() -> str:
     return ''.join(secrets.choice(alphabet) for _ in range(32))
 
 
-def _validate_child_scope(supabase, family_id: str, child_scope: Optional[List[str]]) -> List[str]:
+async def _validate_child_scope(supabase, family_id: str, child_scope: Optional[List[str]]) -> List[str]:
     """Validate that all child IDs in scope belong to the family"""
     if not child_scope:
         return []
     
     # Query children to verify they belong to family
-    children_res = supabase.table("children").select("id").eq("family_id", family_id).in_("id", child_scope).execute()
+    children_res = await supabase.table("children").select("id").eq("family_id", family_id).in_("id", child_scope).execute()
     valid_child_ids = [c["id"] for c in (children_res.data or [])]
     
     if len(valid_child_ids) != len(child_scope):
@@ -92,6 +93,7 @@ def _validate_child_scope(supabase, family_id: str, child_scope: Optional[List[s
 async def create_invite(
     body: CreateInviteIn,
     user: dict = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     __: None = Depends(rate_limiter),
 ):
     """
@@ -101,25 +103,21 @@ async def create_invite(
     log_event("invite.create.start", user_id=user["id"], email=body.email, role=body.role)
     
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = identity.family_id
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Verify user is a parent in the family
-        member_check = supabase.table("family_members").select("member_role").eq("family_id", family_id).eq("user_id", user["id"]).eq("member_role", "parent").single().execute()
-        if not member_check.data:
-            # Fallback: check if user's profile has family_id (backward compatibility)
-            profile_check = supabase.table("profiles").select("id, family_id, role").eq("id", user["id"]).eq("family_id", family_id).single().execute()
-            if not profile_check.data or profile_check.data.get("role") != "parent":
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Only parents can create invites"
-                )
+        if not identity.is_parent:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only parents can create invites"
+            )
         
         # Validate child_scope for tutors
         validated_child_scope = []
@@ -129,10 +127,10 @@ async def create_invite(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Tutors must specify child_scope"
                 )
-            validated_child_scope = _validate_child_scope(supabase, family_id, body.child_scope)
+            validated_child_scope = await _validate_child_scope(supabase, family_id, body.child_scope)
         elif body.role == "child":
             # For children, find their child record and set scope
-            child_res = supabase.table("children").select("id").eq("family_id", family_id).limit(1).execute()
+            child_res = await supabase.table("children").select("id").eq("family_id", family_id).limit(1).execute()
             if child_res.data:
                 validated_child_scope = [child_res.data[0]["id"]]
         elif body.role == "parent":
@@ -146,7 +144,7 @@ async def create_invite(
         expires_at = (datetime.now() + timedelta(days=30)).isoformat()
         
         # Create invite
-        invite_res = supabase.table("invites").insert({
+        invite_res = await supabase.table("invites").insert({
             "family_id": family_id,
             "email": body.email,
             "role": body.role,
@@ -198,10 +196,10 @@ async def accept_invite(
     log_event("invite.accept.start", user_id=user["id"], token=body.token[:8])
     
     try:
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Call RPC to accept invite
-        result = supabase.rpc(
+        result = await supabase.rpc(
             "accept_invite",
             {
                 "p_token": body.token,
@@ -224,6 +222,8 @@ async def accept_invite(
             )
         
         log_event("invite.accept.success", user_id=user["id"], family_id=rpc_result.get("family_id"), role=rpc_result.get("role"))
+        # Membership changed: drop the cached role/scope for this user
+        invalidate_identity(user_id=user["id"])
         
         return AcceptInviteOut(
             success=True,
@@ -251,10 +251,10 @@ async def preview_invite(
     Used by the invite landing page to show what the user is accepting.
     """
     try:
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Get invite details
-        invite_res = supabase.table("invites").select(
+        invite_res = await supabase.table("invites").select(
             "id, family_id, email, role, child_scope, expires_at, accepted_at"
         ).eq("token", token).single().execute()
         
@@ -286,7 +286,7 @@ async def preview_invite(
         # Get family name
         family_name = None
         try:
-            family_res = supabase.table("family").select("name").eq("id", invite["family_id"]).single().execute()
+            family_res = await supabase.table("family").select("name").eq("id", invite["family_id"]).single().execute()
             if family_res.data:
                 family_name = family_res.data.get("name")
         except Exception:
@@ -296,7 +296,7 @@ async def preview_invite(
         child_names = []
         if invite.get("child_scope") and invite["role"] == "tutor":
             try:
-                children_res = supabase.table("children").select("id, first_name").in_("id", invite["child_scope"]).execute()
+                children_res = await supabase.table("children").select("id, first_name").in_("id", invite["child_scope"]).execute()
                 child_names = [
                     {"id": c["id"], "name": c.get("first_name") or "Child"}
                     for c in (children_res.data or [])
@@ -334,18 +334,18 @@ async def list_invites(
     Only parents can view all invites.
     """
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             return []
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Get user's email to show invites sent to them
-        profile_res = supabase.table("profiles").select("email").eq("id", user["id"]).single().execute()
+        profile_res = await supabase.table("profiles").select("email").eq("id", user["id"]).single().execute()
         user_email = profile_res.data.get("email") if profile_res.data else None
         
         # Get invites for this family or sent to user's email
-        invites_res = supabase.table("invites").select("*").eq("family_id", family_id).order("created_at", desc=True).execute()
+        invites_res = await supabase.table("invites").select("*").eq("family_id", family_id).order("created_at", desc=True).execute()
         
         invites = []
         for invite in invites_res.data or []:
@@ -356,7 +356,7 @@ async def list_invites(
                 invites.append(invite)
             else:
                 # Check if user is a parent
-                member_check = supabase.table("family_members").select("member_role").eq("family_id", family_id).eq("user_id", user["id"]).eq("member_role", "parent").single().execute()
+                member_check = await supabase.table("family_members").select("member_role").eq("family_id", family_id).eq("user_id", user["id"]).eq("member_role", "parent").single().execute()
                 if member_check.data:
                     invites.append(invite)
         
@@ -80,7 +80,9 @@ async def suggest_plan(body: SuggestPlanBody):
             scope={
                 "childIds": body.child_ids,
                 "horizonWeeks": body.horizon_weeks,
-                "reason": body.reason
+                "reason": body.reason,
+                # Checked against the current snapshot when the plan is approved
+                "snapshotVersion": context["snapshot_version"]
             },
             proposal=proposal
         )
@@ -88,6 +90,7 @@ async def suggest_plan(body: SuggestPlanBody):
         return {
             "planId": plan_id,
             "summary": counts,
+            "snapshotVersion": context["snapshot_version"],
             "proposal": proposal,
             "changes": persisted_changes  # Include persisted changes with database IDs
         }
@@ -0,0 +1,36 @@
+"""
+Prometheus scrape endpoint
+"""
+import hmac
+import os
+import sys
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+# Add parent directory to path
+backend_dir = Path(__file__).parent.parent
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from metrics import render_prometheus
+from state_backend import get_state_backend, run_state_io
+
+router = APIRouter(tags=["metrics"])
+
+# Scrapers must send "Authorization: Bearer <METRICS_TOKEN>"; unset disables the endpoint
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Counters, gauges and histograms in the Prometheus text format."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    auth_header = request.headers.get("Authorization") or ""
+    supplied = auth_header[7:].strip() if auth_header.lower().startswith("bearer ") else ""
+    if not hmac.compare_digest(supplied, METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    text = await run_state_io(get_state_backend(), render_prometheus)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
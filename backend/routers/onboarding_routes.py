@@ -20,13 +20,13 @@ from logger import log_event
 from metrics import increment_counter
 
 try:
-    from supabase_client import get_admin_client
+    from supabase_async import get_async_client
 except ImportError:
     import importlib.util
-    spec = importlib.util.spec_from_file_location("supabase_client", backend_dir / "supabase_client.py")
-    supabase_client = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(supabase_client)
-    get_admin_client = supabase_client.get_admin_client
+    spec = importlib.util.spec_from_file_location("supabase_async", backend_dir / "supabase_async.py")
+    supabase_async = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(supabase_async)
+    get_async_client = supabase_async.get_async_client
 
 router = APIRouter(prefix="/api/onboarding", tags=["onboarding"])
 
@@ -91,14 +91,14 @@ async def family_setup(
     log_event("onboarding.family_setup.start", user_id=user["id"])
     
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found. Please complete initial setup."
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Update family record
         update_data = {}
@@ -111,7 +111,7 @@ async def family_setup(
         
         if update_data:
             update_data["updated_at"] = datetime.utcnow().isoformat()
-            resp = supabase.table("family").update(update_data).eq("id", family_id).execute()
+            resp = await supabase.table("family").update(update_data).eq("id", family_id).execute()
             
             if not resp.data:
                 raise HTTPException(
@@ -152,14 +152,14 @@ async def add_child(
     
     try:
         # Validate family access
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id or family_id != body.family_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Forbidden: Family ID mismatch"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Map API fields to database columns
         # Database uses: first_name, grade, standards, avatar, learning_style (singular)
@@ -194,7 +194,7 @@ async def add_child(
         
         # Insert child record
         try:
-            resp = supabase.table("children").insert(insert_data).execute()
+            resp = await supabase.table("children").insert(insert_data).execute()
         except Exception as db_err:
             log_event("onboarding.add_child.db_error", user_id=user["id"], error=str(db_err), insert_data=insert_data)
             raise HTTPException(
@@ -252,15 +252,15 @@ async def get_children(
     - Children: only themselves
     """
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             return []
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Get accessible child IDs using RPC helper
         try:
-            accessible_res = supabase.rpc(
+            accessible_res = await supabase.rpc(
                 "get_accessible_children",
                 {"_user_id": user["id"]}
             ).execute()
@@ -283,7 +283,7 @@ async def get_children(
                 return []
             query = query.in_("id", accessible_child_ids)
         
-        resp = query.order("created_at").execute()
+        resp = await query.order("created_at").execute()
         
         children = []
         for child in resp.data or []:
@@ -330,16 +330,16 @@ async def complete_onboarding(
     Mark onboarding as finished (sets flag in family).
     """
     try:
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
-        resp = supabase.table("family").update({
+        resp = await supabase.table("family").update({
             "has_completed_onboarding": True,
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", family_id).execute()
@@ -17,7 +17,8 @@ if str(backend_dir) not in sys.path:
 from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user
 from logger import log_event
-from supabase_client import get_admin_client
+from cache import invalidate_async
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api/planner", tags=["planner"])
 events_router = APIRouter(prefix="/api/events", tags=["events"])
@@ -45,8 +46,8 @@ class FreezeWeekInput(BaseModel):
 
 async def verify_event_family_access(event_id: str, family_id: str) -> dict:
     """Verify event belongs to family and return event data"""
-    supabase = get_admin_client()
-    event_res = supabase.table("events").select("*").eq("id", event_id).single().execute()
+    supabase = get_async_client()
+    event_res = await supabase.table("events").select("*").eq("id", event_id).single().execute()
     
     if not event_res.data:
         raise HTTPException(
@@ -102,7 +103,7 @@ async def reschedule_event(
                 detail="End time must be after start time"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Update event
         update_data = {
@@ -112,7 +113,7 @@ async def reschedule_event(
             "reschedule_reason": body.reason or f"Rescheduled to {new_start_dt.date()}"
         }
         
-        update_res = supabase.table("events").update(update_data).eq("id", event_id).execute()
+        update_res = await supabase.table("events").update(update_data).eq("id", event_id).execute()
         
         if not update_res.data:
             raise HTTPException(
@@ -131,7 +132,7 @@ async def reschedule_event(
         cache_end = max(old_date, new_date) + timedelta(days=1)  # Include next day for safety
         
         try:
-            supabase.rpc(
+            await supabase.rpc(
                 "refresh_calendar_days_cache",
                 {
                     "p_family_id": family_id,
@@ -145,6 +146,9 @@ async def reschedule_event(
                 "event_id": event_id,
                 "error": str(cache_error)
             })
+        finally:
+            # After the refresh, so a planning context loaded meanwhile is not cached with the old days
+            await invalidate_async(family_id=family_id, child_ids=[event.get("child_id")])
         
         log_event("event_rescheduled", {
             "event_id": event_id,
@@ -187,10 +191,10 @@ async def shift_week(
                 detail="Invalid date format. Use YYYY-MM-DD"
             )
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Call shift_week_forward RPC
-        result = supabase.rpc(
+        result = await supabase.rpc(
             "shift_week_forward",
             {
                 "p_family_id": family_id,
@@ -199,6 +203,7 @@ async def shift_week(
         ).execute()
         
         shifted_count = result.data if result.data is not None else 0
+        await invalidate_async(family_id=family_id)
         
         log_event("week_shifted", {
             "family_id": family_id,
@@ -246,14 +251,15 @@ async def freeze_week(
         # Calculate week end (7 days after start)
         week_end_date = week_start_date + timedelta(days=7)
         
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         # Update is_frozen for all days in that week for this family
-        update_res = supabase.table("calendar_days_cache").update({
+        update_res = await supabase.table("calendar_days_cache").update({
             "is_frozen": body.frozen
         }).eq("family_id", family_id).gte("date", str(week_start_date)).lt("date", str(week_end_date)).execute()
         
         affected_count = len(update_res.data) if update_res.data else 0
+        await invalidate_async(family_id=family_id)
         
         log_event("week_frozen" if body.frozen else "week_unfrozen", {
             "family_id": family_id,
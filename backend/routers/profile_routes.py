@@ -0,0 +1,53 @@
+"""
+Admin download of request profiles (see profiling.py)
+"""
+import sys
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+# Add parent directory to path
+backend_dir = Path(__file__).parent.parent
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from profiling import PROFILE_SECRET, check_secret, get_profile, list_profiles
+from state_backend import get_state_backend, run_state_io
+
+router = APIRouter(prefix="/api/admin/profiles", tags=["admin"])
+
+
+def _require_secret(header_secret: Optional[str], query_secret: Optional[str]):
+    if not PROFILE_SECRET:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    if not (check_secret(header_secret) or check_secret(query_secret)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+@router.get("")
+async def profiles_index(
+    x_profile_secret: Optional[str] = Header(None),
+    secret: Optional[str] = Query(None),
+):
+    """Stored profiles, newest first (metadata only)."""
+    _require_secret(x_profile_secret, secret)
+    return {"profiles": await run_state_io(get_state_backend(), list_profiles)}
+
+
+@router.get("/{profile_id}")
+async def profile_download(
+    profile_id: str,
+    x_profile_secret: Optional[str] = Header(None),
+    secret: Optional[str] = Query(None),
+):
+    """Folded stacks for one profile; load into speedscope or flamegraph.pl."""
+    _require_secret(x_profile_secret, secret)
+    profile = await run_state_io(get_state_backend(), get_profile, profile_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return PlainTextResponse(
+        profile["folded"],
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'},
+    )
@@ -21,7 +21,7 @@ if str(backend_dir) not in sys.path:
 from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api/records", tags=["records"])
 
@@ -86,10 +86,10 @@ async def add_grade(
         if not family_id:
             raise HTTPException(status_code=404, detail="Family not found")
 
-        supabase = get_admin_client()
+        supabase = get_async_client()
 
         # Verify child belongs to family
-        child_check = supabase.table("children").select("id").eq("id", input.child_id).eq("family_id", family_id).single().execute()
+        child_check = await supabase.table("children").select("id").eq("id", input.child_id).eq("family_id", family_id).single().execute()
         if not child_check.data:
             raise HTTPException(status_code=404, detail="Child not found")
 
@@ -107,7 +107,7 @@ async def add_grade(
             "created_by": user["id"]
         }
 
-        result = supabase.table("grades").insert(grade_data).execute()
+        result = await supabase.table("grades").insert(grade_data).execute()
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create grade")
@@ -139,11 +139,11 @@ async def add_portfolio_upload(
         if not family_id:
             raise HTTPException(status_code=404, detail="Family not found")
 
-        supabase = get_admin_client()
+        supabase = get_async_client()
 
         # Verify child belongs to family if provided
         if input.child_id:
-            child_check = supabase.table("children").select("id").eq("id", input.child_id).eq("family_id", family_id).single().execute()
+            child_check = await supabase.table("children").select("id").eq("id", input.child_id).eq("family_id", family_id).single().execute()
             if not child_check.data:
                 raise HTTPException(status_code=404, detail="Child not found")
 
@@ -158,7 +158,7 @@ async def add_portfolio_upload(
             "created_by": user["id"]
         }
 
-        result = supabase.table("uploads").insert(upload_data).execute()
+        result = await supabase.table("uploads").insert(upload_data).execute()
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create upload record")
@@ -230,15 +230,15 @@ async def get_last_transcript(
         if not family_id:
             raise HTTPException(status_code=404, detail="Family not found")
 
-        supabase = get_admin_client()
+        supabase = get_async_client()
 
         # Verify child belongs to family
-        child_check = supabase.table("children").select("id").eq("id", child_id).eq("family_id", family_id).single().execute()
+        child_check = await supabase.table("children").select("id").eq("id", child_id).eq("family_id", family_id).single().execute()
         if not child_check.data:
             raise HTTPException(status_code=404, detail="Child not found")
 
         # Get last transcript
-        transcript_result = supabase.table("transcripts").select(
+        transcript_result = await supabase.table("transcripts").select(
             "id, created_at, export_url"
         ).eq("child_id", child_id).order("created_at", ascending=False).limit(1).execute()
 
@@ -268,22 +268,22 @@ async def generate_transcript(
         if not family_id:
             raise HTTPException(status_code=404, detail="Family not found")
 
-        supabase = get_admin_client()
+        supabase = get_async_client()
 
         # Verify child belongs to family
-        child_check = supabase.table("children").select("id, first_name").eq("id", child_id).eq("family_id", family_id).single().execute()
+        child_check = await supabase.table("children").select("id, first_name").eq("id", child_id).eq("family_id", family_id).single().execute()
         if not child_check.data:
             raise HTTPException(status_code=404, detail="Child not found")
 
         child_name = child_check.data.get("first_name", "Student")
 
         # Query attendance records in range
-        attendance_result = supabase.table("attendance_records").select(
+        attendance_result = await supabase.table("attendance_records").select(
             "day_date, minutes, status, note"
         ).eq("child_id", child_id).gte("day_date", str(range_start)).lte("day_date", str(range_end)).order("day_date").execute()
 
         # Query grades for the child
-        grades_result = supabase.table("grades").select(
+        grades_result = await supabase.table("grades").select(
             "term_label, subject_id, grade, score, credits, rubric, notes, created_at"
         ).eq("child_id", child_id).order("created_at").execute()
 
@@ -291,11 +291,11 @@ async def generate_transcript(
         subject_ids = [g.get("subject_id") for g in grades_result.data if g.get("subject_id")]
         subjects_map = {}
         if subject_ids:
-            subjects_result = supabase.table("subject").select("id, name").in_("id", subject_ids).execute()
+            subjects_result = await supabase.table("subject").select("id, name").in_("id", subject_ids).execute()
             subjects_map = {s["id"]: s["name"] for s in subjects_result.data}
 
         # Query event outcomes summary
-        outcomes_result = supabase.table("event_outcomes").select(
+        outcomes_result = await supabase.table("event_outcomes").select(
             "subject_id, rating, grade, strengths, struggles"
         ).eq("child_id", child_id).execute()
 
@@ -478,7 +478,7 @@ async def generate_transcript(
             "created_by": user["id"]
         }
         
-        transcript_result = supabase.table("transcripts").insert(transcript_data).execute()
+        transcript_result = await supabase.table("transcripts").insert(transcript_data).execute()
         
         log_event("transcript_generated", {
             "child_id": child_id,
@@ -15,17 +15,17 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 try:
-    from supabase_client import get_admin_client
+    from supabase_async import get_async_client
     from auth import get_current_user, rate_limiter
     from helpers import get_family_id_for_user
     from logger import log_event
 except ImportError:
     # Fallback for different import styles
     import importlib.util
-    spec = importlib.util.spec_from_file_location("supabase_client", backend_dir / "supabase_client.py")
-    supabase_client = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(supabase_client)
-    get_admin_client = supabase_client.get_admin_client
+    spec = importlib.util.spec_from_file_location("supabase_async", backend_dir / "supabase_async.py")
+    supabase_async = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(supabase_async)
+    get_async_client = supabase_async.get_async_client
     
     spec = importlib.util.spec_from_file_location("auth", backend_dir / "auth.py")
     auth_module = importlib.util.module_from_spec(spec)
@@ -153,7 +153,7 @@ async def get_standards(
 ):
     """Get standards for a specific state, grade, and optional subject/domain"""
     try:
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
         query = (
             supabase.table("standards")
@@ -169,7 +169,7 @@ async def get_standards(
         
         query = query.order("standard_code")
         
-        result = query.execute()
+        result = await query.execute()
         
         if result.data:
             return result.data
@@ -191,8 +191,8 @@ async def get_user_preferences(
 ):
     """Get standards preferences for user's children"""
     try:
-        supabase = get_admin_client()
-        family_id = get_family_id_for_user(user["id"])
+        supabase = get_async_client()
+        family_id = await get_family_id_for_user(user["id"])
         
         query = (
             supabase.table("user_standards_preferences")
@@ -204,7 +204,7 @@ async def get_user_preferences(
             query = query.eq("child_id", child_id)
         else:
             # Get all children in family
-            children_res = supabase.table("children").select("id").eq("family_id", family_id).execute()
+            children_res = await supabase.table("children").select("id").eq("family_id", family_id).execute()
             child_ids = [c["id"] for c in (children_res.data or [])]
             if child_ids:
                 query = query.in_("child_id", child_ids)
@@ -213,7 +213,7 @@ async def get_user_preferences(
         
         query = query.eq("is_active", True).order("created_at", desc=True)
         
-        result = query.execute()
+        result = await query.execute()
         return result.data or []
         
     except Exception as e:
@@ -232,18 +232,18 @@ async def set_user_preference(
 ):
     """Set or update standards preference for a child"""
     try:
-        supabase = get_admin_client()
-        family_id = get_family_id_for_user(user["id"])
+        supabase = get_async_client()
+        family_id = await get_family_id_for_user(user["id"])
         
         # Verify child belongs to family
-        child_res = supabase.table("children").select("id, family_id").eq("id", preference.child_id).maybe_single().execute()
+        child_res = await supabase.table("children").select("id, family_id").eq("id", preference.child_id).maybe_single().execute()
         if not child_res.data or child_res.data["family_id"] != family_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Child not found or access denied")
         
         # Deactivate any existing active preference for this child/subject/state/grade
         if preference.subject_id:
             deactivate_res = (
-                supabase.table("user_standards_preferences")
+                await supabase.table("user_standards_preferences")
                 .update({"is_active": False})
                 .eq("child_id", preference.child_id)
                 .eq("state_code", preference.state_code)
@@ -255,7 +255,7 @@ async def set_user_preference(
         else:
             # If no subject_id, deactivate all for this child/state/grade
             deactivate_res = (
-                supabase.table("user_standards_preferences")
+                await supabase.table("user_standards_preferences")
                 .update({"is_active": False})
                 .eq("child_id", preference.child_id)
                 .eq("state_code", preference.state_code)
@@ -277,7 +277,7 @@ async def set_user_preference(
         
         # Use upsert to handle unique constraint
         result = (
-            supabase.table("user_standards_preferences")
+            await supabase.table("user_standards_preferences")
             .upsert(insert_data, on_conflict="child_id,state_code,grade_level,subject_id")
             .execute()
         )
@@ -309,16 +309,16 @@ async def get_coverage_percentage(
 ):
     """Get coverage percentage for a child's standards"""
     try:
-        supabase = get_admin_client()
-        family_id = get_family_id_for_user(user["id"])
+        supabase = get_async_client()
+        family_id = await get_family_id_for_user(user["id"])
         
         # Verify child belongs to family
-        child_res = supabase.table("children").select("id, family_id").eq("id", child_id).maybe_single().execute()
+        child_res = await supabase.table("children").select("id, family_id").eq("id", child_id).maybe_single().execute()
         if not child_res.data or child_res.data["family_id"] != family_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Child not found or access denied")
         
         # Call the RPC function
-        result = supabase.rpc(
+        result = await supabase.rpc(
             "get_standards_coverage_percentage",
             {
                 "p_child_id": child_id,
@@ -360,16 +360,16 @@ async def get_standards_gaps(
 ):
     """Get uncovered standards (gaps) for AI planning"""
     try:
-        supabase = get_admin_client()
-        family_id = get_family_id_for_user(user["id"])
+        supabase = get_async_client()
+        family_id = await get_family_id_for_user(user["id"])
         
         # Verify child belongs to family
-        child_res = supabase.table("children").select("id, family_id").eq("id", child_id).maybe_single().execute()
+        child_res = await supabase.table("children").select("id, family_id").eq("id", child_id).maybe_single().execute()
         if not child_res.data or child_res.data["family_id"] != family_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Child not found or access denied")
         
         # Call the RPC function
-        result = supabase.rpc(
+        result = await supabase.rpc(
             "get_standards_gaps",
             {
                 "p_child_id": child_id,
@@ -402,16 +402,16 @@ async def create_curriculum_mapping(
 ):
     """Map curriculum (subject/event) to a standard"""
     try:
-        supabase = get_admin_client()
-        family_id = get_family_id_for_user(user["id"])
+        supabase = get_async_client()
+        family_id = await get_family_id_for_user(user["id"])
         
         # Verify child belongs to family
-        child_res = supabase.table("children").select("id, family_id").eq("id", mapping.child_id).maybe_single().execute()
+        child_res = await supabase.table("children").select("id, family_id").eq("id", mapping.child_id).maybe_single().execute()
         if not child_res.data or child_res.data["family_id"] != family_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Child not found or access denied")
         
         # Verify standard exists
-        standard_res = supabase.table("standards").select("id").eq("id", mapping.standard_id).maybe_single().execute()
+        standard_res = await supabase.table("standards").select("id").eq("id", mapping.standard_id).maybe_single().execute()
         if not standard_res.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Standard not found")
         
@@ -426,7 +426,7 @@ async def create_curriculum_mapping(
             "created_by": user["id"],
         }
         
-        result = supabase.table("curriculum_standards_mapping").insert(insert_data).execute()
+        result = await supabase.table("curriculum_standards_mapping").insert(insert_data).execute()
         
         if result.data:
             log_event("standards.mapping.create", user_id=user["id"], child_id=mapping.child_id, standard_id=mapping.standard_id)
@@ -452,16 +452,16 @@ async def record_coverage(
 ):
     """Record that a standard has been covered"""
     try:
-        supabase = get_admin_client()
-        family_id = get_family_id_for_user(user["id"])
+        supabase = get_async_client()
+        family_id = await get_family_id_for_user(user["id"])
         
         # Verify child belongs to family
-        child_res = supabase.table("children").select("id, family_id").eq("id", coverage.child_id).maybe_single().execute()
+        child_res = await supabase.table("children").select("id, family_id").eq("id", coverage.child_id).maybe_single().execute()
         if not child_res.data or child_res.data["family_id"] != family_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Child not found or access denied")
         
         # Verify standard exists
-        standard_res = supabase.table("standards").select("id").eq("id", coverage.standard_id).maybe_single().execute()
+        standard_res = await supabase.table("standards").select("id").eq("id", coverage.standard_id).maybe_single().execute()
         if not standard_res.data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Standard not found")
         
@@ -477,12 +477,12 @@ async def record_coverage(
             "created_by": user["id"],
         }
         
-        result = supabase.table("standards_coverage").insert(insert_data).execute()
+        result = await supabase.table("standards_coverage").insert(insert_data).execute()
         
         if result.data:
             # Refresh gap analysis materialized view
             try:
-                supabase.rpc("refresh_standards_gap_analysis").execute()
+                await supabase.rpc("refresh_standards_gap_analysis").execute()
             except:
                 pass  # Non-critical if refresh fails
             
@@ -520,18 +520,18 @@ async def ai_plan_standards(
         )
     
     try:
-        supabase = get_admin_client()
-        family_id = get_family_id_for_user(user["id"])
+        supabase = get_async_client()
+        family_id = await get_family_id_for_user(user["id"])
         
         # Verify child belongs to family
-        child_res = supabase.table("children").select("id, family_id, first_name").eq("id", child_id).maybe_single().execute()
+        child_res = await supabase.table("children").select("id, family_id, first_name").eq("id", child_id).maybe_single().execute()
         if not child_res.data or child_res.data["family_id"] != family_id:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Child not found or access denied")
         
         child_name = child_res.data.get("first_name", "the student")
         
         # Get gaps
-        gaps_result = supabase.rpc(
+        gaps_result = await supabase.rpc(
             "get_standards_gaps",
             {
                 "p_child_id": child_id,
@@ -551,11 +551,11 @@ async def ai_plan_standards(
             }
         
         # Get child's current subjects
-        subjects_res = supabase.table("subject").select("name").eq("family_id", family_id).execute()
+        subjects_res = await supabase.table("subject").select("name").eq("family_id", family_id).execute()
         current_subjects = [s["name"] for s in (subjects_res.data or [])]
         
         # Get child preferences (learning style, etc.) if available
-        prefs_res = supabase.table("child_prefs").select("learning_style").eq("child_id", child_id).maybe_single().execute()
+        prefs_res = await supabase.table("child_prefs").select("learning_style").eq("child_id", child_id).maybe_single().execute()
         preferred_learning_style = prefs_res.data.get("learning_style") if prefs_res.data else None
         
         # Build context for LLM
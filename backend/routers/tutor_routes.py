@@ -14,10 +14,10 @@ backend_dir = Path(__file__).parent.parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
-from auth import get_current_user, rate_limiter
-from helpers import get_family_id_for_user
+from auth import rate_limiter
+from identity import IdentityContext, get_identity
 from logger import log_event
-from supabase_client import get_admin_client
+from supabase_async import get_async_client
 
 router = APIRouter(prefix="/api/tutor", tags=["tutor"])
 
@@ -44,7 +44,7 @@ class TutorOverviewOut(BaseModel):
 
 @router.get("/overview", response_model=TutorOverviewOut)
 async def get_tutor_overview(
-    user: dict = Depends(get_current_user),
+    identity: IdentityContext = Depends(get_identity),
     __: None = Depends(rate_limiter),
 ):
     """
@@ -52,45 +52,23 @@ async def get_tutor_overview(
     Only accessible to users with tutor role.
     """
     try:
-        supabase = get_admin_client()
+        supabase = get_async_client()
         
-        # Get user's role from family_members or profiles
-        role = None
-        family_id = None
-        
-        # Check family_members first
-        member_res = supabase.table("family_members").select("member_role, family_id").eq("user_id", user["id"]).maybe_single().execute()
-        if member_res.data:
-            role = member_res.data.get("member_role")
-            family_id = member_res.data.get("family_id")
-        
-        # Fallback to profiles
-        if not role:
-            profile_res = supabase.table("profiles").select("role, family_id").eq("id", user["id"]).maybe_single().execute()
-            if profile_res.data:
-                role = profile_res.data.get("role")
-                family_id = profile_res.data.get("family_id")
-        
-        if role != "tutor":
+        if not identity.is_tutor:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Tutor role required"
             )
         
-        if not family_id:
+        if not identity.family_id:
             return TutorOverviewOut(children=[])
         
-        # Get child_scope from family_members
-        member_with_scope_res = supabase.table("family_members").select("child_scope").eq("user_id", user["id"]).eq("family_id", family_id).maybe_single().execute()
-        child_scope = []
-        if member_with_scope_res.data:
-            child_scope = member_with_scope_res.data.get("child_scope") or []
-        
+        child_scope = identity.child_scope
         if not child_scope:
             return TutorOverviewOut(children=[])
         
         # Get child info
-        children_res = supabase.table("children").select("id, first_name, nickname, avatar_url").in_("id", child_scope).eq("archived", False).execute()
+        children_res = await supabase.table("children").select("id, first_name, nickname, avatar_url").in_("id", child_scope).eq("archived", False).execute()
         children_dict = {c["id"]: c for c in (children_res.data or [])}
         
         # Get today's events per child
@@ -99,7 +77,7 @@ async def get_tutor_overview(
         today_end = datetime.combine(today, datetime.max.time()).isoformat()
         
         events_res = (
-            supabase.table("events")
+            await supabase.table("events")
             .select("*")
             .in_("child_id", child_scope)
             .gte("start_at", today_start)
@@ -118,7 +96,7 @@ async def get_tutor_overview(
         
         # Get progress stats from child_progress view
         progress_res = (
-            supabase.table("child_progress")
+            await supabase.table("child_progress")
             .select("*")
             .in_("child_id", child_scope)
             .execute()
@@ -179,14 +157,14 @@ async def get_tutor_overview(
                 })
             ))
         
-        log_event("tutor.overview.success", user_id=user["id"], children_count=len(result_children))
+        log_event("tutor.overview.success", user_id=identity.user_id, children_count=len(result_children))
         
         return TutorOverviewOut(children=result_children)
         
     except HTTPException:
         raise
     except Exception as e:
-        log_event("tutor.overview.error", user_id=user["id"], error=str(e))
+        log_event("tutor.overview.error", user_id=identity.user_id, error=str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch tutor overview: {str(e)}"
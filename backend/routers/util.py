@@ -4,6 +4,7 @@ Handles storage, context loading, persistence, and applying changes
 """
 import io
 import asyncio
+import hashlib
 import json
 import datetime as dt
 from typing import Dict, Any, List, Tuple, Optional
@@ -17,28 +18,108 @@ if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
 try:
-    from supabase_client import get_admin_client
+    from supabase_async import get_async_client
 except ImportError:
     # Fallback for different import styles
     import importlib.util
-    spec = importlib.util.spec_from_file_location("supabase_client", backend_dir / "supabase_client.py")
-    supabase_client = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(supabase_client)
-    get_admin_client = supabase_client.get_admin_client
+    spec = importlib.util.spec_from_file_location("supabase_async", backend_dir / "supabase_async.py")
+    supabase_async = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(supabase_async)
+    get_async_client = supabase_async.get_async_client
+
+try:
+    from cache import TTLCache, child_tag, family_tag, invalidate_async
+except ImportError:
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("cache", backend_dir / "cache.py")
+    cache_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(cache_module)
+    TTLCache = cache_module.TTLCache
+    child_tag = cache_module.child_tag
+    family_tag = cache_module.family_tag
+    invalidate_async = cache_module.invalidate_async
+
+from availability import build_availability
+from fast_json import dumps, loads
+from state_backend import run_state_io
+from metrics import increment_counter
+
+# Upper bound for each query that feeds load_planning_context
+PLANNING_QUERY_TIMEOUT = float(os.getenv("PLANNING_QUERY_TIMEOUT_SECONDS", "10"))
+
+# Planning context snapshots, dropped by cache.invalidate() on event, outcome and
+# calendar cache writes; the TTL covers writes the backend never sees (blackouts
+# are written by the app straight to Supabase)
+PLANNING_CONTEXT_TTL = float(os.getenv("PLANNING_CONTEXT_TTL_SECONDS", "120"))
+_planning_cache = TTLCache(
+    "planning_context",
+    max_entries=int(os.getenv("PLANNING_CONTEXT_CACHE_ENTRIES", "256")),
+    sizer=lambda snapshot: snapshot.size,
+)
 
 def _log(msg: str, **kwargs):
     context = " ".join([f"{k}={v!r}" for k, v in kwargs.items()])
     print(f"[LLM-UTIL] {msg}{(' ' + context) if context else ''}")
 
 
+async def _query(name: str, builder, timeout: float = PLANNING_QUERY_TIMEOUT) -> List[Dict[str, Any]]:
+    """Execute one planning query (table or RPC builder) with a timeout; returns its rows."""
+    try:
+        res = await asyncio.wait_for(builder.execute(), timeout)
+    except asyncio.TimeoutError:
+        _log(f"planning.{name}.timeout", timeout_s=timeout)
+        increment_counter("planning_query_timeouts", labels={"query": name})
+        raise TimeoutError(f"{name} query timed out after {timeout}s")
+    return res.data or []
+
+
+async def _degrade(name: str, awaitable, default):
+    """Await a non-critical input; on any failure log it and plan without it."""
+    try:
+        return await awaitable
+    except Exception as e:
+        _log(f"planning.{name}.degraded", error=str(e))
+        increment_counter("planning_context_degraded", labels={"input": name})
+        return default
+
+
+# Batched RPCs from 2025-11-20_rpc_batched_planning_inputs.sql. A database without
+# them is remembered here, so later loads go straight to the per-child RPCs.
+_MISSING_RPCS = set()
+
+
+def _rpc_missing(error: Exception) -> bool:
+    # PostgREST reports an unknown function as PGRST202 (42883 from Postgres itself)
+    return getattr(error, "code", None) in ("PGRST202", "42883")
+
+
+def _group_by_child(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Regroup rows from a batched RPC by child_id, keeping their order."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        grouped.setdefault(row.get("child_id"), []).append(row)
+    return grouped
+
+
+async def _gather_all(*awaitables):
+    """asyncio.gather that cancels the remaining queries when one fails."""
+    tasks = [asyncio.ensure_future(a) for a in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
 async def get_file_text_from_storage(bucket: str, path: str) -> str:
     """Fetch file from Supabase Storage and extract text (handles PDFs)"""
-    supa = get_admin_client()
+    supa = get_async_client()
     
     try:
         _log("storage.download.start", bucket=bucket, path=path)
         # Download file
-        res = supa.storage.from_(bucket).download(path)
+        res = await supa.storage.from_(bucket).download(path)
         data: bytes = res
         _log("storage.download.success", byte_length=len(data))
         
@@ -69,122 +150,92 @@ def _date_range(start_date: dt.date, end_date: dt.date):
         current += dt.timedelta(days=1)
 
 
-def _build_week_view_fallback(
+async def _fetch_week_view_rows(
     supa,
     family_id: str,
     start_date: dt.date,
     end_date: dt.date,
     child_ids: List[str],
-    blackouts: List[Dict[str, Any]]
-) -> Dict[str, Any]:
-    """Fallback week view builder that avoids schedule_overrides access."""
-    _log("fallback.week_view.start", start_date=str(start_date), end_date=str(end_date), child_count=len(child_ids or []))
+) -> Dict[str, List[Dict[str, Any]]]:
+    """children, calendar_days_cache and events rows for the week view, queried concurrently."""
     child_filter = set(child_ids) if child_ids else None
 
-    # Fetch children
-    try:
-        _log("fallback.children.query")
-        children_res = supa.table("children").select(
-            "id, first_name, grade_level, grade, avatar, family_id"
-        ).eq("family_id", family_id).execute()
-    except Exception as e:
-        _log("fallback.children.error", error=str(e))
-        raise
-    children_rows = children_res.data or []
-    if child_filter:
-        children_rows = [c for c in children_rows if c["id"] in child_filter]
-
-    child_lookup = {c["id"]: c for c in children_rows}
-    _log("fallback.children.success", count=len(children_rows))
+    async def _children():
+        try:
+            _log("fallback.children.query")
+            rows = await _query("children", supa.table("children").select(
+                "id, first_name, grade_level, grade, avatar, family_id"
+            ).eq("family_id", family_id))
+        except Exception as e:
+            _log("fallback.children.error", error=str(e))
+            raise
+        if child_filter:
+            rows = [c for c in rows if c["id"] in child_filter]
+        _log("fallback.children.success", count=len(rows))
+        return rows
 
-    # Fetch calendar cache
-    cache_rows = []
-    try:
-        _log("fallback.cache.query")
-        cache_res = supa.table("calendar_days_cache").select(
-            "child_id, date, day_status, first_block_start, last_block_end"
-        ).eq("family_id", family_id).gte("date", str(start_date)).lte("date", str(end_date)).execute()
-        cache_rows = cache_res.data or []
-        _log("fallback.cache.success", count=len(cache_rows))
-    except Exception as e:
-        _log("fallback.cache.error", error=str(e))
-        _log("fallback.cache.fallback", message="proceeding with empty availability due to RLS")
-    cache_map = {
-        (row["child_id"], row["date"]): row
-        for row in cache_rows
-    }
+    async def _cache():
+        try:
+            _log("fallback.cache.query")
+            rows = await _query("calendar_cache", supa.table("calendar_days_cache").select(
+                "child_id, date, day_status, first_block_start, last_block_end"
+            ).eq("family_id", family_id).gte("date", str(start_date)).lte("date", str(end_date)))
+            _log("fallback.cache.success", count=len(rows))
+            return rows
+        except Exception as e:
+            _log("fallback.cache.error", error=str(e))
+            _log("fallback.cache.fallback", message="proceeding with empty availability due to RLS")
+            return []
 
-    # Build blackout lookup
-    blackout_ranges = []
-    for bo in blackouts:
+    async def _events():
         try:
-            starts = dt.date.fromisoformat(bo["starts_on"])
-            ends = dt.date.fromisoformat(bo["ends_on"])
-        except Exception:
-            continue
-        blackout_ranges.append({
-            "child_id": bo.get("child_id"),
-            "starts_on": starts,
-            "ends_on": ends,
-        })
+            _log("fallback.events.query")
+            events_query = supa.table("events").select(
+                "id, child_id, title, description, subject_id, status, start_ts, end_ts"
+            ).eq("family_id", family_id) \
+             .gte("start_ts", start_date.isoformat()) \
+             .lt("start_ts", (end_date + dt.timedelta(days=1)).isoformat())
 
-    def is_day_blacked(child_id: str, date_obj: dt.date) -> bool:
-        for bo in blackout_ranges:
-            if bo["starts_on"] <= date_obj <= bo["ends_on"]:
-                if bo["child_id"] is None or bo["child_id"] == child_id:
-                    return True
-        return False
-
-    # Build availability entries
-    availability_entries: List[Dict[str, Any]] = []
-    for child_id, child in child_lookup.items():
-        for day in _date_range(start_date, end_date):
-            date_str = str(day)
-            cache_row = cache_map.get((child_id, date_str), {})
-            day_status = cache_row.get("day_status")
-
-            if is_day_blacked(child_id, day):
-                day_status = "off"
-
-            first_block = cache_row.get("first_block_start")
-            last_block = cache_row.get("last_block_end")
-
-            if day_status == "off":
-                windows = []
-            elif first_block and last_block:
-                windows = [{
-                    "start": first_block,
-                    "end": last_block,
-                    "status": day_status or "teach",
-                }]
-            else:
-                windows = []
-
-            availability_entries.append({
-                "child_id": child_id,
-                "child_name": child.get("first_name") or "Child",
-                "date": date_str,
-                "day_status": day_status or ("teach" if windows else None),
-                "windows": windows,
-            })
-
-    # Fetch events with subject info
-    try:
-        _log("fallback.events.query")
-        events_query = supa.table("events").select(
-            "id, child_id, title, description, subject_id, status, start_ts, end_ts"
-        ).eq("family_id", family_id) \
-         .gte("start_ts", start_date.isoformat()) \
-         .lt("start_ts", (end_date + dt.timedelta(days=1)).isoformat())
+            if child_filter:
+                events_query = events_query.in_("child_id", list(child_filter))
 
-        if child_filter:
-            events_query = events_query.in_("child_id", list(child_filter))
+            rows = await _query("events", events_query)
+        except Exception as e:
+            _log("fallback.events.error", error=str(e))
+            raise
+        _log("fallback.events.success", count=len(rows))
+        return rows
+
+    children_rows, cache_rows, events_rows = await _gather_all(_children(), _cache(), _events())
+    return {"children": children_rows, "cache": cache_rows, "events": events_rows}
+
+
+async def _build_week_view_fallback(
+    supa,
+    family_id: str,
+    start_date: dt.date,
+    end_date: dt.date,
+    child_ids: List[str],
+    blackouts: List[Dict[str, Any]],
+    rows: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+) -> Dict[str, Any]:
+    """Fallback week view builder that avoids schedule_overrides access.
+
+    rows are the _fetch_week_view_rows() results when the caller already
+    fetched them alongside other queries.
+    """
+    _log("fallback.week_view.start", start_date=str(start_date), end_date=str(end_date), child_count=len(child_ids or []))
+    if rows is None:
+        rows = await _fetch_week_view_rows(supa, family_id, start_date, end_date, child_ids)
+    children_rows = rows["children"]
+    cache_rows = rows["cache"]
+    events_rows = rows["events"]
+
+    child_lookup = {c["id"]: c for c in children_rows}
+
+    # Blackouts become per-child day masks; entries are built when avail is iterated
+    availability = build_availability(child_lookup, cache_rows, blackouts, start_date, end_date)
 
-        events_rows = events_query.execute().data or []
-    except Exception as e:
-        _log("fallback.events.error", error=str(e))
-        raise
-    _log("fallback.events.success", count=len(events_rows))
     events_payload = []
     for row in events_rows:
         start_ts = row.get("start_ts")
@@ -225,62 +276,327 @@ def _build_week_view_fallback(
 
     result = {
         "children": children_payload,
-        "avail": availability_entries,
+        "avail": availability,
         "events": events_payload,
     }
-    _log("fallback.week_view.complete", avail=len(availability_entries), events=len(events_payload))
+    _log("fallback.week_view.complete", avail=len(availability), events=len(events_payload))
     return result
 
 
+class _PlanningSnapshot:
+    """A cached planning context: JSON bytes plus the (read-only) availability masks.
+
+    Every load_planning_context() call parses its own copy of the data, so
+    a caller that edits the context cannot change what later calls see.
+    """
+
+    __slots__ = ("data", "availability", "version", "size")
+
+    def __init__(self, context: Dict[str, Any]):
+        avail = context.pop("availability")
+        self.data = dumps(context)
+        self.availability = avail
+        avail_json = dumps([avail.columns, *avail.rows()])
+        digest = hashlib.blake2b(self.data, digest_size=8)
+        digest.update(avail_json)
+        self.version = digest.hexdigest()
+        # The JSON sizes stand in for memory; cheaper than walking the context
+        self.size = len(self.data) + len(avail_json)
+
+    def context(self) -> Dict[str, Any]:
+        context = loads(self.data)
+        context["availability"] = self.availability
+        context["snapshot_version"] = self.version
+        return context
+
+
+def _planning_key(family_id: str, week_start: str, children: List[str], horizon_weeks: int) -> str:
+    return f"planning:{family_id}:{week_start}:{horizon_weeks}:{','.join(children)}"
+
+
+async def _load_planning_snapshot(
+    family_id: str,
+    week_start: str,
+    child_ids: List[str],
+    horizon_weeks: int
+) -> _PlanningSnapshot:
+    children = sorted(set(child_ids))
+
+    async def _load():
+        return _PlanningSnapshot(await _build_planning_context(family_id, week_start, children, horizon_weeks))
+
+    return await _planning_cache.get_or_load(
+        _planning_key(family_id, week_start, children, horizon_weeks),
+        _load,
+        ttl_seconds=PLANNING_CONTEXT_TTL,
+        tags=[family_tag(family_id)] + [child_tag(child_id) for child_id in children],
+    )
+
+
 async def load_planning_context(
     family_id: str,
     week_start: str,
     child_ids: List[str],
     horizon_weeks: int
 ) -> Dict[str, Any]:
-    """Load all context needed for planning (availability, events, blackouts, required minutes)"""
-    supa = get_admin_client()
+    """Load all context needed for planning (availability, events, blackouts, required minutes)
+
+    Snapshots are cached per (family, window, child set) for
+    PLANNING_CONTEXT_TTL and dropped by writes to the family's data. Each
+    carries snapshot_version, a hash of its content: a proposal built from
+    one snapshot can be checked with planning_snapshot_is_current().
+    The returned context is the caller's own copy.
+    """
+    snapshot = await _load_planning_snapshot(family_id, week_start, child_ids, horizon_weeks)
+    context = snapshot.context()
+    context["children"] = list(child_ids)
+    return context
+
+
+async def planning_snapshot_is_current(
+    family_id: str,
+    week_start: str,
+    child_ids: List[str],
+    horizon_weeks: int,
+    version: Optional[str],
+    route: str,
+) -> bool:
+    """True when the planning context still has this snapshot_version (or none was recorded).
+
+    While the cached snapshot has not been invalidated or expired its
+    version is compared directly; otherwise the context is rebuilt.
+    """
+    if not version:
+        return True
+    key = _planning_key(family_id, week_start, sorted(set(child_ids)), horizon_weeks)
+    try:
+        snapshot = await run_state_io(_planning_cache.backend, _planning_cache.get, key)
+        if snapshot is None:
+            snapshot = await _load_planning_snapshot(family_id, week_start, child_ids, horizon_weeks)
+    except Exception as e:
+        # The check is advisory; never fail the write it guards
+        _log("planning.snapshot.check_error", route=route, error=str(e))
+        return True
+    if snapshot.version == version:
+        return True
+    increment_counter("planning_snapshot_stale", labels={"route": route})
+    _log("planning.snapshot.stale", route=route, family_id=family_id, version=version, current=snapshot.version)
+    return False
+
+
+async def _build_planning_context(
+    family_id: str,
+    week_start: str,
+    child_ids: List[str],
+    horizon_weeks: int
+) -> Dict[str, Any]:
+    """Query and assemble one planning context snapshot.
+
+    All queries run concurrently, each bounded by PLANNING_QUERY_TIMEOUT.
+    Struggles and standards gaps are non-critical: if they fail or time out
+    the plan is built without them.
+    """
+    supa = get_async_client()
     _log("planning.load.start", family_id=family_id, week_start=week_start, horizon_weeks=horizon_weeks, child_ids=child_ids)
     
     ws = dt.date.fromisoformat(week_start)
     we = ws + dt.timedelta(days=7 * horizon_weeks)
-    
-    # Get blackout periods early (also used in fallback)
-    try:
-        _log("planning.blackouts.query")
-        blackouts_res = supa.table("blackout_periods").select("*").eq(
+
+    async def _blackouts():
+        try:
+            _log("planning.blackouts.query")
+            rows = await _query("blackouts", supa.table("blackout_periods").select("*").eq(
+                "family_id", family_id
+            ).gte("starts_on", str(ws)).lte("ends_on", str(we)))
+        except Exception as e:
+            _log("planning.blackouts.error", error=str(e))
+            raise ValueError(f"Failed to query blackout_periods: {e}") from e
+        _log("planning.blackouts.success", count=len(rows))
+        return rows
+
+    async def _frozen():
+        try:
+            return await _query("frozen", supa.table("calendar_days_cache").select("date, child_id").eq(
+                "family_id", family_id
+            ).eq("is_frozen", True).gte("date", str(ws)).lte("date", str(we)))
+        except Exception as e:
+            _log("planning.frozen.error", error=str(e))
+            # Continue without filtering if query fails
+            return None
+
+    async def _required_minutes(child_id: str):
+        try:
+            _log("planning.required_minutes.rpc", child=child_id)
+            rows = await _query("required_minutes", supa.rpc(
+                "get_required_minutes",
+                {
+                    "p_family_id": family_id,
+                    "p_child_id": child_id,
+                    "p_week_start": str(ws),
+                    "p_weeks_ahead": horizon_weeks
+                }
+            ))
+            _log("planning.required_minutes.success", child=child_id, rows=len(rows))
+            return [{"child_id": child_id, **r} for r in rows]
+        except Exception as e:
+            _log("planning.required_minutes.error", child=child_id, error=str(e))
+            return []
+
+    async def _all_required_minutes():
+        # One round trip for every child; per-child RPCs if the batch RPC is not deployed
+        if "get_required_minutes_batch" not in _MISSING_RPCS:
+            try:
+                _log("planning.required_minutes.batch_rpc", children=len(child_ids))
+                rows = await _query("required_minutes", supa.rpc(
+                    "get_required_minutes_batch",
+                    {
+                        "p_family_id": family_id,
+                        "p_child_ids": child_ids,
+                        "p_week_start": str(ws),
+                        "p_weeks_ahead": horizon_weeks
+                    }
+                ))
+                by_child = _group_by_child(rows)
+                _log("planning.required_minutes.success", rows=len(rows))
+                return [row for child_id in child_ids for row in by_child.get(child_id, [])]
+            except Exception as e:
+                _log("planning.required_minutes.error", error=str(e))
+                if not _rpc_missing(e):
+                    return []
+                _MISSING_RPCS.add("get_required_minutes_batch")
+        lists = await asyncio.gather(*(_required_minutes(child_id) for child_id in child_ids))
+        return [row for rows in lists for row in rows]
+
+    async def _velocities():
+        _log("planning.velocity.query")
+        rows = await _query("velocity", supa.table("learning_velocity").select("*").eq(
             "family_id", family_id
-        ).gte("starts_on", str(ws)).lte("ends_on", str(we)).execute()
-        blackouts = blackouts_res.data or []
-        _log("planning.blackouts.success", count=len(blackouts))
-    except Exception as e:
-        _log("planning.blackouts.error", error=str(e))
-        raise ValueError(f"Failed to query blackout_periods: {e}") from e
+        ).in_("child_id", child_ids))
+        _log("planning.velocity.success", count=len(rows))
+        return rows
+
+    async def _struggles():
+        # Recent struggles from outcomes (last 30 days) to inform scheduling
+        _log("planning.struggles.query")
+        thirty_days_ago = (ws - dt.timedelta(days=30)).isoformat()
+        outcomes = await _query("struggles", supa.table("event_outcomes").select(
+            "child_id, subject_id, struggles"
+        ).eq("family_id", family_id).in_("child_id", child_ids).gte(
+            "created_at", thirty_days_ago
+        ))
+
+        struggles_by_child_subject = {}
+        for outcome in outcomes:
+            child_id = outcome.get("child_id")
+            subject_id = outcome.get("subject_id")
+            struggles = outcome.get("struggles", [])
+            if struggles and child_id:
+                key = f"{child_id}:{subject_id or 'none'}"
+                if key not in struggles_by_child_subject:
+                    struggles_by_child_subject[key] = []
+                struggles_by_child_subject[key].extend(struggles)
+        
+        # Deduplicate struggles per child/subject (first-seen order keeps snapshot versions stable)
+        for key in struggles_by_child_subject:
+            struggles_by_child_subject[key] = list(dict.fromkeys(struggles_by_child_subject[key]))
+        
+        _log("planning.struggles.success", count=len(struggles_by_child_subject))
+        return struggles_by_child_subject
+
+    async def _gaps_for_pref(child_id: str, pref: Dict[str, Any]):
+        try:
+            return await _query("standards_gaps", supa.rpc(
+                "get_standards_gaps",
+                {
+                    "p_child_id": child_id,
+                    "p_state_code": pref["state_code"],
+                    "p_grade_level": pref["grade_level"],
+                    "p_subject": None,  # Get all subjects
+                    "p_limit": 10,  # Top 10 gaps
+                }
+            ))
+        except Exception as e:
+            _log("planning.standards_gaps.rpc.error", child=child_id, error=str(e))
+            # Continue with other preferences
+            return []
+
+    async def _gaps_for_child(child_id: str):
+        # Active standards preferences for this child, then gaps for each
+        prefs = await _query("standards_prefs", supa.table("user_standards_preferences").select(
+            "state_code, grade_level, subject_id"
+        ).eq("child_id", child_id).eq("is_active", True))
+        gap_lists = await asyncio.gather(*(_gaps_for_pref(child_id, pref) for pref in prefs))
+        return [gap for gaps in gap_lists for gap in gaps][:10]  # Limit to top 10
+
+    async def _batched_gaps():
+        # Every active preference of every child in one round trip
+        rows = await _query("standards_gaps", supa.rpc(
+            "get_standards_gaps_batch",
+            {"p_child_ids": child_ids, "p_subject": None, "p_limit": 10}
+        ))
+        by_child = _group_by_child(rows)
+        drop = ("child_id", "state_code", "grade_level")
+        return [
+            [{k: v for k, v in gap.items() if k not in drop} for gap in by_child.get(child_id, [])][:10]
+            for child_id in child_ids
+        ]
+
+    async def _standards_gaps():
+        _log("planning.standards_gaps.query")
+        gaps = None
+        if "get_standards_gaps_batch" not in _MISSING_RPCS:
+            try:
+                gaps = await _batched_gaps()
+            except Exception as e:
+                if not _rpc_missing(e):
+                    raise
+                _log("planning.standards_gaps.batch_missing", error=str(e))
+                _MISSING_RPCS.add("get_standards_gaps_batch")
+        if gaps is None:
+            gaps = await _gather_all(*(_gaps_for_child(child_id) for child_id in child_ids))
+        standards_gaps_by_child = {child_id: g for child_id, g in zip(child_ids, gaps) if g}
+        _log("planning.standards_gaps.success", children_with_gaps=len(standards_gaps_by_child))
+        return standards_gaps_by_child
 
     # Get availability and events from get_week_view RPC (with fallback)
     _log("planning.week_view.skip", reason="bypass schedule_overrides RLS")
-    week_view_data = _build_week_view_fallback(
+    (
+        blackouts,
+        week_rows,
+        frozen_rows,
+        required_minutes,
+        velocities,
+        struggles_by_child_subject,
+        standards_gaps_by_child,
+    ) = await _gather_all(
+        _blackouts(),
+        _fetch_week_view_rows(supa, family_id, ws, we, child_ids),
+        _frozen(),
+        _all_required_minutes(),
+        _velocities(),
+        # Non-critical: plan without them if they fail or time out
+        _degrade("struggles", _struggles(), {}),
+        _degrade("standards_gaps", _standards_gaps(), {}),
+    )
+
+    week_view_data = await _build_week_view_fallback(
         supa=supa,
         family_id=family_id,
         start_date=ws,
         end_date=we,
         child_ids=child_ids,
-        blackouts=blackouts
+        blackouts=blackouts,
+        rows=week_rows,
     )
 
     avail = week_view_data.get("avail", [])
     events = week_view_data.get("events", [])
     
     # Filter out frozen days from availability
-    # Get frozen days for this family in the date range
-    try:
-        frozen_res = supa.table("calendar_days_cache").select("date, child_id").eq(
-            "family_id", family_id
-        ).eq("is_frozen", True).gte("date", str(ws)).lte("date", str(we)).execute()
-        
+    if frozen_rows is not None:
         frozen_days = set()
         frozen_by_child = {}
-        for row in (frozen_res.data or []):
+        for row in frozen_rows:
             date_str = row.get("date")
             child_id = row.get("child_id")
             frozen_days.add(date_str)
@@ -291,11 +607,7 @@ async def load_planning_context(
         
         # Filter availability: remove windows for frozen days
         # A day is frozen if it's in frozen_days OR if it's frozen for this specific child
-        avail = [
-            a for a in avail
-            if a.get("date") not in frozen_days
-            and not (a.get("child_id") and a.get("child_id") in frozen_by_child and a.get("date") in frozen_by_child.get(a.get("child_id"), set()))
-        ]
+        avail = avail.without_days(frozen_days, frozen_by_child)
         
         # Filter events: remove events on frozen days
         events = [
@@ -304,68 +616,7 @@ async def load_planning_context(
         ]
         
         _log("planning.frozen.filtered", frozen_count=len(frozen_days), avail_after=len(avail), events_after=len(events))
-    except Exception as e:
-        _log("planning.frozen.error", error=str(e))
-        # Continue without filtering if query fails
 
-    # Get required minutes per child/subject
-    required_minutes = []
-    for child_id in child_ids:
-        try:
-            _log("planning.required_minutes.rpc", child=child_id)
-            req_res = supa.rpc(
-                "get_required_minutes",
-                {
-                    "p_family_id": family_id,
-                    "p_child_id": child_id,
-                    "p_week_start": str(ws),
-                    "p_weeks_ahead": horizon_weeks
-                }
-            ).execute()
-            rows = req_res.data or []
-            required_minutes.extend([{"child_id": child_id, **r} for r in rows])
-            _log("planning.required_minutes.success", child=child_id, rows=len(rows))
-        except Exception as e:
-            _log("planning.required_minutes.error", child=child_id, error=str(e))
-    
-    # Get learning velocities
-    _log("planning.velocity.query")
-    velocities_res = supa.table("learning_velocity").select("*").eq(
-        "family_id", family_id
-    ).in_("child_id", child_ids).execute()
-    velocities = velocities_res.data or []
-    _log("planning.velocity.success", count=len(velocities))
-    
-    # Get recent struggles from outcomes (last 30 days) to inform scheduling
-    _log("planning.struggles.query")
-    struggles_by_child_subject = {}
-    try:
-        thirty_days_ago = (ws - dt.timedelta(days=30)).isoformat()
-        outcomes_res = supa.table("event_outcomes").select(
-            "child_id, subject_id, struggles"
-        ).eq("family_id", family_id).in_("child_id", child_ids).gte(
-            "created_at", thirty_days_ago
-        ).execute()
-        
-        for outcome in (outcomes_res.data or []):
-            child_id = outcome.get("child_id")
-            subject_id = outcome.get("subject_id")
-            struggles = outcome.get("struggles", [])
-            if struggles and child_id:
-                key = f"{child_id}:{subject_id or 'none'}"
-                if key not in struggles_by_child_subject:
-                    struggles_by_child_subject[key] = []
-                struggles_by_child_subject[key].extend(struggles)
-        
-        # Deduplicate struggles per child/subject
-        for key in struggles_by_child_subject:
-            struggles_by_child_subject[key] = list(set(struggles_by_child_subject[key]))
-        
-        _log("planning.struggles.success", count=len(struggles_by_child_subject))
-    except Exception as e:
-        _log("planning.struggles.error", error=str(e))
-        # Non-critical, continue without struggles data
-    
     # Calculate current minutes by day per child (for constraint checking)
     # Format: { "YYYY-MM-DD": { "child_id": total_minutes } }
     current_minutes_by_day = {}
@@ -385,47 +636,6 @@ async def load_planning_context(
     # Could be made configurable per family in the future
     max_minutes_per_day = 240
     
-    # Get standards gaps for each child (if they have active preferences)
-    _log("planning.standards_gaps.query")
-    standards_gaps_by_child = {}
-    try:
-        for child_id in child_ids:
-            # Get active standards preferences for this child
-            prefs_res = supa.table("user_standards_preferences").select(
-                "state_code, grade_level, subject_id"
-            ).eq("child_id", child_id).eq("is_active", True).execute()
-            
-            prefs = prefs_res.data or []
-            if prefs:
-                # Get gaps for each preference
-                gaps_for_child = []
-                for pref in prefs:
-                    try:
-                        gaps_res = supa.rpc(
-                            "get_standards_gaps",
-                            {
-                                "p_child_id": child_id,
-                                "p_state_code": pref["state_code"],
-                                "p_grade_level": pref["grade_level"],
-                                "p_subject": None,  # Get all subjects
-                                "p_limit": 10,  # Top 10 gaps
-                            }
-                        ).execute()
-                        
-                        gaps = gaps_res.data or []
-                        gaps_for_child.extend(gaps)
-                    except Exception as e:
-                        _log("planning.standards_gaps.rpc.error", child=child_id, error=str(e))
-                        # Continue with other preferences
-                
-                if gaps_for_child:
-                    standards_gaps_by_child[child_id] = gaps_for_child[:10]  # Limit to top 10
-        
-        _log("planning.standards_gaps.success", children_with_gaps=len(standards_gaps_by_child))
-    except Exception as e:
-        _log("planning.standards_gaps.error", error=str(e))
-        # Non-critical, continue without standards gaps
-    
     result = {
         "family_id": family_id,
         "window": {"start": str(ws), "end": str(we)},
@@ -450,10 +660,10 @@ async def persist_ai_plan(
     proposal: Dict[str, Any]
 ) -> Tuple[str, Dict[str, int], List[Dict[str, Any]]]:
     """Persist AI plan and changes to database"""
-    supa = get_admin_client()
+    supa = get_async_client()
     
     # Create plan
-    plan_res = supa.table("ai_plans").insert({
+    plan_res = await supa.table("ai_plans").insert({
         "family_id": family_id,
         "week_start": week_start,
         "scope": scope,
@@ -503,7 +713,7 @@ async def persist_ai_plan(
         })
     
     if changes:
-        inserted = supa.table("ai_plan_changes").insert(changes).execute()
+        inserted = await supa.table("ai_plan_changes").insert(changes).execute()
         # Return changes with their database IDs
         persisted_changes = inserted.data
     else:
@@ -520,13 +730,24 @@ async def apply_ai_plan_changes(
     approvals: List[Dict[str, Any]]
 ) -> Dict[str, Any]:
     """Apply approved changes atomically"""
-    supa = get_admin_client()
+    supa = get_async_client()
     
     # Fetch plan and changes
-    plan_res = supa.table("ai_plans").select("*").eq("id", plan_id).single().execute()
+    plan_res = await supa.table("ai_plans").select("*").eq("id", plan_id).single().execute()
     plan = plan_res.data
+    scope = plan.get("scope") or {}
     
-    changes_res = supa.table("ai_plan_changes").select("*").eq("plan_id", plan_id).execute()
+    # Was the proposal built from the data as it is now?
+    snapshot_current = await planning_snapshot_is_current(
+        plan["family_id"],
+        plan["week_start"],
+        scope.get("childIds") or [],
+        scope.get("horizonWeeks") or 2,
+        scope.get("snapshotVersion"),
+        route="approve",
+    )
+    
+    changes_res = await supa.table("ai_plan_changes").select("*").eq("plan_id", plan_id).execute()
     changes = changes_res.data
     
     # Build approval map
@@ -554,7 +775,7 @@ async def apply_ai_plan_changes(
         
         try:
             if change_type == "add":
-                supa.table("events").insert({
+                await supa.table("events").insert({
                     "family_id": plan["family_id"],
                     "child_id": payload["child_id"],
                     "subject_id": payload.get("subject_id"),
@@ -567,18 +788,18 @@ async def apply_ai_plan_changes(
                 adds += 1
                 
             elif change_type == "move":
-                supa.table("events").update({
+                await supa.table("events").update({
                     "start_ts": payload["to_start"],
                     "end_ts": payload["to_end"]
                 }).eq("id", payload["event_id"]).execute()
                 moves += 1
                 
             elif change_type == "delete":
-                supa.table("events").delete().eq("id", payload["event_id"]).execute()
+                await supa.table("events").delete().eq("id", payload["event_id"]).execute()
                 deletes += 1
             
             # Mark change as applied
-            supa.table("ai_plan_changes").update({
+            await supa.table("ai_plan_changes").update({
                 "applied": True,
                 "approved": True
             }).eq("id", ch["id"]).execute()
@@ -592,7 +813,7 @@ async def apply_ai_plan_changes(
     applied_total = adds + moves + deletes
     status = "applied" if applied_total == total_approved else "partial"
     
-    supa.table("ai_plans").update({
+    await supa.table("ai_plans").update({
         "status": status,
         "applied_at": dt.datetime.now(dt.timezone.utc).isoformat()
     }).eq("id", plan_id).execute()
@@ -602,7 +823,7 @@ async def apply_ai_plan_changes(
     we = str(dt.date.fromisoformat(ws) + dt.timedelta(days=14))
     
     try:
-        supa.rpc(
+        await supa.rpc(
             "refresh_calendar_days_cache",
             {
                 "p_family_id": plan["family_id"],
@@ -612,22 +833,27 @@ async def apply_ai_plan_changes(
         ).execute()
     except Exception as e:
         print(f"Warning: Failed to refresh cache: {e}")
+    finally:
+        # After the refresh, so a planning context loaded meanwhile is not cached with the old days
+        if applied_total:
+            await invalidate_async(family_id=plan["family_id"])
     
     return {
         "applied": True,
         "counts": {"adds": adds, "moves": moves, "deletes": deletes},
-        "status": status
+        "status": status,
+        "stale": not snapshot_current
     }
 
 async def util_save_outline(syllabus_id: str, outline: Dict[str, Any]) -> Dict[str, Any]:
     """Save parsed outline to syllabi_sections table (if exists)"""
-    supa = get_admin_client()
+    supa = get_async_client()
     
     # If you have a syllabi_sections table, save there
     # Otherwise, update the syllabi table metadata
     try:
         # Example: save to metadata JSONB column
-        supa.table("syllabi").update({
+        await supa.table("syllabi").update({
             "metadata": outline
         }).eq("id", syllabus_id).execute()
         
@@ -2,13 +2,13 @@
 FastAPI routes for year planning features
 Part of Phase 1 - Year-Round Intelligence Core
 """
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime, timedelta
 import sys
 from pathlib import Path
-import time
+import asyncio
 import hashlib
 import json
 
@@ -21,15 +21,16 @@ from auth import get_current_user, rate_limiter
 from helpers import get_family_id_for_user, child_belongs_to_family
 from logger import log_event
 from metrics import increment_counter
+from http_cache import conditional_json
 
 try:
-    from supabase_client import get_admin_client
+    from supabase_async import get_async_client
 except ImportError:
     import importlib.util
-    spec = importlib.util.spec_from_file_location("supabase_client", backend_dir / "supabase_client.py")
-    supabase_client = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(supabase_client)
-    get_admin_client = supabase_client.get_admin_client
+    spec = importlib.util.spec_from_file_location("supabase_async", backend_dir / "supabase_async.py")
+    supabase_async = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(supabase_async)
+    get_async_client = supabase_async.get_async_client
 
 router = APIRouter(prefix="/api/year", tags=["year"])
 
@@ -160,7 +161,7 @@ async def create_year_plan(
     
     try:
         # Validate family access
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id or family_id != body.familyId:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -178,9 +179,9 @@ async def create_year_plan(
             )
         
         # Validate children belong to family
-        supabase = get_admin_client()
+        supabase = get_async_client()
         for child in body.children:
-            if not child_belongs_to_family(child.childId, family_id):
+            if not await child_belongs_to_family(child.childId, family_id):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Child {child.childId} does not belong to family"
@@ -222,7 +223,7 @@ async def create_year_plan(
         last_error = None
         for attempt in range(max_retries):
             try:
-                result = supabase.rpc(
+                result = await supabase.rpc(
                     "create_year_plan",
                     {
                         "p_family_id": family_id,
@@ -279,10 +280,10 @@ async def create_year_plan(
                         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                         detail=detail_msg
                     )
-                time.sleep(0.5 * (attempt + 1))  # Exponential backoff
+                await asyncio.sleep(0.5 * (attempt + 1))  # Exponential backoff
         
         # Fetch created plan
-        plan_resp = supabase.table("year_plans").select("*").eq("id", year_plan_id).single().execute()
+        plan_resp = await supabase.table("year_plans").select("*").eq("id", year_plan_id).single().execute()
         if not plan_resp.data:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -316,6 +317,7 @@ async def create_year_plan(
 
 @router.get("/heatmap", response_model=List[HeatmapRow])
 async def get_heatmap(
+    request: Request,
     familyId: str = Query(..., description="Family ID"),
     start: str = Query(..., description="Start date (YYYY-MM-DD)"),
     end: str = Query(..., description="End date (YYYY-MM-DD)"),
@@ -331,7 +333,7 @@ async def get_heatmap(
     
     try:
         # Validate family access
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -364,8 +366,8 @@ async def get_heatmap(
         start_date, end_date = validate_dates(start, end)
         
         # Call RPC
-        supabase = get_admin_client()
-        result = supabase.rpc(
+        supabase = get_async_client()
+        result = await supabase.rpc(
             "get_curriculum_heatmap",
             {
                 "p_family_id": family_id,
@@ -377,18 +379,20 @@ async def get_heatmap(
         if result.data is None:
             return []  # Empty but valid shape for new users
         
-        # Transform to response model
-        rows = []
-        for row in result.data:
-            rows.append(HeatmapRow(
-                week_start=row["week_start"],
-                subject=row["subject"],
-                minutes_scheduled=float(row["minutes_scheduled"] or 0),
-                minutes_done=float(row["minutes_done"] or 0)
-            ))
+        # Already in HeatmapRow shape, so sent without response_model validation
+        rows = [
+            {
+                "week_start": str(row["week_start"]),
+                "subject": row["subject"],
+                "minutes_scheduled": float(row["minutes_scheduled"] or 0),
+                "minutes_done": float(row["minutes_done"] or 0),
+            }
+            for row in result.data
+        ]
         
         log_event("year.heatmap.success", user_id=user["id"], family_hash=hash_family_id(family_id), row_count=len(rows))
-        return rows
+        # ETag over the encoded body; unchanged polls get a 304
+        return conditional_json(request, rows)
         
     except HTTPException:
         raise
@@ -414,8 +418,8 @@ async def rebalance_schedule(
     
     try:
         # Validate family access via year plan
-        supabase = get_admin_client()
-        plan_resp = supabase.table("year_plans").select("family_id").eq("id", body.yearPlanId).single().execute()
+        supabase = get_async_client()
+        plan_resp = await supabase.table("year_plans").select("family_id").eq("id", body.yearPlanId).single().execute()
         
         if not plan_resp.data:
             raise HTTPException(
@@ -424,7 +428,7 @@ async def rebalance_schedule(
             )
         
         family_id = plan_resp.data["family_id"]
-        user_family_id = get_family_id_for_user(user["id"])
+        user_family_id = await get_family_id_for_user(user["id"])
         
         if not user_family_id or user_family_id != family_id:
             raise HTTPException(
@@ -442,7 +446,7 @@ async def rebalance_schedule(
             )
         
         # Call RPC
-        result = supabase.rpc(
+        result = await supabase.rpc(
             "rebalance_schedule",
             {
                 "p_year_plan_id": body.yearPlanId,
@@ -500,25 +504,25 @@ async def prefill_year_plan(
     
     try:
         # Validate family access
-        family_id = get_family_id_for_user(user["id"])
+        family_id = await get_family_id_for_user(user["id"])
         if not family_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Family not found"
             )
         
-        if not child_belongs_to_family(childId, family_id):
+        if not await child_belongs_to_family(childId, family_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Child does not belong to family"
             )
         
         # Get last year's events to calculate averages
-        supabase = get_admin_client()
+        supabase = get_async_client()
         one_year_ago = (datetime.now() - timedelta(days=365)).isoformat()
         
         # Events table only has subject_id, not subject name
-        events_resp = supabase.table("events").select(
+        events_resp = await supabase.table("events").select(
             "subject_id, minutes, start_ts"
         ).eq(
             "child_id", childId
@@ -531,7 +535,7 @@ async def prefill_year_plan(
         # If no events found, fallback to onboarding interests
         if not events_resp.data:
             # Get child's interests from onboarding
-            child_resp = supabase.table("children").select("interests").eq("id", childId).single().execute()
+            child_resp = await supabase.table("children").select("interests").eq("id", childId).single().execute()
             
             if child_resp.data:
                 interests_raw = child_resp.data.get("interests", [])
@@ -613,7 +617,7 @@ async def prefill_year_plan(
                 # If table has family_id column, filter by it
                 if table_name == "subject":
                     query = query.eq("family_id", family_id)
-                subjects_resp = query.execute()
+                subjects_resp = await query.execute()
                 if subjects_resp.data:
                     subject_map = {s["id"]: s["name"] for s in subjects_resp.data}
                     break  # Got names, stop trying
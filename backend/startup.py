@@ -0,0 +1,86 @@
+"""
+Cold-start bookkeeping: per-module import timing and optional preloading.
+
+main.py imports each router through timed_import(), so the report shows what
+every router module cost on top of what was already loaded (the first router
+to pull in a shared dependency pays for it). The heavy third-party packages
+(openai, supabase, pypdf, requests, psycopg) are imported on first use, which
+keeps serverless cold starts short. Long-lived servers that would rather pay
+at boot than on the first request set PRELOAD_DEPENDENCIES=1: startup then
+imports them and builds the shared Supabase and OpenAI clients.
+
+    python -X importtime -c "import main"     # full import tree
+    python benchmarks/import_time.py          # per-module summary with a budget
+"""
+import importlib
+import os
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict
+
+PRELOAD_DEPENDENCIES = os.getenv("PRELOAD_DEPENDENCIES", "").lower() in ("1", "true", "yes")
+
+# Imported lazily by the modules that need them
+HEAVY_MODULES = ("openai", "supabase", "pypdf", "requests", "psycopg")
+
+# app_ms counts from here: main.py imports this module just before its routers
+_started = time.perf_counter()
+_lock = threading.Lock()
+_imports: Dict[str, float] = {}
+_preloaded: Dict[str, float] = {}
+_ready_ms: float = 0.0
+
+
+def timed_import(name: str) -> ModuleType:
+    """Import a module and record how long it took."""
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        _imports.setdefault(name, (time.perf_counter() - started) * 1000.0)
+    return module
+
+
+def mark_ready():
+    """Record that the app module finished importing."""
+    global _ready_ms
+    _ready_ms = (time.perf_counter() - _started) * 1000.0
+
+
+def _timed(name: str, fn) -> Any:
+    started = time.perf_counter()
+    try:
+        return fn()
+    except ImportError:
+        # Optional package not installed; it is only needed by one endpoint
+        return None
+    finally:
+        with _lock:
+            _preloaded[name] = (time.perf_counter() - started) * 1000.0
+
+
+def preload() -> Dict[str, float]:
+    """Import the lazily loaded dependencies and build the shared clients now."""
+    for name in HEAVY_MODULES:
+        _timed(name, lambda: importlib.import_module(name))
+
+    from llm import get_client
+    from supabase_client import get_admin_client
+
+    _timed("openai.client", get_client)
+    _timed("supabase.client", get_admin_client)
+    with _lock:
+        return dict(_preloaded)
+
+
+def import_report() -> Dict[str, Any]:
+    """Startup import timings, slowest first."""
+    with _lock:
+        imports = sorted(_imports.items(), key=lambda item: item[1], reverse=True)
+        preloaded = dict(_preloaded)
+    return {
+        "app_ms": round(_ready_ms, 1),
+        "routers_ms": round(sum(ms for _, ms in imports), 1),
+        "modules": {name: round(ms, 1) for name, ms in imports},
+        "preloaded": {name: round(ms, 1) for name, ms in preloaded.items()},
+    }
@@ -0,0 +1,637 @@
+"""
+Pluggable storage for state that should be shared by every uvicorn worker:
+cache entries (cache.py), rate-limit counters (auth.py) and metrics (metrics.py).
+
+STATE_BACKEND=memory (default) keeps everything in this process, as before.
+STATE_BACKEND=sqlite keeps it in one SQLite database in WAL mode at
+STATE_SQLITE_PATH, so all workers on a host share one cache, one set of
+rate-limit counters and one view of the metrics. No outside service needed.
+
+Two kinds of storage:
+- key/value (get/set/update/items) with an optional TTL per key
+- cache entries (cache_*): soft/hard expiry, tags, LRU bounds
+
+Backend methods are synchronous. Async code goes through run_state_io(),
+which calls them inline for the memory backend and on the I/O thread pool
+for SQLite, so a busy database never stalls the event loop.
+"""
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_SQLITE_PATH = os.getenv(
+    "STATE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "learnadoodle-state.sqlite3")
+)
+# Expired keys are swept after this many writes (per namespace)
+_SWEEP_EVERY = 1024
+
+# (fresh_until, expires_at, value)
+CacheHit = Tuple[float, float, Any]
+
+
+def _log(msg: str, **kwargs):
+    context = " ".join([f"{k}={v!r}" for k, v in kwargs.items()])
+    print(f"[STATE] {msg}{(' ' + context) if context else ''}")
+
+
+class StateBackend(ABC):
+    """Interface shared by the in-process and SQLite backends."""
+
+    name = "base"
+    shared = False  # True when other processes see the same state
+    blocking_io = False  # True when calls do file or network I/O
+
+    # key/value
+    @abstractmethod
+    def get(self, ns: str, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, ns: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, ns: str, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def update(
+        self,
+        ns: str,
+        key: str,
+        fn: Callable[[Any], Tuple[Any, Any]],
+        ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        """Atomically replace a value: fn(current or None) -> (new_value, result).
+
+        new_value None deletes the key; result is returned to the caller.
+        """
+        ...
+
+    @abstractmethod
+    def items(self, ns: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def clear(self, ns: str):
+        ...
+
+    @abstractmethod
+    def usage(self, ns: str) -> Dict[str, int]:
+        """Key count and approximate bytes held for a namespace (expired keys included until swept)."""
+        ...
+
+    # cache entries
+    @abstractmethod
+    def cache_get(self, ns: str, key: str) -> Tuple[Optional[CacheHit], bool]:
+        """((fresh_until, expires_at, value) or None, whether it had just expired)."""
+        ...
+
+    @abstractmethod
+    def cache_set(
+        self,
+        ns: str,
+        key: str,
+        value: Any,
+        size: int,
+        fresh_until: float,
+        expires_at: float,
+        tags: Tuple[str, ...],
+        max_entries: int,
+        max_bytes: int,
+        since: Optional[float] = None,
+    ) -> Tuple[bool, int, int]:
+        """Store an entry, evicting LRU entries past the bounds.
+
+        Skipped when one of the tags was invalidated at or after `since`
+        (the time the value started loading). Returns (stored, evictions, expirations).
+        """
+        ...
+
+    @abstractmethod
+    def cache_delete(self, ns: str, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def cache_invalidate(self, ns: str, tags: Iterable[str]) -> int:
+        ...
+
+    @abstractmethod
+    def cache_clear(self, ns: str):
+        ...
+
+    @abstractmethod
+    def cache_info(self, ns: str) -> Dict[str, int]:
+        ...
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.name, "shared": self.shared}
+
+
+class _CacheSpace:
+    __slots__ = ("entries", "bytes", "tag_index")
+
+    def __init__(self):
+        # key -> (fresh_until, expires_at, size, value, tags)
+        self.entries: "OrderedDict[str, Tuple[float, float, int, Any, Tuple[str, ...]]]" = OrderedDict()
+        self.bytes = 0
+        self.tag_index: Dict[str, Set[str]] = {}
+
+
+class MemoryBackend(StateBackend):
+    """Per-process dicts (the default). In-flight cache loads are tracked by the
+    caller, so `since` is not needed here."""
+
+    name = "memory"
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # ns -> key -> (expires_at or None, value)
+        self._kv: Dict[str, Dict[str, Tuple[Optional[float], Any]]] = {}
+        self._writes: Dict[str, int] = {}
+        self._caches: Dict[str, _CacheSpace] = {}
+
+    # key/value
+
+    def _sweep_locked(self, ns: str, space: Dict[str, Tuple[Optional[float], Any]]):
+        writes = self._writes.get(ns, 0) + 1
+        if writes < _SWEEP_EVERY:
+            self._writes[ns] = writes
+            return
+        self._writes[ns] = 0
+        now = time.time()
+        for key in [k for k, (exp, _) in space.items() if exp is not None and exp < now]:
+            del space[key]
+
+    def _live_locked(self, ns: str, key: str) -> Any:
+        space = self._kv.get(ns)
+        entry = space.get(key) if space else None
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.time():
+            del space[key]
+            return None
+        return value
+
+    def get(self, ns: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            value = self._live_locked(ns, key)
+        return default if value is None else value
+
+    def set(self, ns: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        with self._lock:
+            space = self._kv.setdefault(ns, {})
+            space[key] = (time.time() + ttl_seconds if ttl_seconds else None, value)
+            self._sweep_locked(ns, space)
+
+    def delete(self, ns: str, key: str) -> bool:
+        with self._lock:
+            space = self._kv.get(ns)
+            return bool(space) and space.pop(key, None) is not None
+
+    def update(self, ns, key, fn, ttl_seconds=None):
+        with self._lock:
+            new_value, result = fn(self._live_locked(ns, key))
+            space = self._kv.setdefault(ns, {})
+            if new_value is None:
+                space.pop(key, None)
+            else:
+                space[key] = (time.time() + ttl_seconds if ttl_seconds else None, new_value)
+                self._sweep_locked(ns, space)
+            return result
+
+    def items(self, ns: str) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            space = self._kv.get(ns) or {}
+            return {k: v for k, (exp, v) in space.items() if exp is None or exp >= now}
+
+    def clear(self, ns: str):
+        with self._lock:
+            self._kv.pop(ns, None)
+            self._writes.pop(ns, None)
+
+    def usage(self, ns: str) -> Dict[str, int]:
+        with self._lock:
+            space = self._kv.get(ns) or {}
+            size = sys.getsizeof(space)
+            for key, entry in space.items():
+                size += sys.getsizeof(key) + sys.getsizeof(entry) + sys.getsizeof(entry[1])
+                if isinstance(entry[1], tuple):
+                    size += sum(sys.getsizeof(v) for v in entry[1])
+            return {"keys": len(space), "bytes": size}
+
+    # cache entries
+
+    @staticmethod
+    def _drop(space: _CacheSpace, key: str):
+        entry = space.entries.pop(key, None)
+        if entry:
+            space.bytes -= entry[2]
+            for tag in entry[4]:
+                keys = space.tag_index.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del space.tag_index[tag]
+
+    def cache_get(self, ns, key):
+        with self._lock:
+            space = self._caches.get(ns)
+            entry = space.entries.get(key) if space else None
+            if entry is None:
+                return None, False
+            fresh_until, expires_at, _, value, _ = entry
+            if expires_at < time.time():
+                self._drop(space, key)
+                return None, True
+            space.entries.move_to_end(key)
+            return (fresh_until, expires_at, value), False
+
+    def cache_set(self, ns, key, value, size, fresh_until, expires_at, tags, max_entries, max_bytes, since=None):
+        with self._lock:
+            space = self._caches.setdefault(ns, _CacheSpace())
+            self._drop(space, key)
+            if size > max_bytes:
+                # Larger than the whole budget: not worth caching
+                return False, 1, 0
+            space.entries[key] = (fresh_until, expires_at, size, value, tags)
+            space.bytes += size
+            for tag in tags:
+                space.tag_index.setdefault(tag, set()).add(key)
+            evictions = expirations = 0
+            now = time.time()
+            while space.entries and (len(space.entries) > max_entries or space.bytes > max_bytes):
+                old_key, old = next(iter(space.entries.items()))
+                self._drop(space, old_key)
+                if old[1] < now:
+                    expirations += 1
+                else:
+                    evictions += 1
+            return True, evictions, expirations
+
+    def cache_delete(self, ns, key):
+        with self._lock:
+            space = self._caches.get(ns)
+            if not space or key not in space.entries:
+                return False
+            self._drop(space, key)
+            return True
+
+    def cache_invalidate(self, ns, tags):
+        removed = 0
+        with self._lock:
+            space = self._caches.get(ns)
+            if not space:
+                return 0
+            for tag in tags:
+                for key in list(space.tag_index.get(tag, ())):
+                    self._drop(space, key)
+                    removed += 1
+        return removed
+
+    def cache_clear(self, ns):
+        with self._lock:
+            self._caches.pop(ns, None)
+
+    def cache_info(self, ns):
+        with self._lock:
+            space = self._caches.get(ns)
+            if not space:
+                return {"entries": 0, "bytes": 0, "tags": 0}
+            return {"entries": len(space.entries), "bytes": space.bytes, "tags": len(space.tag_index)}
+
+    def info(self):
+        with self._lock:
+            return {
+                "backend": self.name,
+                "shared": self.shared,
+                "kv_keys": {ns: len(space) for ns, space in self._kv.items()},
+                "cache_entries": {ns: len(space.entries) for ns, space in self._caches.items()},
+            }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at) WHERE expires_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS cache_entries (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fresh_until REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+);
+CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (ns, accessed_at);
+CREATE TABLE IF NOT EXISTS cache_tags (
+    ns TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (ns, tag, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_tags_key ON cache_tags (ns, key);
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    ns TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    at REAL NOT NULL,
+    PRIMARY KEY (ns, tag)
+) WITHOUT ROWID;
+"""
+
+# LRU order is only refreshed when an entry was last touched this long ago,
+# so most cache hits stay read-only.
+_TOUCH_INTERVAL = 1.0
+
+
+class SQLiteBackend(StateBackend):
+    """One SQLite file (WAL mode) shared by every worker process on the host.
+
+    Each thread keeps its own connection. Values are pickled, so all workers
+    must run the same code version.
+    """
+
+    name = "sqlite"
+    shared = True
+    blocking_io = True
+
+    def __init__(self, path: str = STATE_SQLITE_PATH, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().executescript(_SCHEMA)
+        _log("sqlite.ready", path=path)
+
+    def _conn(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _tx(self):
+        db = self._conn()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def _dump(value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _maybe_sweep(self, db: sqlite3.Connection, now: float):
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            db.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+
+    # key/value
+
+    def get(self, ns, key, default=None):
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM kv WHERE ns = ? AND key = ?", (ns, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return default
+        return pickle.loads(row[0])
+
+    def set(self, ns, key, value, ttl_seconds=None):
+        now = time.time()
+        with self._tx() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO kv (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (ns, key, self._dump(value), now + ttl_seconds if ttl_seconds else None),
+            )
+            self._maybe_sweep(db, now)
+
+    def delete(self, ns, key):
+        with self._tx() as db:
+            return db.execute("DELETE FROM kv WHERE ns = ? AND key = ?", (ns, key)).rowcount > 0
+
+    def update(self, ns, key, fn, ttl_seconds=None):
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute("SELECT value, expires_at FROM kv WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            current = None
+            if row is not None and (row[1] is None or row[1] >= now):
+                current = pickle.loads(row[0])
+            new_value, result = fn(current)
+            if new_value is None:
+                db.execute("DELETE FROM kv WHERE ns = ? AND key = ?", (ns, key))
+            else:
+                db.execute(
+                    "INSERT OR REPLACE INTO kv (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (ns, key, self._dump(new_value), now + ttl_seconds if ttl_seconds else None),
+                )
+                self._maybe_sweep(db, now)
+            return result
+
+    def items(self, ns):
+        rows = self._conn().execute(
+            "SELECT key, value FROM kv WHERE ns = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (ns, time.time()),
+        ).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def clear(self, ns):
+        with self._tx() as db:
+            db.execute("DELETE FROM kv WHERE ns = ?", (ns,))
+
+    def usage(self, ns):
+        keys, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(key) + LENGTH(value)), 0) FROM kv WHERE ns = ?", (ns,)
+        ).fetchone()
+        return {"keys": keys, "bytes": size}
+
+    # cache entries
+
+    @staticmethod
+    def _cache_drop(db: sqlite3.Connection, ns: str, key: str) -> bool:
+        db.execute("DELETE FROM cache_tags WHERE ns = ? AND key = ?", (ns, key))
+        return db.execute("DELETE FROM cache_entries WHERE ns = ? AND key = ?", (ns, key)).rowcount > 0
+
+    def cache_get(self, ns, key):
+        db = self._conn()
+        row = db.execute(
+            "SELECT value, fresh_until, expires_at, accessed_at FROM cache_entries WHERE ns = ? AND key = ?",
+            (ns, key),
+        ).fetchone()
+        if row is None:
+            return None, False
+        blob, fresh_until, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at < now:
+            with self._tx() as tx:
+                tx.execute("DELETE FROM cache_tags WHERE ns = ? AND key = ?", (ns, key))
+                tx.execute(
+                    "DELETE FROM cache_entries WHERE ns = ? AND key = ? AND expires_at < ?", (ns, key, now)
+                )
+            return None, True
+        if now - accessed_at > _TOUCH_INTERVAL:
+            with self._tx() as tx:
+                tx.execute(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE ns = ? AND key = ?", (now, ns, key)
+                )
+        return (fresh_until, expires_at, pickle.loads(blob)), False
+
+    def cache_set(self, ns, key, value, size, fresh_until, expires_at, tags, max_entries, max_bytes, since=None):
+        blob = self._dump(value)
+        size = len(blob)
+        now = time.time()
+        with self._tx() as db:
+            if since is not None and tags:
+                marks = ",".join("?" * len(tags))
+                invalidated = db.execute(
+                    f"SELECT 1 FROM cache_invalidations WHERE ns = ? AND tag IN ({marks}) AND at >= ? LIMIT 1",
+                    (ns, *tags, since),
+                ).fetchone()
+                if invalidated:
+                    # Another worker wrote while this value was loading
+                    return False, 0, 0
+            self._cache_drop(db, ns, key)
+            if size > max_bytes:
+                return False, 1, 0
+            db.execute(
+                "INSERT INTO cache_entries (ns, key, value, size, fresh_until, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ns, key, blob, size, fresh_until, expires_at, now),
+            )
+            db.executemany(
+                "INSERT OR IGNORE INTO cache_tags (ns, tag, key) VALUES (?, ?, ?)",
+                [(ns, tag, key) for tag in tags],
+            )
+            count, total = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE ns = ?", (ns,)
+            ).fetchone()
+            evictions = expirations = 0
+            while count > max_entries or total > max_bytes:
+                victim = db.execute(
+                    "SELECT key, size, expires_at FROM cache_entries WHERE ns = ? ORDER BY accessed_at LIMIT 1",
+                    (ns,),
+                ).fetchone()
+                if victim is None:
+                    break
+                self._cache_drop(db, ns, victim[0])
+                count -= 1
+                total -= victim[1]
+                if victim[2] < now:
+                    expirations += 1
+                else:
+                    evictions += 1
+            return True, evictions, expirations
+
+    def cache_delete(self, ns, key):
+        with self._tx() as db:
+            return self._cache_drop(db, ns, key)
+
+    def cache_invalidate(self, ns, tags):
+        tags = list(tags)
+        if not tags:
+            return 0
+        now = time.time()
+        marks = ",".join("?" * len(tags))
+        with self._tx() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO cache_invalidations (ns, tag, at) VALUES (?, ?, ?)",
+                [(ns, tag, now) for tag in tags],
+            )
+            keys = [
+                row[0]
+                for row in db.execute(
+                    f"SELECT DISTINCT key FROM cache_tags WHERE ns = ? AND tag IN ({marks})", (ns, *tags)
+                ).fetchall()
+            ]
+            for key in keys:
+                self._cache_drop(db, ns, key)
+            # Marks only matter to loads that are still running
+            db.execute("DELETE FROM cache_invalidations WHERE at < ?", (now - 3600,))
+        return len(keys)
+
+    def cache_clear(self, ns):
+        with self._tx() as db:
+            db.execute("DELETE FROM cache_tags WHERE ns = ?", (ns,))
+            db.execute("DELETE FROM cache_entries WHERE ns = ?", (ns,))
+
+    def cache_info(self, ns):
+        db = self._conn()
+        entries, total = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE ns = ?", (ns,)
+        ).fetchone()
+        tags = db.execute("SELECT COUNT(DISTINCT tag) FROM cache_tags WHERE ns = ?", (ns,)).fetchone()[0]
+        return {"entries": entries, "bytes": total, "tags": tags}
+
+    def info(self):
+        db = self._conn()
+        kv = dict(db.execute("SELECT ns, COUNT(*) FROM kv GROUP BY ns").fetchall())
+        entries = dict(db.execute("SELECT ns, COUNT(*) FROM cache_entries GROUP BY ns").fetchall())
+        return {
+            "backend": self.name,
+            "shared": self.shared,
+            "path": self.path,
+            "kv_keys": kv,
+            "cache_entries": entries,
+        }
+
+
+_backend_lock = threading.Lock()
+_backend: Optional[StateBackend] = None
+
+
+def _build_backend() -> StateBackend:
+    if STATE_BACKEND == "memory":
+        return MemoryBackend()
+    if STATE_BACKEND == "sqlite":
+        return SQLiteBackend(STATE_SQLITE_PATH)
+    raise ValueError(f"Unknown STATE_BACKEND {STATE_BACKEND!r} (expected 'memory' or 'sqlite')")
+
+
+def get_state_backend() -> StateBackend:
+    """The process-wide backend selected by STATE_BACKEND (built on first use)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _build_backend()
+    return _backend
+
+
+async def run_state_io(backend: StateBackend, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await fn(*args, **kwargs), a call into backend, off the event loop when it does blocking I/O."""
+    if not backend.blocking_io:
+        return fn(*args, **kwargs)
+    # Imported here: supabase_async pulls in the Supabase client settings
+    from supabase_async import run_blocking
+    return await run_blocking(fn, *args, **kwargs)
+
+
+def set_state_backend(backend: Optional[StateBackend]):
+    """Replace the process-wide backend (scripts, benchmarks); None rebuilds from env."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
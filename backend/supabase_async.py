@@ -0,0 +1,196 @@
+"""
+Awaitable access to the shared Supabase admin client.
+
+supabase-py's client is synchronous, so calling execute() inside an async
+route handler blocks the event loop for the whole PostgREST round trip.
+Route handlers use get_async_client() instead: builders are chained exactly
+as before, but execute() (and storage/auth calls) run on a bounded thread
+pool and must be awaited.
+
+    supabase = get_async_client()
+    resp = await supabase.table("events").select("*").eq("family_id", fid).execute()
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from db_trace import count_rows, record_call
+from supabase_client import get_admin_client, POOL_SIZE
+
+# Threads available for blocking calls; matching the HTTP pool keeps every
+# worker thread able to get a connection without queueing.
+EXECUTOR_WORKERS = int(os.getenv("SUPABASE_EXECUTOR_WORKERS", str(POOL_SIZE)))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=EXECUTOR_WORKERS,
+            thread_name_prefix="supabase-io",
+        )
+    return _executor
+
+
+def _record(name: str, value: float = 1.0):
+    try:
+        from metrics import increment_counter
+        increment_counter(name, value)
+    except Exception:
+        pass
+
+
+def _observe(name: str, value: float):
+    try:
+        from metrics import observe
+        observe(name, value)
+    except Exception:
+        pass
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable on the bounded I/O pool and await its result.
+
+    The caller's context variables are carried into the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def _call():
+        _observe("db_executor_queue_ms", (time.perf_counter() - submitted) * 1000.0)
+        return fn(*args, **kwargs)
+
+    _record("db_executor_calls")
+    return await loop.run_in_executor(_get_executor(), functools.partial(ctx.run, _call))
+
+
+def _http_method(builder: Any) -> Optional[str]:
+    request = getattr(builder, "request", builder)
+    return getattr(request, "http_method", None)
+
+
+class AsyncQuery:
+    """Wraps a PostgREST request builder; only execute() is awaitable."""
+
+    __slots__ = ("_builder", "_kind", "_name")
+
+    def __init__(self, builder: Any, kind: str = "table", name: str = "?"):
+        self._builder = builder
+        self._kind = kind
+        self._name = name
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._builder, name)
+        if callable(attr):
+            @functools.wraps(attr)
+            def _chain(*args, **kwargs):
+                return self._wrap(attr(*args, **kwargs))
+            return _chain
+        return self._wrap(attr)
+
+    def _wrap(self, value: Any) -> Any:
+        # Filter/modifier methods return a builder (usually self); keep chaining async
+        if value is not None and hasattr(value, "execute"):
+            return AsyncQuery(value, self._kind, self._name)
+        return value
+
+    async def execute(self):
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await run_blocking(self._builder.execute)
+            return result
+        finally:
+            record_call(
+                self._kind,
+                self._name,
+                _http_method(self._builder),
+                (time.perf_counter() - started) * 1000.0,
+                count_rows(result),
+            )
+
+
+class _AsyncCalls:
+    """Proxy whose methods run on the I/O pool (storage buckets, auth)."""
+
+    __slots__ = ("_target", "_kind", "_name")
+
+    def __init__(self, target: Any, kind: str, name: str):
+        self._target = target
+        self._kind = kind
+        self._name = name
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def _call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await run_blocking(attr, *args, **kwargs)
+            finally:
+                record_call(self._kind, f"{self._name}.{name}", None, (time.perf_counter() - started) * 1000.0)
+        return _call
+
+
+class _AsyncStorage:
+    __slots__ = ("_storage",)
+
+    def __init__(self, storage: Any):
+        self._storage = storage
+
+    def from_(self, bucket: str) -> _AsyncCalls:
+        return _AsyncCalls(self._storage.from_(bucket), "storage", bucket)
+
+
+class AsyncSupabase:
+    """Async facade over the shared sync admin client."""
+
+    __slots__ = ("_client",)
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    @property
+    def sync(self) -> Any:
+        """Underlying sync client, for code already running off the loop."""
+        return self._client
+
+    def table(self, table_name: str) -> AsyncQuery:
+        return AsyncQuery(self._client.table(table_name), "table", table_name)
+
+    def from_(self, table_name: str) -> AsyncQuery:
+        return self.table(table_name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, **kwargs) -> AsyncQuery:
+        return AsyncQuery(self._client.rpc(fn, params or {}, **kwargs), "rpc", fn)
+
+    @property
+    def storage(self) -> _AsyncStorage:
+        return _AsyncStorage(self._client.storage)
+
+    @property
+    def auth(self) -> _AsyncCalls:
+        return _AsyncCalls(self._client.auth, "auth", "auth")
+
+
+def get_async_client() -> AsyncSupabase:
+    """Get the shared admin client with awaitable execute()."""
+    return AsyncSupabase(get_admin_client())
+
+
+def shutdown_executor():
+    """Stop the I/O pool (app shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
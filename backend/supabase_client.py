@@ -1,11 +1,25 @@
 """
 Supabase client with service role (admin) access
 Never expose service role key to the browser
+
+One client is built lazily per process and shared by every caller. Its HTTP
+connections come from a keep-alive pool so handlers that call
+get_admin_client() several times per request reuse open TLS connections.
 """
 import os
+import threading
+import time
+from dataclasses import fields
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import httpx
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+if TYPE_CHECKING:
+    # supabase (with postgrest, realtime, storage3, ...) is imported when the
+    # client is first built, not at startup
+    from supabase import Client
 
 # Load environment variables from .env file
 env_path = Path(__file__).parent / ".env"
@@ -13,26 +27,196 @@ load_dotenv(dotenv_path=env_path)
 
 _SUPABASE_URL = os.environ.get("SUPABASE_URL")
 _SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+# Serve every query from the seeded in-memory stand-in (fake_supabase.py)
+SUPABASE_FAKE = os.getenv("SUPABASE_FAKE", "").lower() in ("1", "true", "yes")
+
+# Connection pool settings (override via env)
+POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+POOL_KEEPALIVE = int(os.getenv("SUPABASE_POOL_KEEPALIVE", str(POOL_SIZE)))
+KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+REQUEST_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "30"))
+POOL_TIMEOUT = float(os.getenv("SUPABASE_POOL_TIMEOUT", "10"))
 
 def _log(msg: str, **kwargs):
     context = " ".join([f"{k}={v!r}" for k, v in kwargs.items()])
     print(f"[SUPABASE-ADMIN] {msg}{(' ' + context) if context else ''}")
 
-if not _SUPABASE_URL or not _SUPABASE_SERVICE_ROLE_KEY:
+if not SUPABASE_FAKE and (not _SUPABASE_URL or not _SUPABASE_SERVICE_ROLE_KEY):
     raise ValueError(
         "Missing required environment variables. "
         "Please ensure SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are set in .env file"
     )
 
-def get_admin_client() -> Client:
-    """Get Supabase client with service role (bypasses RLS)"""
-    key_preview = f"{_SUPABASE_SERVICE_ROLE_KEY[:6]}...{_SUPABASE_SERVICE_ROLE_KEY[-4:]}" if len(_SUPABASE_SERVICE_ROLE_KEY) > 10 else "<too_short>"
-    print(f"[SUPABASE-ADMIN] Creating client with URL={_SUPABASE_URL} key_preview={key_preview}")
-    _log("create_client.start", url=_SUPABASE_URL, key_preview=key_preview, key_length=len(_SUPABASE_SERVICE_ROLE_KEY))
-    client = create_client(_SUPABASE_URL, _SUPABASE_SERVICE_ROLE_KEY)
+_client_lock = threading.Lock()
+_client: Optional["Client"] = None
+_http_client: Optional[httpx.Client] = None
+
+_pool_lock = threading.Lock()
+_pool_in_use = 0
+_pool_peak = 0
+
+
+def _record(name: str, value: float = 1.0):
+    # metrics is imported lazily so this module stays importable on its own
+    try:
+        from metrics import increment_counter
+        increment_counter(name, value)
+    except Exception:
+        pass
+
+
+def _observe(name: str, value: float):
+    try:
+        from metrics import observe
+        observe(name, value)
+    except Exception:
+        pass
+
+
+def _gauge(name: str, value: float):
+    try:
+        from metrics import set_gauge
+        set_gauge(name, value)
+    except Exception:
+        pass
+
+
+class _PooledTransport(httpx.HTTPTransport):
+    """HTTP transport that counts in-flight requests against the pool size.
+
+    supabase_pool_wait_ms is the time from handing the request to the pool
+    until httpcore reports the first event on a connection (connect_tcp for
+    a new one, send_request_headers for a reused one), i.e. how long the
+    request waited for a free connection.
+    """
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        global _pool_in_use, _pool_peak
+        caller_trace = request.extensions.get("trace")
+        acquired = []
+
+        def trace(event: str, info: dict):
+            if not acquired:
+                acquired.append(time.perf_counter())
+                _observe("supabase_pool_wait_ms", (acquired[0] - started) * 1000.0)
+            if caller_trace is not None:
+                caller_trace(event, info)
+
+        request.extensions["trace"] = trace
+        with _pool_lock:
+            _pool_in_use += 1
+            _pool_peak = max(_pool_peak, _pool_in_use)
+            in_use = _pool_in_use
+        if in_use > POOL_SIZE:
+            # Every connection is busy; this request queues for a free one
+            _record("supabase_pool_saturated")
+        started = time.perf_counter()
+        try:
+            return super().handle_request(request)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            with _pool_lock:
+                _pool_in_use -= 1
+                in_use = _pool_in_use
+            _record("supabase_http_requests")
+            _observe("supabase_http_ms", elapsed_ms)
+            _gauge("supabase_pool_in_use", in_use)
+
+
+def _build_http_client() -> httpx.Client:
+    limits = httpx.Limits(
+        max_connections=POOL_SIZE,
+        max_keepalive_connections=POOL_KEEPALIVE,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT, pool=POOL_TIMEOUT)
+    return httpx.Client(
+        transport=_PooledTransport(limits=limits, http2=False),
+        timeout=timeout,
+        follow_redirects=True,
+    )
+
+
+def _build_client() -> "Client":
+    global _http_client
+    if SUPABASE_FAKE:
+        from fake_supabase import client_from_env
+        _log("client.fake")
+        return client_from_env()
+
     # Verify service role key is being used (starts with 'eyJ' for JWT or is the service role key)
     if not _SUPABASE_SERVICE_ROLE_KEY.startswith('eyJ') and len(_SUPABASE_SERVICE_ROLE_KEY) < 100:
         print(f"WARNING: Service role key format may be incorrect. Expected JWT token.")
-    _log("create_client.success")
+
+    from supabase import ClientOptions, create_client
+
+    option_fields = {f.name for f in fields(ClientOptions)}
+    if "httpx_client" in option_fields:
+        _http_client = _build_http_client()
+        options = ClientOptions(httpx_client=_http_client)
+    else:
+        # Older supabase-py: each sub-client keeps its own session, still reused
+        options = ClientOptions(postgrest_client_timeout=REQUEST_TIMEOUT)
+
+    client = create_client(_SUPABASE_URL, _SUPABASE_SERVICE_ROLE_KEY, options=options)
+    _record("supabase_client_builds")
+    _log(
+        "client.ready",
+        url=_SUPABASE_URL,
+        pool_size=POOL_SIZE,
+        keepalive=POOL_KEEPALIVE,
+        timeout=REQUEST_TIMEOUT,
+        pooled=_http_client is not None,
+    )
     return client
 
+
+def get_admin_client() -> "Client":
+    """Get the shared Supabase client with service role (bypasses RLS)"""
+    global _client
+    client = _client
+    if client is not None:
+        _record("supabase_client_acquires")
+        return client
+
+    with _client_lock:
+        if _client is None:
+            started = time.perf_counter()
+            _client = _build_client()
+            _observe("supabase_client_build_ms", (time.perf_counter() - started) * 1000.0)
+        client = _client
+    _record("supabase_client_acquires")
+    return client
+
+
+def get_pool_stats() -> dict:
+    """Current connection pool usage for diagnostics."""
+    with _pool_lock:
+        return {
+            "pool_size": POOL_SIZE,
+            "keepalive": POOL_KEEPALIVE,
+            "in_use": _pool_in_use,
+            "peak_in_use": _pool_peak,
+            "built": _client is not None,
+        }
+
+
+def set_admin_client(client: Optional["Client"]):
+    """Replace the shared client (e.g. with the fake_supabase stand-in); None rebuilds it lazily."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def reset_admin_client():
+    """Drop the shared client (e.g. after rotating the service role key)."""
+    global _client, _http_client
+    with _client_lock:
+        if _http_client is not None:
+            try:
+                _http_client.close()
+            except Exception:
+                pass
+        _client = None
+        _http_client = None